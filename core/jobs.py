@@ -0,0 +1,184 @@
+# core/jobs.py - تنفيذ مهام تجهيز العملاء في الخلفية
+# طابور محلي داخل العملية (threads) حتى يعمل بدون broker خارجي،
+# وكل مرحلة قابلة لإعادة التنفيذ بأمان فيمكن استكمال أي مهمة من حيث توقفت
+import logging
+import queue
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from .models import ProvisioningJob, Tenant, UserTenant
+from .provisioning import create_database, migrate_pending
+from .tenant_connections import tenant_connections
+
+logger = logging.getLogger(__name__)
+
+
+def stage_create_db(job):
+    create_database(job.db_name)
+
+
+def stage_migrate(job):
+    migrate_pending(job.db_name)
+
+
+def admin_identity(job):
+    """
+    global_id المدير: المحفوظ في المهمة، أو هوية مستخدم موجود بنفس البريد في 'default'
+    (مدير لأكثر من عميل)، أو هوية جديدة. يُحفظ قبل إنشاء أي مستخدم حتى تعطي
+    إعادة المحاولة نفس القيمة
+    """
+    if job.admin_global_id is None:
+        existing = (
+            get_user_model().objects.db_manager(DEFAULT_DB_ALIAS)
+            .filter(username=job.admin_email)
+            .values_list('global_id', flat=True)
+            .first()
+        )
+        job.admin_global_id = existing or uuid.uuid4()
+        job.save(update_fields=['admin_global_id', 'updated_at'])
+    return job.admin_global_id
+
+
+def stage_seed(job):
+    """حساب المدير داخل قاعدة العميل نفسها (بنفس هوية حسابه في 'default')"""
+    db_name = tenant_connections.ensure(job.db_name)
+    User = get_user_model()
+    User.objects.db_manager(db_name).get_or_create(
+        username=job.admin_email,
+        defaults={
+            'email': job.admin_email,
+            'password': job.admin_password,
+            'role': 'admin',
+            'is_staff': True,
+            'global_id': admin_identity(job),
+        },
+    )
+
+
+def stage_admin(job):
+    """سجل العميل وربط المدير به في القاعدة الرئيسية (آخر مرحلة: بعدها يبدأ التوجيه)"""
+    User = get_user_model()
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        tenant, _ = Tenant.objects.using(DEFAULT_DB_ALIAS).get_or_create(
+            subdomain=job.subdomain,
+            defaults={'name': job.name, 'db_name': job.db_name},
+        )
+        # في وضع الجداول المشتركة تكون 'default' هي قاعدة العميل، فيُعاد نفس مستخدم seed
+        user, _ = User.objects.db_manager(DEFAULT_DB_ALIAS).get_or_create(
+            global_id=admin_identity(job),
+            defaults={
+                'username': job.admin_email,
+                'email': job.admin_email,
+                'password': job.admin_password,
+                'role': 'admin',
+            },
+        )
+        UserTenant.objects.using(DEFAULT_DB_ALIAS).get_or_create(
+            user=user, tenant=tenant, defaults={'role': 'admin'}
+        )
+    job.tenant = tenant
+
+
+STAGE_HANDLERS = {
+    'create_db': stage_create_db,
+    'migrate': stage_migrate,
+    'seed': stage_seed,
+    'admin': stage_admin,
+}
+
+
+def run_job(job_id, max_attempts=None, retry_delay=None, close_connections=True):
+    """
+    تنفيذ المراحل المتبقية للمهمة مع إعادة محاولة كل مرحلة عند الفشل
+    close_connections=False عند التنفيذ داخل thread الطلب (eager): اتصالات الطلب
+    نفسه لا تُغلق من هنا
+    """
+    max_attempts = max_attempts or getattr(settings, 'PROVISIONING_MAX_ATTEMPTS', 3)
+    retry_delay = getattr(settings, 'PROVISIONING_RETRY_DELAY', 2) if retry_delay is None else retry_delay
+
+    job = ProvisioningJob.objects.using(DEFAULT_DB_ALIAS).get(pk=job_id)
+    if job.status == 'completed':
+        return job
+    job.status, job.error = 'running', ''
+    job.save(update_fields=['status', 'error', 'updated_at'])
+
+    try:
+        for stage in job.pending_stages:
+            job.current_stage = stage
+            job.save(update_fields=['current_stage', 'updated_at'])
+            for attempt in range(1, max_attempts + 1):
+                job.attempts += 1
+                try:
+                    STAGE_HANDLERS[stage](job)
+                    break
+                except Exception as exc:
+                    logger.warning("provisioning %s: stage %s failed (%s)", job.subdomain, stage, exc)
+                    if attempt == max_attempts:
+                        job.status, job.error = 'failed', f"{stage}: {exc!r}"
+                        job.save(update_fields=['status', 'error', 'attempts', 'updated_at'])
+                        return job
+                    time.sleep(retry_delay * attempt)
+            job.completed_stages = job.completed_stages + [stage]
+            job.save(update_fields=['completed_stages', 'attempts', 'tenant', 'updated_at'])
+
+        job.status, job.current_stage = 'completed', ''
+        job.save(update_fields=['status', 'current_stage', 'updated_at'])
+        return job
+    finally:
+        # threads الطابور تعيش طويلاً: لا نترك اتصالات قواعد العملاء الجديدة مفتوحة
+        if close_connections:
+            connections.close_all()
+
+
+class ProvisioningQueue:
+    """
+    طابور محلي: threads تعمل في الخلفية وتنفذ المهام بالترتيب
+    مع eager=True يتم التنفيذ مباشرة داخل enqueue (مفيد في الاختبارات)
+    """
+
+    def __init__(self, workers=None, eager=None):
+        self.workers = workers or getattr(settings, 'PROVISIONING_WORKERS', 2)
+        self.eager = getattr(settings, 'PROVISIONING_EAGER', False) if eager is None else eager
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def enqueue(self, job_id):
+        if self.eager:
+            run_job(job_id, close_connections=False)
+            return
+        self._start()
+        self._queue.put(job_id)
+
+    def join(self):
+        """انتظار انتهاء كل المهام الموجودة في الطابور"""
+        self._queue.join()
+
+    def _start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for index in range(self.workers):
+                thread = threading.Thread(
+                    target=self._work, name=f"provisioning-{index}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            job_id = self._queue.get()
+            try:
+                run_job(job_id)
+            except Exception:
+                logger.exception("provisioning job %s crashed", job_id)
+            finally:
+                self._queue.task_done()
+
+
+provisioning_queue = ProvisioningQueue()
@@ -0,0 +1,87 @@
+# core/limits.py - فحص حدود الخطة من عدادات محفوظة بدل COUNT(*) في كل طلب
+# العدادات في TenantUsage تتغير بـ F() عند إضافة/حذف/تعطيل مستخدم أو منتج
+# وتُقرأ من كاش في الذاكرة لبضع ثوانٍ، و reconcile_usage يصحح أي انحراف
+# (مثلاً bulk_create أو تعديل مباشر في قاعدة البيانات لا يطلق الإشارات)
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import F
+
+from .models import TenantUsage
+
+# المورد -> (عمود العداد في TenantUsage، حقل الحد في Tenant)
+RESOURCES = {
+    'users': ('active_users', 'max_users'),
+    'products': ('active_products', 'max_products'),
+    'storage': ('size_mb', 'max_storage_mb'),
+}
+
+
+class UsageCounters:
+    """كاش عدادات الاستخدام لكل عميل مع مدة صلاحية قصيرة"""
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl if ttl is not None else getattr(settings, 'TENANT_LIMITS_TTL', 10)
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, tenant_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(tenant_id)
+            if entry and entry[0] > now:
+                return entry[1]
+
+        counters = (
+            TenantUsage.objects.using('default')
+            .filter(tenant_id=tenant_id)
+            .values('active_users', 'active_products', 'size_mb')
+            .first()
+        ) or {'active_users': 0, 'active_products': 0, 'size_mb': 0}
+        with self._lock:
+            self._entries[tenant_id] = (now + self.ttl, counters)
+        return counters
+
+    def is_within_limits(self, tenant, resource_type):
+        if resource_type not in RESOURCES:
+            return True
+        column, limit_field = RESOURCES[resource_type]
+        return self.get(tenant.pk)[column] < getattr(tenant, limit_field)
+
+    def increment(self, tenant_id, resource_type, delta):
+        """تعديل العداد ذرياً في قاعدة البيانات وفي الكاش المحلي"""
+        if tenant_id is None or not delta:
+            return
+        column = RESOURCES[resource_type][0]
+        usage = TenantUsage.objects.using('default').filter(tenant_id=tenant_id)
+        if not usage.update(**{column: F(column) + delta}):
+            _, created = TenantUsage.objects.using('default').get_or_create(
+                tenant_id=tenant_id, defaults={column: max(delta, 0)}
+            )
+            if not created:
+                # عملية أخرى أنشأت الصف بين التحديث و get_or_create
+                usage.update(**{column: F(column) + delta})
+        with self._lock:
+            entry = self._entries.get(tenant_id)
+            if entry:
+                entry[1][column] += delta
+
+    def set(self, tenant_id, **counters):
+        """كتابة القيم الصحيحة بعد إعادة العد (من reconcile_usage)"""
+        TenantUsage.objects.using('default').update_or_create(tenant_id=tenant_id, defaults=counters)
+        self.invalidate(tenant_id)
+
+    def invalidate(self, tenant_id):
+        with self._lock:
+            self._entries.pop(tenant_id, None)
+
+
+usage_counters = UsageCounters()
+
+
+def track_active_change(instance, created, resource_type, tenant_id):
+    """الفرق في العداد حسب حالة is_active قبل الحفظ (من pre_save) وبعده"""
+    was_active = False if created else getattr(instance, '_was_active', instance.is_active)
+    if instance.is_active != was_active:
+        usage_counters.increment(tenant_id, resource_type, 1 if instance.is_active else -1)
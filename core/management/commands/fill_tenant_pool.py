@@ -0,0 +1,16 @@
+# fill_tenant_pool.py - تحديث قاعدة القالب وتجهيز قواعد جاهزة للتسجيلات الجديدة
+from django.core.management.base import BaseCommand
+
+from core.provisioning import fill_pool, refresh_template
+
+
+class Command(BaseCommand):
+    help = "تطبيق الـ migrations على قاعدة القالب وملء مجموعة القواعد الجاهزة"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=10, help="عدد القواعد الجاهزة المطلوب")
+
+    def handle(self, *args, size, **options):
+        refresh_template()
+        created = fill_pool(size)
+        self.stdout.write(self.style.SUCCESS(f"{len(created)} pooled databases created"))
@@ -0,0 +1,105 @@
+# migrate_tenants.py - تشغيل migrations على كل قواعد العملاء وكل schemas العملاء بالتوازي
+# عملاء الجداول المشتركة ليس لهم جداول خاصة: يُحدَّثون مع migrate العادي على SHARED_TENANT_DATABASE
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core.models import Tenant
+from core.placement import placement_alias
+from core.provisioning import is_up_to_date, migrations_signature, target_migrations
+
+
+def migration_targets(tenants):
+    """
+    (اسم الاتصال، pk العميل) لكل عميل له جداوله الخاصة:
+    قاعدة مستقلة باسم قاعدته، و schema باتصال search_path الخاص به (placement_alias)
+    """
+    return [
+        (placement_alias(tenant, tenant.placement), tenant.pk)
+        for tenant in tenants.filter(placement__in=['database', 'schema']).order_by('id')
+    ]
+
+
+def migrate_tenant(db_name, tenant_id, targets):
+    """يعمل داخل عملية منفصلة: إرجاع (db_name, الحالة, المدة, الخطأ)"""
+    django.setup()
+    started = time.perf_counter()
+    # تسجيل الاتصال من جديد في هذه العملية (search_path الـ schema جزء من إعداداته)
+    tenant = Tenant.objects.using(DEFAULT_DB_ALIAS).get(pk=tenant_id)
+    db_name = placement_alias(tenant, tenant.placement)
+    try:
+        if targets and is_up_to_date(db_name, targets):
+            return db_name, 'skipped', time.perf_counter() - started, None
+        call_command('migrate', database=db_name, interactive=False, verbosity=0)
+        return db_name, 'migrated', time.perf_counter() - started, None
+    except Exception as exc:
+        return db_name, 'failed', time.perf_counter() - started, repr(exc)
+    finally:
+        connections[db_name].close()
+
+
+class Command(BaseCommand):
+    help = "تشغيل migrations على كل قواعد بيانات العملاء و schemas العملاء بالتوازي"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=4, help="عدد العمليات المتوازية")
+        parser.add_argument('--tenant', action='append', dest='tenants', help="قاعدة عميل محددة")
+        parser.add_argument(
+            '--state-file', default='.migrate_tenants.json',
+            help="ملف حالة التشغيل للاستكمال من حيث توقف",
+        )
+        parser.add_argument('--no-resume', action='store_true', help="تجاهل ملف الحالة السابق")
+        parser.add_argument('--no-skip', action='store_true', help="عدم فحص django_migrations")
+
+    def handle(self, *args, jobs, tenants, state_file, no_resume, no_skip, **options):
+        targets = target_migrations()
+        signature = migrations_signature(targets)
+
+        state_path = Path(state_file)
+        state = {'target': signature, 'done': []}
+        if not no_resume and state_path.exists():
+            previous = json.loads(state_path.read_text())
+            if previous.get('target') == signature:
+                state = previous
+        done = set(state['done'])
+
+        queryset = Tenant.objects.using(DEFAULT_DB_ALIAS)
+        if tenants:
+            queryset = queryset.filter(db_name__in=tenants)
+        pending = [(name, pk) for name, pk in migration_targets(queryset) if name not in done]
+        self.stdout.write(f"{len(pending)} tenants pending ({len(done)} already done in this run)")
+
+        # لا تورث العمليات الفرعية اتصالات مفتوحة
+        connections.close_all()
+
+        failures = []
+        counts = {'migrated': 0, 'skipped': 0, 'failed': 0}
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [
+                pool.submit(migrate_tenant, name, pk, None if no_skip else targets)
+                for name, pk in pending
+            ]
+            for future in as_completed(futures):
+                db_name, status, duration, error = future.result()
+                counts[status] += 1
+                line = f"{db_name:<40} {status:<9} {duration:7.2f}s"
+                if error:
+                    failures.append(db_name)
+                    self.stderr.write(f"{line}  {error}")
+                    continue
+                self.stdout.write(line)
+                state['done'].append(db_name)
+                state_path.write_text(json.dumps(state))
+
+        self.stdout.write(
+            f"migrated: {counts['migrated']}, skipped: {counts['skipped']}, failed: {counts['failed']}"
+        )
+        if failures:
+            raise CommandError(f"{len(failures)} tenants failed; rerun to retry them")
+        state_path.unlink(missing_ok=True)
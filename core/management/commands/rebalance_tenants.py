@@ -0,0 +1,35 @@
+# rebalance_tenants.py - قياس حجم العملاء ونقل من تجاوز حدود وضعه الحالي
+from django.core.management.base import BaseCommand
+
+from core.models import Tenant
+from core.placement import collect_usage, move_tenant, recommend_placement, usage_recorder
+
+
+class Command(BaseCommand):
+    help = "قياس حجم كل عميل واقتراح (أو تنفيذ) نقله بين الجداول المشتركة والـ schema والقاعدة المستقلة"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', action='append', default=[], help="subdomain عميل محدد (يمكن تكراره)")
+        parser.add_argument('--apply', action='store_true', help="تنفيذ النقل بدل عرض الاقتراحات فقط")
+        parser.add_argument(
+            '--keep-source', action='store_true',
+            help="عدم حذف بيانات العميل من مكانه السابق بعد النقل (للمراجعة أو التراجع اليدوي)",
+        )
+
+    def handle(self, *args, tenant, apply, keep_source, **options):
+        usage_recorder.flush()
+        tenants = Tenant.objects.using('default').filter(maintenance=False).order_by('pk')
+        if tenant:
+            tenants = tenants.filter(subdomain__in=tenant)
+
+        for current in tenants:
+            usage = collect_usage(current)
+            target = recommend_placement(current, usage)
+            line = f"{current.subdomain}: {usage.size_mb:.1f}MB, {usage.request_count} requests, {current.placement}"
+            if target == current.placement:
+                self.stdout.write(line)
+                continue
+            self.stdout.write(self.style.WARNING(f"{line} -> {target}"))
+            if apply:
+                move_tenant(current, target, log=self.stdout.write, keep_source=keep_source)
+                self.stdout.write(self.style.SUCCESS(f"{current.subdomain}: now {target}"))
@@ -0,0 +1,37 @@
+# reconcile_usage.py - إعادة عد المستخدمين والمنتجات لتصحيح انحراف عدادات حدود الخطة
+# يُشغَّل دورياً (cron) لأن bulk_create والتعديلات المباشرة لا تطلق الإشارات
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.limits import usage_counters
+from core.models import Tenant, TenantUsage, UserTenant
+from core.placement import measure_size_mb
+from core.tenant_context import using_tenant
+from tenant.models import Product
+
+
+class Command(BaseCommand):
+    help = "تصحيح عدادات المستخدمين والمنتجات والمساحة لكل عميل"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', action='append', default=[], help="subdomain عميل محدد (يمكن تكراره)")
+
+    def handle(self, *args, tenant, **options):
+        tenants = Tenant.objects.using('default').order_by('pk')
+        if tenant:
+            tenants = tenants.filter(subdomain__in=tenant)
+        measure_storage = connections['default'].vendor == 'postgresql'
+
+        for current in tenants:
+            counters = {
+                'active_users': UserTenant.objects.using('default').filter(tenant=current, is_active=True).count(),
+            }
+            with using_tenant(current):
+                counters['active_products'] = Product.objects.filter(is_active=True).count()
+            if measure_storage:
+                counters['size_mb'] = measure_size_mb(current)
+
+            before = TenantUsage.objects.using('default').filter(tenant=current).values(*counters).first() or {}
+            usage_counters.set(current.pk, **counters)
+            drift = {key: value - before.get(key, 0) for key, value in counters.items() if key != 'size_mb'}
+            self.stdout.write(f"{current.subdomain:<30} {counters} drift={drift}")
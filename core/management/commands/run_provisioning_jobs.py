@@ -0,0 +1,18 @@
+# run_provisioning_jobs.py - استكمال مهام التجهيز غير المكتملة (بعد إعادة تشغيل الخادم مثلاً)
+from django.core.management.base import BaseCommand
+
+from core.jobs import run_job
+from core.models import ProvisioningJob
+
+
+class Command(BaseCommand):
+    help = "تنفيذ مهام تجهيز العملاء المعلقة أو الفاشلة من حيث توقفت"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--include-failed', action='store_true')
+
+    def handle(self, *args, include_failed, **options):
+        statuses = ['pending', 'running'] + (['failed'] if include_failed else [])
+        for job_id in ProvisioningJob.objects.filter(status__in=statuses).values_list('id', flat=True):
+            job = run_job(job_id)
+            self.stdout.write(f"{job.subdomain:<30} {job.status} {job.error}")
@@ -0,0 +1,96 @@
+# core/memberships.py - كاش عضويات المستخدمين في العملاء لفحص الصلاحيات بدون استعلام
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import UserTenant
+
+# الدور يُخزَّن كرقم صغير بدل النص: {tenant_id: role_index}
+ROLES = [role for role, _ in UserTenant.ROLE_CHOICES]
+
+
+class MembershipCache:
+    """
+    عضويات المستخدم النشطة تُحمَّل باستعلام واحد ثم تُحفظ في LRU محلي
+    وفي كاش Django المشترك (نفس TENANT_CACHE_ALIAS) حتى انتهاء الصلاحية
+    أو حتى تعديل UserTenant (الإشارات في core/signals.py)
+    المفتاح هو CustomUser.global_id: request.user يأتي من قاعدة العميل ومفتاحه
+    لا يطابق مفتاح نفس المستخدم في 'default' التي يشير إليها UserTenant
+    """
+
+    def __init__(self, max_size=None, ttl=None, alias=None):
+        self.max_size = max_size or getattr(settings, 'MEMBERSHIP_CACHE_SIZE', 4096)
+        self.ttl = ttl or getattr(settings, 'MEMBERSHIP_CACHE_TTL', 300)
+        self.alias = alias if alias is not None else getattr(settings, 'TENANT_CACHE_ALIAS', None)
+        self._entries = OrderedDict()  # global_id -> (expires_at, {tenant_id: role_index})
+        self._lock = threading.Lock()
+        self._stats = dict.fromkeys(['hits', 'shared_hits', 'misses', 'db_queries'], 0)
+
+    def _key(self, global_id):
+        return f"memberships:{global_id}"
+
+    def _shared(self):
+        return caches[self.alias] if self.alias else None
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def get(self, global_id):
+        """{tenant_id: role_index} للعضويات النشطة فقط"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(global_id)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(global_id)
+                self._stats['hits'] += 1
+                return entry[1]
+
+        shared = self._shared()
+        memberships = shared.get(self._key(global_id)) if shared is not None else None
+        if memberships is not None:
+            self._count('shared_hits')
+        else:
+            self._count('misses')
+            self._count('db_queries')
+            memberships = {
+                tenant_id: ROLES.index(role)
+                for tenant_id, role in UserTenant.objects.using('default')
+                .filter(user__global_id=global_id, is_active=True)
+                .values_list('tenant_id', 'role')
+            }
+            if shared is not None:
+                shared.set(self._key(global_id), memberships, self.ttl)
+
+        with self._lock:
+            self._entries[global_id] = (now + self.ttl, memberships)
+            self._entries.move_to_end(global_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return memberships
+
+    def role(self, global_id, tenant_id):
+        """دور المستخدم في العميل أو None إذا لم يكن عضواً نشطاً"""
+        role_index = self.get(global_id).get(tenant_id)
+        return None if role_index is None else ROLES[role_index]
+
+    def invalidate(self, global_id):
+        with self._lock:
+            self._entries.pop(global_id, None)
+        shared = self._shared()
+        if shared is not None:
+            shared.delete(self._key(global_id))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, size=len(self._entries))
+
+
+membership_cache = MembershipCache()
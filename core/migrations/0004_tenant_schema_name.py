@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_provisioning_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tenant',
+            name='schema_name',
+            field=models.CharField(blank=True, max_length=63),
+        ),
+    ]
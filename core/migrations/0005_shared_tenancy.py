@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:58
+
+from django.db import migrations, models
+
+
+def infer_placement(apps, schema_editor):
+    """العملاء الحاليون: schema_name غير فارغ كان يعني وضع schema"""
+    Tenant = apps.get_model('core', 'Tenant')
+    Tenant.objects.using(schema_editor.connection.alias).exclude(schema_name='').update(placement='schema')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_tenant_schema_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tenant',
+            name='placement',
+            field=models.CharField(choices=[('database', 'قاعدة بيانات مستقلة'), ('schema', 'schema مستقل داخل default'), ('shared', 'جداول مشتركة')], default='database', max_length=20),
+        ),
+        migrations.RunPython(infer_placement, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_shared_tenancy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tenant',
+            name='maintenance',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='TenantUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('size_mb', models.FloatField(default=0)),
+                ('request_count', models.BigIntegerField(default=0)),
+                ('window_start', models.DateTimeField(auto_now_add=True)),
+                ('measured_at', models.DateTimeField(blank=True, null=True)),
+                ('tenant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='usage', to='core.tenant')),
+            ],
+        ),
+    ]
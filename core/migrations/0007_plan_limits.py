@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_tenant_usage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tenant',
+            name='max_products',
+            field=models.IntegerField(default=1000),
+        ),
+        migrations.AddField(
+            model_name='tenant',
+            name='max_storage_mb',
+            field=models.IntegerField(default=100),
+        ),
+        migrations.AddField(
+            model_name='tenant',
+            name='max_users',
+            field=models.IntegerField(default=5),
+        ),
+        migrations.AddField(
+            model_name='tenant',
+            name='plan',
+            field=models.CharField(choices=[('free', 'مجاني'), ('basic', 'أساسي'), ('premium', 'متميز'), ('enterprise', 'مؤسسي')], default='free', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='tenantusage',
+            name='active_products',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tenantusage',
+            name='active_users',
+            field=models.IntegerField(default=0),
+        ),
+    ]
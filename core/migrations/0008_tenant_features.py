@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_plan_limits'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tenant',
+            name='features',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -55,13 +55,168 @@
 #     def __str__(self):
 #         return f"{self.user.username} - {self.tenant.name}"
 
+from functools import cached_property
+
+from django.conf import settings
 from django.db import models
 
 class Tenant(models.Model):
+    PLACEMENT_CHOICES = [
+        ('database', 'قاعدة بيانات مستقلة'),
+        ('schema', 'schema مستقل داخل default'),
+        ('shared', 'جداول مشتركة'),
+    ]
+    PLAN_CHOICES = [
+        ('free', 'مجاني'),
+        ('basic', 'أساسي'),
+        ('premium', 'متميز'),
+        ('enterprise', 'مؤسسي'),
+    ]
     name = models.CharField(max_length=100)
     subdomain = models.CharField(max_length=50, unique=True)
+    # اسم قاعدة العميل المستقلة (محجوز حتى لو كان العميل في وضع آخر)
     db_name = models.CharField(max_length=100, unique=True)
+    # مكان بيانات العميل: قاعدة مستقلة، schema، أو جداول مشتركة مع عمود tenant
+    placement = models.CharField(max_length=20, choices=PLACEMENT_CHOICES, default='database')
+    schema_name = models.CharField(max_length=63, blank=True)
+    # أثناء المرحلة الأخيرة من نقل العميل بين الأوضاع ترجع طلباته 503
+    maintenance = models.BooleanField(default=False)
+
+    # إعدادات الخطة والحدود
+    plan = models.CharField(max_length=20, choices=PLAN_CHOICES, default='free')
+    max_users = models.IntegerField(default=5)
+    max_products = models.IntegerField(default=1000)
+    max_storage_mb = models.IntegerField(default=100)
+    # الميزات المتاحة، مثال: {'advanced_analytics': True, 'api_access': False}
+    features = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return self.name
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # تجهيز مجموعة الميزات مرة واحدة عند التحميل، والكائن يبقى في tenant_cache
+        instance = super().from_db(db, field_names, values)
+        if 'features' in instance.__dict__:
+            instance.feature_set
+        return instance
+
+    def save(self, *args, **kwargs):
+        self.__dict__.pop('feature_set', None)
+        super().save(*args, **kwargs)
+
+    @cached_property
+    def feature_set(self):
+        """أسماء الميزات المفعّلة فقط (فحص الميزة يصبح بحث في frozenset)"""
+        return frozenset(name for name, enabled in (self.features or {}).items() if enabled)
+
+    def has_feature(self, feature_name):
+        """فحص إذا كان العميل يملك ميزة معينة"""
+        return feature_name in self.feature_set
+
+    def has_features(self, *feature_names):
+        """فحص عدة ميزات دفعة واحدة (كلها مطلوبة)"""
+        return self.feature_set.issuperset(feature_names)
+
+    def feature_flags(self, *feature_names):
+        """حالة كل ميزة مطلوبة: {'api_access': True, ...}"""
+        return {name: name in self.feature_set for name in feature_names}
+
+    def is_within_limits(self, resource_type):
+        """فحص حدود الخطة من عدادات الاستخدام (بدون COUNT على الجداول)"""
+        from .limits import usage_counters
+        return usage_counters.is_within_limits(self, resource_type)
+
+    @property
+    def db_alias(self):
+        """اسم الاتصال الذي توجَّه إليه استعلامات العميل"""
+        if self.placement == 'shared':
+            return settings.SHARED_TENANT_DATABASE
+        if self.placement == 'schema':
+            return 'default'
+        return self.db_name
+
+    @property
+    def active_schema(self):
+        """الـ schema المستخدم في search_path (public لغير وضع schema)"""
+        return self.schema_name if self.placement == 'schema' and self.schema_name else 'public'
+
+
+class TenantDatabasePool(models.Model):
+    """قواعد بيانات منسوخة مسبقاً من القالب وجاهزة للتخصيص لعميل جديد"""
+    db_name = models.CharField(max_length=100, unique=True)
+    template_version = models.CharField(max_length=40)  # بصمة الـ migrations وقت النسخ
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.db_name
+
+
+class UserTenant(models.Model):
+    """ربط المستخدمين بالعملاء"""
+    ROLE_CHOICES = [
+        ('admin', 'Admin'),
+        ('manager', 'Manager'),
+        ('employee', 'Employee'),
+    ]
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='tenant_users')
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name='users')
+    role = models.CharField(max_length=20, choices=ROLE_CHOICES)
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        unique_together = ('user', 'tenant')
+
+    def __str__(self):
+        return f"{self.user.username} - {self.tenant.name}"
+
+
+class ProvisioningJob(models.Model):
+    """مهمة تجهيز عميل جديد في الخلفية (مرحلة بمرحلة مع إمكانية إعادة المحاولة)"""
+    STAGES = ['create_db', 'migrate', 'seed', 'admin']
+    STATUS_CHOICES = [
+        ('pending', 'في الانتظار'),
+        ('running', 'قيد التنفيذ'),
+        ('completed', 'مكتمل'),
+        ('failed', 'فشل'),
+    ]
+    name = models.CharField(max_length=100)
+    subdomain = models.CharField(max_length=50, unique=True)
+    db_name = models.CharField(max_length=100)
+    admin_email = models.EmailField()
+    admin_password = models.CharField(max_length=128)  # مشفرة بـ make_password
+    # هوية المدير المشتركة بين قاعدة العميل و'default' (تُحدد في مرحلة seed)
+    admin_global_id = models.UUIDField(null=True, blank=True)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    completed_stages = models.JSONField(default=list)
+    current_stage = models.CharField(max_length=20, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    tenant = models.ForeignKey(Tenant, on_delete=models.SET_NULL, null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.subdomain} - {self.status}"
+
+    @property
+    def pending_stages(self):
+        return [stage for stage in self.STAGES if stage not in self.completed_stages]
+
+
+class TenantUsage(models.Model):
+    """حجم العميل وحجم طلباته (يستخدمه محرك التوزيع بين الأوضاع)"""
+    tenant = models.OneToOneField(Tenant, on_delete=models.CASCADE, related_name='usage')
+    size_mb = models.FloatField(default=0)
+    request_count = models.BigIntegerField(default=0)  # منذ window_start
+    # عدادات حدود الخطة: تُحدَّث مع كل إضافة/حذف وتُصحَّح دورياً بـ reconcile_usage
+    active_users = models.IntegerField(default=0)
+    active_products = models.IntegerField(default=0)
+    window_start = models.DateTimeField(auto_now_add=True)
+    measured_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.tenant} - {self.size_mb:.0f}MB / {self.request_count} requests"
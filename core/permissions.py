@@ -0,0 +1,95 @@
+# core/permissions.py - صلاحيات DRF المبنية على العميل الحالي (request.tenant)
+import logging
+
+from django.db import connections
+from rest_framework.exceptions import NotFound
+from rest_framework.permissions import BasePermission
+
+from .memberships import membership_cache
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCounter:
+    """عدد الاستعلامات المنفذة على اتصال معين داخل الـ with"""
+
+    def __init__(self, using='default'):
+        self.using = using
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._wrapper = connections[self.using].execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._wrapper.__exit__(*exc_info)
+
+
+class TenantRequired(BasePermission):
+    """
+    الطلب يجب أن يكون على نطاق عميل معروف: 404 بدل الوصول إلى request.tenant = None
+    (نطاق غير مسجل أو الطلب على النطاق الرئيسي)
+    """
+
+    def has_permission(self, request, view):
+        if getattr(request, 'tenant', None) is None:
+            raise NotFound('العميل غير موجود')
+        return True
+
+
+class TenantPermission(TenantRequired):
+    """
+    صلاحية تتحقق من:
+    1. وجود عميل صالح (404 إذا لم يوجد)
+    2. تسجيل دخول المستخدم
+    3. انتماء المستخدم للعميل (من membership_cache بدل استعلام في كل طلب)
+    عدد الاستعلامات التي احتاجها الفحص يُحفظ في request.permission_db_hits
+    """
+
+    def has_permission(self, request, view):
+        super().has_permission(request, view)
+        tenant = request.tenant
+        if not request.user.is_authenticated:
+            return False
+
+        with QueryCounter() as queries:
+            role = membership_cache.role(request.user.global_id, tenant.pk)
+        request.permission_db_hits = getattr(request, 'permission_db_hits', 0) + queries.count
+        if queries.count:
+            logger.debug("membership check for user %s: %d queries", request.user.global_id, queries.count)
+
+        request.tenant_role = role
+        return role is not None
+
+    def has_object_permission(self, request, view, obj):
+        # التحقق من أن الكائن ينتمي لنفس العميل
+        if hasattr(obj, 'tenant_id'):
+            return obj.tenant_id == request.tenant.pk
+        return True
+
+
+class FeaturePermission(BasePermission):
+    """
+    صلاحية للتحقق من الميزات المتاحة للعميل
+    الفحص بحث في Tenant.feature_set المجهزة عند تحميل العميل (بدون قراءة JSON)
+    """
+    required_features = ()
+
+    def has_permission(self, request, view):
+        required = getattr(view, 'required_features', None) or self.required_features
+        if not required:
+            return True
+        tenant = getattr(request, 'tenant', None)
+        if not tenant:
+            return False
+        return tenant.has_features(*required)
+
+
+def feature_required(*features):
+    """FeaturePermission لميزات محددة: permission_classes([feature_required('api_access')])"""
+    return type('FeaturePermission', (FeaturePermission,), {'required_features': features})
@@ -0,0 +1,422 @@
+# core/placement.py - محرك توزيع العملاء بين الأوضاع ونقلهم أثناء التشغيل
+# الأوضاع من الأصغر للأكبر: جداول مشتركة -> schema مستقل -> قاعدة مستقلة
+# النقل يتم على مراحل:
+# 1. triggers في المصدر تسجل مفاتيح الصفوف التي تتغير (إضافة/تعديل/حذف) في جدول سجل
+# 2. نسخ كل الصفوف على دفعات (transaction لكل دفعة) والعميل يعمل بشكل طبيعي
+# 3. maintenance=True وانتظار إقرار كل العمليات بإصدار كاش العملاء الجديد
+# 4. إعادة تطبيق الصفوف المسجلة فقط من المصدر (فترة توقف قصيرة بحجم التغييرات لا الجداول)
+# 5. تغيير placement في transaction واحدة فيبدأ التوجيه للمكان الجديد
+# 6. حذف بيانات العميل من المصدر (إلا مع keep_source)
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY, get_user_model
+from django.contrib.sessions.models import Session
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Tenant, TenantUsage, UserTenant
+from .provisioning import create_database, migrate_pending
+from .schemas import create_tenant_schema
+from .tenant_connections import tenant_connections
+
+TIERS = ['shared', 'schema', 'database']
+
+# حدود الانتقال للوضع الأعلى (الحجم بالميجابايت أو عدد الطلبات في النافذة)
+THRESHOLDS = getattr(settings, 'TENANT_PLACEMENT_THRESHOLDS', {
+    'schema': {'size_mb': 500, 'requests': 50_000},
+    'database': {'size_mb': 5_000, 'requests': 500_000},
+})
+
+BATCH_SIZE = 2000
+
+
+class UsageRecorder:
+    """عدّاد طلبات لكل عميل داخل العملية، يُكتب في TenantUsage كل فترة"""
+
+    def __init__(self, interval=None):
+        self.interval = interval or getattr(settings, 'TENANT_USAGE_FLUSH_INTERVAL', 30)
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def hit(self, tenant_id):
+        """تسجيل طلب، ويرجع True إذا حان وقت الكتابة في قاعدة البيانات"""
+        with self._lock:
+            self._counts[tenant_id] += 1
+            return time.monotonic() - self._last_flush >= self.interval
+
+    def flush(self):
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+            self._last_flush = time.monotonic()
+        for tenant_id, count in counts.items():
+            updated = TenantUsage.objects.using(DEFAULT_DB_ALIAS).filter(tenant_id=tenant_id).update(
+                request_count=F('request_count') + count
+            )
+            if not updated:
+                TenantUsage.objects.using(DEFAULT_DB_ALIAS).get_or_create(
+                    tenant_id=tenant_id, defaults={'request_count': count}
+                )
+
+
+usage_recorder = UsageRecorder()
+
+
+def tenant_models():
+    """نماذج العميل مرتبة بحيث يأتي الأب قبل النماذج التي تشير إليه"""
+    from tenant.models.base import TenantMixin
+
+    models = [m for m in apps.get_app_config('tenant').get_models() if issubclass(m, TenantMixin)]
+    ordered, seen = [], set()
+
+    def visit(model):
+        if model in seen:
+            return
+        seen.add(model)
+        for field in model._meta.concrete_fields:
+            target = field.related_model
+            if field.is_relation and target in models and target is not model:
+                visit(target)
+        ordered.append(model)
+
+    for model in models:
+        visit(model)
+    return ordered
+
+
+def placement_alias(tenant, placement):
+    """اسم الاتصال لبيانات العميل في وضع معين (schema له اتصال خاص بـ search_path ثابت)"""
+    if placement == 'shared':
+        return settings.SHARED_TENANT_DATABASE
+    if placement == 'database':
+        return tenant_connections.register(tenant.db_name)
+    default = connections.settings[DEFAULT_DB_ALIAS]
+    schema = tenant.schema_name or f"tenant_{tenant.subdomain}"
+    options = dict(default.get('OPTIONS') or {}, options=f"-c search_path={schema},public")
+    return tenant_connections.register(f"{schema}__schema", NAME=default['NAME'], OPTIONS=options)
+
+
+def measure_size_mb(tenant):
+    """حجم بيانات العميل حسب وضعه الحالي"""
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        if tenant.placement == 'database':
+            cursor.execute("SELECT pg_database_size(%s)", [tenant.db_name])
+            return cursor.fetchone()[0] / 1024 / 1024
+        if tenant.placement == 'schema':
+            cursor.execute(
+                "SELECT COALESCE(SUM(pg_total_relation_size(c.oid)), 0) FROM pg_class c "
+                "JOIN pg_namespace n ON n.oid = c.relnamespace "
+                "WHERE n.nspname = %s AND c.relkind = 'r'",
+                [tenant.schema_name],
+            )
+            return cursor.fetchone()[0] / 1024 / 1024
+
+    # الجداول المشتركة: عدد صفوف العميل × متوسط حجم الصف في كل جدول
+    alias = settings.SHARED_TENANT_DATABASE
+    total = 0
+    with connections[alias].cursor() as cursor:
+        for model in tenant_models():
+            rows = model._base_manager.using(alias).filter(tenant_id=tenant.pk).count()
+            if not rows:
+                continue
+            cursor.execute(
+                "SELECT pg_total_relation_size(c.oid) / GREATEST(c.reltuples, 1) "
+                "FROM pg_class c WHERE c.oid = %s::regclass",
+                [model._meta.db_table],
+            )
+            total += rows * float(cursor.fetchone()[0])
+    return total / 1024 / 1024
+
+
+def collect_usage(tenant):
+    usage, _ = TenantUsage.objects.using(DEFAULT_DB_ALIAS).get_or_create(tenant=tenant)
+    usage.size_mb = measure_size_mb(tenant)
+    usage.measured_at = timezone.now()
+    usage.save(update_fields=['size_mb', 'measured_at'])
+    return usage
+
+
+def recommend_placement(tenant, usage):
+    """أعلى وضع تتجاوز حدوده؛ لا يتم النزول تلقائياً لوضع أصغر"""
+    recommended = tenant.placement
+    for tier in TIERS[TIERS.index(tenant.placement) + 1:]:
+        limits = THRESHOLDS[tier]
+        if usage.size_mb >= limits['size_mb'] or usage.request_count >= limits['requests']:
+            recommended = tier
+    return recommended
+
+
+def _copy_rows(model, tenant, source, target):
+    """
+    نسخ صفوف نموذج على دفعات مرتبة بالمفتاح (بدون تحميل الجدول كاملاً)
+    كل دفعة في transaction خاصة بها حتى لا يبقى جدول كبير في transaction واحدة طويلة
+    """
+    queryset = model._base_manager.using(source).filter(tenant_id=tenant.pk)
+    copied, last_pk = 0, None
+    while True:
+        page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        batch = list(page.order_by('pk')[:BATCH_SIZE])
+        if not batch:
+            break
+        _write_rows(model, batch, target, upsert=False)
+        copied += len(batch)
+        last_pk = batch[-1].pk
+    return copied
+
+
+def _write_rows(model, rows, target, upsert):
+    fields = [
+        f.name for f in model._meta.concrete_fields
+        if not f.primary_key and not getattr(f, 'generated', False)
+    ]
+    if upsert and fields:
+        options = {'update_conflicts': True, 'unique_fields': [model._meta.pk.name], 'update_fields': fields}
+    else:
+        options = {'ignore_conflicts': upsert}
+    with transaction.atomic(using=target):
+        model._base_manager.using(target).bulk_create(rows, **options)
+
+
+def _tenant_user_ids(tenant, source):
+    """
+    مستخدمو العميل في المصدر: أعضاؤه في UserTenant (بالـ global_id، لأن مفتاح العضوية
+    هو صف المستخدم في 'default') وكل مستخدم تشير إليه بياناته
+    """
+    User = get_user_model()
+    global_ids = UserTenant.objects.using(DEFAULT_DB_ALIAS).filter(tenant=tenant).values_list(
+        'user__global_id', flat=True
+    )
+    user_ids = set(
+        User._base_manager.using(source).filter(global_id__in=list(global_ids)).values_list('pk', flat=True)
+    )
+    for model in tenant_models():
+        for field in model._meta.concrete_fields:
+            if field.is_relation and field.related_model is User:
+                user_ids.update(
+                    model._base_manager.using(source).filter(tenant_id=tenant.pk)
+                    .exclude(**{field.attname: None})
+                    .values_list(field.attname, flat=True).distinct()
+                )
+    return user_ids
+
+
+def _copy_users(tenant, source, target):
+    """
+    مستخدمو العميل وجلساتهم يجب أن يوجدوا في المكان الجديد (الـ schema المصدر يُحذف كاملاً)
+    النسخ بنفس المفاتيح فتبقى الجلسات صالحة، والكتابة فوق النسخة السابقة (تغيير كلمة مرور مثلاً)
+    """
+    User = get_user_model()
+    user_ids = _tenant_user_ids(tenant, source)
+    users = list(User._base_manager.using(source).filter(pk__in=user_ids))
+    if users:
+        _write_rows(User, users, target, upsert=True)
+
+    # الجلسة تحفظ مفتاح المستخدم داخل بياناتها المشفرة، فلا يمكن التصفية في SQL
+    keys = {User._meta.pk.value_to_string(user) for user in users}
+    sessions = [
+        session for session in Session.objects.using(source).filter(expire_date__gt=timezone.now()).iterator()
+        if session.get_decoded().get(SESSION_KEY) in keys
+    ]
+    if sessions:
+        _write_rows(Session, sessions, target, upsert=True)
+
+
+@contextmanager
+def _snapshot(using):
+    """
+    كل قراءات النسخ الأولي من snapshot واحد: صف ابن أُضيف أثناء النسخ لا يُنسخ قبل أبيه
+    (الهدف يُكتب على دفعات مستقلة فلا يمكن الاعتماد على تأجيل فحص المفاتيح الأجنبية)
+    """
+    with transaction.atomic(using=using):
+        with connections[using].cursor() as cursor:
+            cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        yield
+
+
+def _change_log(tenant):
+    return f"tenant_move_log_{tenant.pk}"
+
+
+def _delete_rows(model, using, pks):
+    """DELETE مباشر بدون إشارات Django: هذا نقل للبيانات وليس حذفاً من بيانات العميل"""
+    connection = connections[using]
+    table = connection.ops.quote_name(model._meta.db_table)
+    column = connection.ops.quote_name(model._meta.pk.column)
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE {column} = ANY(%s)", [list(pks)])
+
+
+def start_change_log(tenant, source, models):
+    """
+    جدول سجل ودالة trigger خاصة بالعميل في المصدر: كل صف للعميل يُضاف أو يُعدَّل أو يُحذف
+    يُسجَّل (الجدول، المفتاح)، بما في ذلك التعديل بـ update() والـ SQL المباشر
+    """
+    name = _change_log(tenant)
+    connection = connections[source]
+    with connection.cursor() as cursor:
+        # الكتابة قد تأتي من اتصال بـ search_path مختلف، لذلك يُحدد schema جدول السجل صراحة
+        cursor.execute("SELECT current_schema()")
+        log_table = f"{connection.ops.quote_name(cursor.fetchone()[0])}.{name}"
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {log_table} (table_name text NOT NULL, row_pk text NOT NULL)")
+        cursor.execute(f"""
+            CREATE OR REPLACE FUNCTION {name}() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP <> 'INSERT' AND to_jsonb(OLD) ->> 'tenant_id' = TG_ARGV[0] THEN
+                    INSERT INTO {log_table} VALUES (TG_TABLE_NAME, to_jsonb(OLD) ->> TG_ARGV[1]);
+                END IF;
+                IF TG_OP <> 'DELETE' AND to_jsonb(NEW) ->> 'tenant_id' = TG_ARGV[0] THEN
+                    INSERT INTO {log_table} VALUES (TG_TABLE_NAME, to_jsonb(NEW) ->> TG_ARGV[1]);
+                END IF;
+                RETURN NULL;
+            END $$ LANGUAGE plpgsql
+        """)
+        for model in models:
+            table = connection.ops.quote_name(model._meta.db_table)
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name} ON {table}")
+            cursor.execute(
+                f"CREATE TRIGGER {name} AFTER INSERT OR UPDATE OR DELETE ON {table} "
+                f"FOR EACH ROW EXECUTE FUNCTION {name}('{tenant.pk}', '{model._meta.pk.column}')"
+            )
+
+
+def drop_change_log(tenant, source, models):
+    name = _change_log(tenant)
+    connection = connections[source]
+    with connection.cursor() as cursor:
+        for model in models:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name} ON {connection.ops.quote_name(model._meta.db_table)}")
+        cursor.execute(f"DROP FUNCTION IF EXISTS {name}()")
+        cursor.execute(f"DROP TABLE IF EXISTS {name}")
+
+
+def _changed_pks(tenant, source, model):
+    with connections[source].cursor() as cursor:
+        cursor.execute(
+            f"SELECT DISTINCT row_pk FROM {_change_log(tenant)} WHERE table_name = %s",
+            [model._meta.db_table],
+        )
+        return [model._meta.pk.to_python(row[0]) for row in cursor.fetchall()]
+
+
+def replay_changes(tenant, source, target, models):
+    """
+    تطبيق الصفوف المسجلة فقط: الموجود في المصدر يُكتب فوق نسخة الهدف، وغير الموجود حُذف
+    الكتابة بترتيب الآباء أولاً والحذف بالترتيب العكسي (الأبناء أولاً)
+    """
+    changed, deleted = {}, {}
+    for model in models:
+        pks = _changed_pks(tenant, source, model)
+        missing = []
+        for i in range(0, len(pks), BATCH_SIZE):
+            chunk = pks[i:i + BATCH_SIZE]
+            rows = list(model._base_manager.using(source).filter(tenant_id=tenant.pk, pk__in=chunk))
+            if rows:
+                _write_rows(model, rows, target, upsert=True)
+            found = {row.pk for row in rows}
+            missing.extend(pk for pk in chunk if pk not in found)
+        changed[model], deleted[model] = len(pks), missing
+    for model in reversed(models):
+        missing = deleted[model]
+        for i in range(0, len(missing), BATCH_SIZE):
+            _delete_rows(model, target, missing[i:i + BATCH_SIZE])
+    return changed
+
+
+def remove_source(tenant, placement, source, models):
+    """حذف بيانات العميل من مكانه السابق بعد التحويل: الـ schema كاملاً أو صفوفه في الجداول المشتركة"""
+    if placement == 'schema':
+        connections[source].close()
+        connection = connections[DEFAULT_DB_ALIAS]
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {connection.ops.quote_name(tenant.schema_name)} CASCADE")
+        return
+    for model in reversed(models):
+        queryset = model._base_manager.using(source).filter(tenant_id=tenant.pk)
+        while True:
+            chunk = list(queryset.order_by('pk').values_list('pk', flat=True)[:BATCH_SIZE])
+            if not chunk:
+                break
+            _delete_rows(model, source, chunk)
+
+
+def prepare_target(tenant, placement):
+    if placement == 'database':
+        create_database(tenant.db_name)
+        migrate_pending(tenant.db_name)
+    elif placement == 'schema':
+        tenant.schema_name = tenant.schema_name or f"tenant_{tenant.subdomain}"
+        create_tenant_schema(tenant.schema_name)
+    return placement_alias(tenant, placement)
+
+
+def move_tenant(tenant, placement, log=print, keep_source=False):
+    """نقل العميل إلى وضع أعلى مع فترة توقف قصيرة عند التحويل فقط"""
+    if TIERS.index(placement) <= TIERS.index(tenant.placement):
+        raise ValueError(f"{tenant}: can only move up from '{tenant.placement}', not to '{placement}'")
+
+    previous = tenant.placement
+    source = placement_alias(tenant, previous)
+    target = prepare_target(tenant, placement)
+    models = tenant_models()
+    from .tenant_cache import tenant_cache
+
+    # 1. تسجيل التغييرات يبدأ قبل النسخ حتى لا يفوت أي صف يتغير أثناءه
+    start_change_log(tenant, source, models)
+    try:
+        # 2. النسخ الأولي والعميل يعمل
+        with _snapshot(source):
+            _copy_users(tenant, source, target)
+            for model in models:
+                log(f"{model.__name__}: {_copy_rows(model, tenant, source, target)} rows copied")
+
+        # 3. إيقاف الكتابة: ننتظر حتى تقر كل العمليات بإصدار الكاش الجديد (فترى maintenance)
+        Tenant.objects.using(DEFAULT_DB_ALIAS).filter(pk=tenant.pk).update(maintenance=True)
+        try:
+            version = tenant_cache.invalidate(tenant.subdomain)
+            if not tenant_cache.wait_for_version(version, timeout=tenant_cache.ttl):
+                raise RuntimeError(f"{tenant}: not every process acknowledged tenant cache version {version}")
+
+            # 4. إعادة تطبيق ما تغير منذ بداية النسخ فقط
+            _copy_users(tenant, source, target)
+            for model, count in replay_changes(tenant, source, target, models).items():
+                if count:
+                    log(f"{model.__name__}: {count} changed rows replayed")
+
+            # المفاتيح منسوخة كما هي، لذلك يجب تحديث الـ sequences في المكان الجديد
+            with connections[target].cursor() as cursor:
+                for sql in connections[target].ops.sequence_reset_sql(no_style(), models + [get_user_model()]):
+                    cursor.execute(sql)
+
+            # 5. تحويل التوجيه في transaction واحدة
+            with transaction.atomic(using=DEFAULT_DB_ALIAS):
+                locked = Tenant.objects.using(DEFAULT_DB_ALIAS).select_for_update().get(pk=tenant.pk)
+                locked.placement = placement
+                locked.schema_name = tenant.schema_name
+                locked.maintenance = False
+                locked.save(update_fields=['placement', 'schema_name', 'maintenance'])
+        except Exception:
+            Tenant.objects.using(DEFAULT_DB_ALIAS).filter(pk=tenant.pk).update(maintenance=False)
+            tenant_cache.invalidate(tenant.subdomain)
+            raise
+    finally:
+        drop_change_log(tenant, source, models)
+
+    TenantUsage.objects.using(DEFAULT_DB_ALIAS).filter(tenant=tenant).update(
+        request_count=0, window_start=timezone.now()
+    )
+    log(f"{tenant}: moved to {placement}")
+
+    # 6. لا توجد عملية توجه الطلبات للمصدر بعد الآن (كانت كلها في maintenance)
+    if keep_source:
+        log(f"{tenant}: source data kept in {previous}")
+    else:
+        remove_source(tenant, previous, source, models)
+        log(f"{tenant}: source data removed from {previous}")
+    return locked
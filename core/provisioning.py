@@ -0,0 +1,147 @@
+# core/provisioning.py - تجهيز قواعد بيانات العملاء الجديدة بسرعة
+# 1. مجموعة جاهزة (warm pool): إعادة تسمية قاعدة منسوخة مسبقاً فقط
+# 2. نسخ قاعدة قالب مكتملة الـ migrations: CREATE DATABASE ... TEMPLATE
+# 3. الطريقة القديمة: قاعدة فارغة + كل الـ migrations
+import hashlib
+import json
+import uuid
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.migrations.loader import MigrationLoader
+
+from .models import TenantDatabasePool
+from .tenant_connections import tenant_connections
+
+TEMPLATE_DB = getattr(settings, 'TENANT_TEMPLATE_DATABASE', 'tenant_template')
+POOL_PREFIX = 'tenant_pool_'
+
+
+def target_migrations():
+    """آخر migration لكل تطبيق (الحالة المطلوبة لكل قاعدة)"""
+    loader = MigrationLoader(None, ignore_no_migrations=True)
+    return sorted(loader.graph.leaf_nodes())
+
+
+def migrations_signature(targets=None):
+    targets = target_migrations() if targets is None else targets
+    return hashlib.sha1(json.dumps(targets).encode()).hexdigest()
+
+
+def is_up_to_date(db_name, targets):
+    """استعلام واحد على django_migrations: هل كل الـ migrations الأخيرة مطبقة؟"""
+    connection = connections[db_name]
+    table = connection.ops.quote_name('django_migrations')
+    placeholders = ', '.join(['(%s, %s)'] * len(targets))
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT COUNT(*) FROM {table} WHERE (app, name) IN ({placeholders})",
+                [value for target in targets for value in target],
+            )
+            return cursor.fetchone()[0] == len(targets)
+    except Exception:
+        # الجدول غير موجود: قاعدة جديدة لم تُطبق عليها أي migration
+        return False
+
+
+def migrate_pending(db_name, targets=None):
+    """تطبيق الـ migrations الأحدث من القالب فقط (لا شيء إذا كانت القاعدة محدثة)"""
+    targets = target_migrations() if targets is None else targets
+    tenant_connections.register(db_name)
+    try:
+        if not is_up_to_date(db_name, targets):
+            call_command('migrate', database=db_name, interactive=False, verbosity=0)
+    finally:
+        connections[db_name].close()
+
+
+def _execute(sql):
+    """جمل CREATE/DROP DATABASE لا تعمل داخل transaction (ALTER DATABASE RENAME تعمل)"""
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute(sql)
+
+
+def _database_exists(db_name):
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s", [db_name])
+        return cursor.fetchone() is not None
+
+
+def refresh_template():
+    """إنشاء قاعدة القالب إن لم تكن موجودة وتطبيق كل الـ migrations عليها"""
+    qn = connections[DEFAULT_DB_ALIAS].ops.quote_name
+    if not _database_exists(TEMPLATE_DB):
+        _execute(f"CREATE DATABASE {qn(TEMPLATE_DB)}")
+    # النسخ يفشل إذا كان هناك اتصال مفتوح بالقالب، لذلك migrate_pending تغلقه
+    migrate_pending(TEMPLATE_DB)
+
+
+def clone_template(db_name):
+    """نسخ القالب إلى قاعدة جديدة (عملية نسخ ملفات، أسرع بكثير من migrate)"""
+    qn = connections[DEFAULT_DB_ALIAS].ops.quote_name
+    _execute(f"CREATE DATABASE {qn(db_name)} TEMPLATE {qn(TEMPLATE_DB)}")
+
+
+def fill_pool(size):
+    """إضافة قواعد جاهزة حتى يصل عدد المجموعة إلى size"""
+    signature = migrations_signature()
+    created = []
+    missing = size - TenantDatabasePool.objects.using(DEFAULT_DB_ALIAS).count()
+    for _ in range(max(missing, 0)):
+        db_name = f"{POOL_PREFIX}{uuid.uuid4().hex[:12]}"
+        clone_template(db_name)
+        TenantDatabasePool.objects.using(DEFAULT_DB_ALIAS).create(
+            db_name=db_name, template_version=signature
+        )
+        created.append(db_name)
+    return created
+
+
+def claim_pooled_database(db_name):
+    """
+    أخذ قاعدة من المجموعة وإعادة تسميتها لاسم العميل
+    skip_locked يسمح لعدة تسجيلات متزامنة بأخذ قواعد مختلفة دون انتظار
+    إعادة التسمية تتم في نفس الـ transaction قبل حذف الصف (ALTER DATABASE RENAME
+    يعمل داخل transaction)، فإذا فشلت يبقى الصف في المجموعة ولا تضيع القاعدة
+    """
+    qn = connections[DEFAULT_DB_ALIAS].ops.quote_name
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        pooled = (
+            TenantDatabasePool.objects.using(DEFAULT_DB_ALIAS)
+            .select_for_update(skip_locked=True)
+            .order_by('created_at')
+            .first()
+        )
+        if pooled is None:
+            return False
+        _execute(f"ALTER DATABASE {qn(pooled.db_name)} RENAME TO {qn(db_name)}")
+        pooled.delete()
+    return True
+
+
+def create_database(db_name):
+    """
+    إنشاء قاعدة العميل بأسرع طريقة متاحة (بدون migrate)
+    لا تفعل شيئاً إذا كانت القاعدة موجودة، فإعادة المحاولة آمنة
+    """
+    if _database_exists(db_name):
+        return db_name
+    if claim_pooled_database(db_name):
+        pass
+    elif _database_exists(TEMPLATE_DB):
+        clone_template(db_name)
+    else:
+        _execute(f"CREATE DATABASE {connections[DEFAULT_DB_ALIAS].ops.quote_name(db_name)}")
+    return db_name
+
+
+def provision_database(db_name):
+    """
+    تجهيز قاعدة بيانات عميل جديد وإرجاع اسمها
+    بعد المجموعة أو القالب يتم تطبيق الـ migrations الأحدث فقط (غالباً لا شيء)
+    """
+    create_database(db_name)
+    migrate_pending(db_name)
+    return db_name
@@ -0,0 +1,87 @@
+# core/schemas.py - وضع schema لكل عميل داخل قاعدة 'default'
+# search_path الحالي يُحفظ على كائن الاتصال نفسه فلا يُرسل SET إلا عند التغيير،
+# والـ middleware يستعيد الـ schema السابق بعد كل طلب حتى لا يرث الطلب التالي schema عميل آخر
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PUBLIC_SCHEMA = 'public'
+
+
+def needs_switch(schema, using=DEFAULT_DB_ALIAS):
+    """هل يحتاج الاتصال لتغيير search_path؟ (بدون أي عملية على قاعدة البيانات)"""
+    connection = connections[using]
+    if getattr(connection, 'desired_schema', PUBLIC_SCHEMA) != schema:
+        return True
+    return connection.connection is not None and getattr(connection, 'tenant_schema', None) != schema
+
+
+def activate_schema(schema, using=DEFAULT_DB_ALIAS):
+    """
+    تحديد الـ schema المطلوب للاتصال
+    إذا لم يكن الاتصال مفتوحاً بعد يتم التطبيق عند فتحه (connection_created)
+    """
+    connection = connections[using]
+    connection.desired_schema = schema
+    if connection.connection is not None:
+        apply_schema(connection)
+
+
+def switch_schema(schema, using=DEFAULT_DB_ALIAS):
+    """
+    تفعيل schema وإرجاع السابق لاستعادته بعد الطلب
+    يجب أن تُستدعى في نفس الـ thread الذي ينفذ استعلامات الطلب، لأن كل thread
+    له كائن اتصال خاص في django.db.connections
+    """
+    previous = getattr(connections[using], 'desired_schema', PUBLIC_SCHEMA)
+    if needs_switch(schema, using):
+        activate_schema(schema, using)
+    return previous
+
+
+def apply_schema(connection):
+    schema = getattr(connection, 'desired_schema', PUBLIC_SCHEMA)
+    if getattr(connection, 'tenant_schema', None) == schema:
+        return
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        if schema == PUBLIC_SCHEMA:
+            cursor.execute("SET search_path TO public")
+        else:
+            cursor.execute(f"SET search_path TO {connection.ops.quote_name(schema)}, public")
+    # SET داخل transaction قد يُلغى مع rollback، لذلك لا نعتمد عليه في الكاش
+    connection.tenant_schema = None if connection.in_atomic_block else schema
+
+
+def on_connection_created(sender, connection, **kwargs):
+    """اتصال جديد يبدأ بـ search_path الافتراضي"""
+    connection.tenant_schema = None
+    if getattr(connection, 'desired_schema', PUBLIC_SCHEMA) == PUBLIC_SCHEMA:
+        # الافتراضي يحتوي public بالفعل، لا حاجة لـ SET في وضع قاعدة لكل عميل
+        connection.tenant_schema = PUBLIC_SCHEMA
+    else:
+        apply_schema(connection)
+
+
+def in_tenant_schema(using=DEFAULT_DB_ALIAS):
+    return getattr(connections[using], 'desired_schema', PUBLIC_SCHEMA) != PUBLIC_SCHEMA
+
+
+def create_tenant_schema(schema, using=DEFAULT_DB_ALIAS):
+    """إنشاء schema للعميل وتطبيق الـ migrations عليه (التطبيقات المشتركة تبقى في public)"""
+    connection = connections[using]
+    quoted = connection.ops.quote_name(schema)
+    with connection.cursor() as cursor:
+        cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {quoted}")
+        # بدون سجل migrations داخل الـ schema يجد migrate جدول public.django_migrations
+        # عبر search_path فيعتبر كل شيء مطبقاً ولا يُنشئ أي جدول
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {quoted}.django_migrations "
+            f"(LIKE {PUBLIC_SCHEMA}.django_migrations INCLUDING ALL)"
+        )
+    previous = getattr(connection, 'desired_schema', PUBLIC_SCHEMA)
+    activate_schema(schema, using)
+    try:
+        call_command('migrate', database=using, interactive=False, verbosity=0)
+    finally:
+        activate_schema(previous, using)
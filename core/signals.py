@@ -0,0 +1,63 @@
+# core/signals.py - إشارات تطبيق core
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .limits import track_active_change, usage_counters
+from .memberships import membership_cache
+from .models import Tenant, UserTenant
+from .schemas import on_connection_created
+from .tenant_cache import tenant_cache
+
+connection_created.connect(on_connection_created)
+
+
+@receiver(pre_save, sender=Tenant)
+def remember_old_subdomain(sender, instance, **kwargs):
+    """حفظ الـ subdomain القديم لإبطاله من الكاش إذا تغيّر"""
+    if instance.pk:
+        instance._old_subdomain = (
+            Tenant.objects.using('default')
+            .filter(pk=instance.pk)
+            .values_list('subdomain', flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Tenant)
+def invalidate_tenant_on_save(sender, instance, **kwargs):
+    """إبطال الكاش عند إنشاء أو تعديل العميل (يشمل النتائج السلبية)"""
+    tenant_cache.invalidate(instance.subdomain)
+    old_subdomain = getattr(instance, '_old_subdomain', None)
+    if old_subdomain and old_subdomain != instance.subdomain:
+        tenant_cache.invalidate(old_subdomain)
+
+
+@receiver(post_delete, sender=Tenant)
+def invalidate_tenant_on_delete(sender, instance, **kwargs):
+    tenant_cache.invalidate(instance.subdomain)
+
+
+@receiver(pre_save, sender=UserTenant)
+def remember_membership_state(sender, instance, **kwargs):
+    if instance.pk:
+        instance._was_active = (
+            UserTenant.objects.using('default')
+            .filter(pk=instance.pk)
+            .values_list('is_active', flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=UserTenant)
+def count_membership(sender, instance, created, **kwargs):
+    """عداد المستخدمين النشطين لحدود الخطة وإبطال عضويات المستخدم من الكاش"""
+    track_active_change(instance, created, 'users', instance.tenant_id)
+    membership_cache.invalidate(instance.user.global_id)
+
+
+@receiver(post_delete, sender=UserTenant)
+def uncount_membership(sender, instance, **kwargs):
+    if instance.is_active:
+        usage_counters.increment(instance.tenant_id, 'users', -1)
+    membership_cache.invalidate(instance.user.global_id)
@@ -0,0 +1,271 @@
+# core/tenant_cache.py - كاش تحديد العميل من الـ subdomain
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+# علامة تُحفظ في الكاش المشترك بدل None لتمييز "غير موجود" عن "غير مخزّن"
+_NOT_FOUND = '__tenant_not_found__'
+_MISSING = object()
+
+# مفاتيح الإصدار المشترك: invalidate يرفع الإصدار، وكل عملية تسجل آخر إصدار رأته (إقرار)
+_VERSION_KEY = 'tenant:version'
+_PROCESSES_KEY = 'tenant:processes'
+_REGISTRY_LOCK_KEY = 'tenant:processes:lock'
+
+
+class TenantCache:
+    """
+    كاش من مستويين لتحويل الـ subdomain إلى عميل:
+    1. LRU محلي داخل العملية مع TTL
+    2. كاش Django مشترك (اختياري) بين العمليات
+    يتم تخزين النتائج السلبية (subdomain غير موجود) لمدة أقصر
+
+    مع الكاش المشترك: invalidate يرفع إصداراً مشتركاً، وكل عملية تقرأه مرة كل sync_interval
+    ثانية فتفرغ كاشها المحلي عند تغيره وتسجل إقرارها (wait_for_version ينتظر هذه الإقرارات)
+    """
+
+    def __init__(self, max_size=None, ttl=None, negative_ttl=None, alias=None, sync_interval=None):
+        self.max_size = max_size or getattr(settings, 'TENANT_CACHE_SIZE', 1024)
+        self.ttl = ttl or getattr(settings, 'TENANT_CACHE_TTL', 60)
+        self.negative_ttl = negative_ttl or getattr(settings, 'TENANT_CACHE_NEGATIVE_TTL', 30)
+        self.alias = alias if alias is not None else getattr(settings, 'TENANT_CACHE_ALIAS', None)
+        self.sync_interval = (
+            sync_interval if sync_interval is not None else getattr(settings, 'TENANT_CACHE_SYNC_INTERVAL', 1)
+        )
+        self.process_id = uuid.uuid4().hex
+        self._entries = OrderedDict()  # subdomain -> (expires_at, tenant أو None)
+        self._lock = threading.Lock()
+        self._version = None
+        self._synced_at = None
+        self._stats = dict.fromkeys(
+            ['hits', 'shared_hits', 'misses', 'evictions', 'db_queries'], 0
+        )
+
+    def _key(self, subdomain, version=None):
+        # المفتاح يحمل الإصدار: قيمة قُرئت من القاعدة قبل invalidate لا تصل لمن زامن بعده
+        return f"tenant:{self._version if version is None else version}:{subdomain}"
+
+    def _ack_key(self, process_id):
+        return f"tenant:ack:{process_id}"
+
+    @property
+    def _ack_timeout(self):
+        # عملية بدون طلبات ينتهي إقرارها، وأول طلب لها يزامن الإصدار قبل استخدام الكاش
+        return self.sync_interval * 3 + 1
+
+    def _shared(self):
+        return caches[self.alias] if self.alias else None
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def get(self, subdomain):
+        """إرجاع العميل أو None إذا لم يكن موجوداً"""
+        self._sync()
+        tenant = self._get_local(subdomain)
+        if tenant is not _MISSING:
+            return tenant
+
+        version = self._version
+        tenant = self._get_shared(subdomain, version)
+        if tenant is _MISSING:
+            from .models import Tenant
+            self._count('db_queries')
+            tenant = Tenant.objects.using('default').filter(subdomain=subdomain).first()
+            self._set_shared(subdomain, tenant, version)
+
+        self._set_local(subdomain, tenant, version)
+        return tenant
+
+    async def aget(self, subdomain):
+        """نفس get لكن مع كاش Django و ORM غير متزامنين (ASGI)"""
+        await self._async_sync()
+        tenant = self._get_local(subdomain)
+        if tenant is not _MISSING:
+            return tenant
+
+        version = self._version
+        tenant = await self._aget_shared(subdomain, version)
+        if tenant is _MISSING:
+            from .models import Tenant
+            self._count('db_queries')
+            tenant = await Tenant.objects.using('default').filter(subdomain=subdomain).afirst()
+            await self._aset_shared(subdomain, tenant, version)
+
+        self._set_local(subdomain, tenant, version)
+        return tenant
+
+    def invalidate(self, subdomain):
+        """
+        حذف الـ subdomain من المستويين، ومع الكاش المشترك رفع الإصدار حتى تفرغ كل العمليات
+        كاشها المحلي؛ يرجع الإصدار الجديد (لـ wait_for_version) أو None بدون كاش مشترك
+        """
+        with self._lock:
+            self._entries.pop(subdomain, None)
+        shared = self._shared()
+        if shared is None:
+            return None
+        # إذا فُقد المفتاح يبدأ من الوقت الحالي بالملي ثانية فيبقى أكبر من أي إصدار سابق
+        shared.add(_VERSION_KEY, int(time.time() * 1000), None)
+        version = shared.incr(_VERSION_KEY)
+        self._apply_version(version)
+        shared.set(self._ack_key(self.process_id), version, self._ack_timeout)
+        return version
+
+    def wait_for_version(self, version, timeout):
+        """
+        انتظار إقرار كل العمليات المسجلة بالإصدار (بعد invalidate)؛ يرجع False عند انتهاء المهلة
+        بدون كاش مشترك لا توجد طريقة للإقرار، فيتم الانتظار حتى تنتهي صلاحية الكاش المحلي
+        """
+        shared = self._shared()
+        if shared is None or version is None:
+            time.sleep(self.ttl)
+            return True
+        deadline = time.monotonic() + timeout
+        while True:
+            processes = shared.get(_PROCESSES_KEY) or []
+            acks = shared.get_many([self._ack_key(process_id) for process_id in processes])
+            if all(ack >= version for ack in acks.values()):
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(max(self.sync_interval / 4, 0.01))
+
+    def clear(self):
+        """تفريغ الكاش المحلي فقط"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """عدادات الإصابة والإخفاق والطرد"""
+        with self._lock:
+            return dict(self._stats, size=len(self._entries))
+
+    def _sync_due(self):
+        now = time.monotonic()
+        with self._lock:
+            if self._synced_at is not None and now - self._synced_at < self.sync_interval:
+                return False
+            self._synced_at = now
+            return True
+
+    def _apply_version(self, version):
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+
+    def _sync(self):
+        """قراءة الإصدار المشترك وتسجيل الإقرار (مرة كل sync_interval ثانية على الأكثر)"""
+        shared = self._shared()
+        if shared is None or not self._sync_due():
+            return
+        values = shared.get_many([_VERSION_KEY, _PROCESSES_KEY])
+        if self.process_id not in values.get(_PROCESSES_KEY, ()):
+            # التسجيل قبل قراءة الإصدار: من لم يرَ العملية في القائمة رفع الإصدار قبل قراءتها له
+            self._register(shared)
+            values[_VERSION_KEY] = shared.get(_VERSION_KEY)
+        self._apply_version(values.get(_VERSION_KEY) or 0)
+        shared.set(self._ack_key(self.process_id), self._version, self._ack_timeout)
+
+    async def _async_sync(self):
+        shared = self._shared()
+        if shared is None or not self._sync_due():
+            return
+        values = await shared.aget_many([_VERSION_KEY, _PROCESSES_KEY])
+        if self.process_id not in values.get(_PROCESSES_KEY, ()):
+            await sync_to_async(self._register)(shared)
+            values[_VERSION_KEY] = await shared.aget(_VERSION_KEY)
+        self._apply_version(values.get(_VERSION_KEY) or 0)
+        await shared.aset(self._ack_key(self.process_id), self._version, self._ack_timeout)
+
+    def _register(self, shared):
+        """إضافة العملية لقائمة العمليات، مع حذف العمليات التي انتهى إقرارها (توقفت أو خاملة)"""
+        deadline = time.monotonic() + 5
+        while not shared.add(_REGISTRY_LOCK_KEY, self.process_id, 5):
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(0.01)
+        try:
+            processes = shared.get(_PROCESSES_KEY) or []
+            alive = shared.get_many([self._ack_key(process_id) for process_id in processes])
+            processes = [p for p in processes if self._ack_key(p) in alive and p != self.process_id]
+            shared.set(_PROCESSES_KEY, processes + [self.process_id], None)
+        finally:
+            if shared.get(_REGISTRY_LOCK_KEY) == self.process_id:
+                shared.delete(_REGISTRY_LOCK_KEY)
+
+    def _get_local(self, subdomain):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(subdomain)
+            if entry is None:
+                self._stats['misses'] += 1
+                return _MISSING
+            expires_at, tenant = entry
+            if expires_at <= now:
+                del self._entries[subdomain]
+                self._stats['misses'] += 1
+                return _MISSING
+            self._entries.move_to_end(subdomain)
+            self._stats['hits'] += 1
+            return tenant
+
+    def _set_local(self, subdomain, tenant, version):
+        ttl = self.ttl if tenant is not None else self.negative_ttl
+        with self._lock:
+            if version != self._version:
+                # تغير الإصدار أثناء القراءة: القيمة قد تكون أقدم من الإبطال
+                return
+            self._entries[subdomain] = (time.monotonic() + ttl, tenant)
+            self._entries.move_to_end(subdomain)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def _get_shared(self, subdomain, version):
+        shared = self._shared()
+        if shared is None:
+            return _MISSING
+        value = shared.get(self._key(subdomain, version), _MISSING)
+        if value is _MISSING:
+            return _MISSING
+        self._count('shared_hits')
+        return None if value == _NOT_FOUND else value
+
+    async def _aget_shared(self, subdomain, version):
+        shared = self._shared()
+        if shared is None:
+            return _MISSING
+        value = await shared.aget(self._key(subdomain, version), _MISSING)
+        if value is _MISSING:
+            return _MISSING
+        self._count('shared_hits')
+        return None if value == _NOT_FOUND else value
+
+    async def _aset_shared(self, subdomain, tenant, version):
+        shared = self._shared()
+        if shared is None:
+            return
+        if tenant is None:
+            await shared.aset(self._key(subdomain, version), _NOT_FOUND, self.negative_ttl)
+        else:
+            await shared.aset(self._key(subdomain, version), tenant, self.ttl)
+
+    def _set_shared(self, subdomain, tenant, version):
+        shared = self._shared()
+        if shared is None:
+            return
+        if tenant is None:
+            shared.set(self._key(subdomain, version), _NOT_FOUND, self.negative_ttl)
+        else:
+            shared.set(self._key(subdomain, version), tenant, self.ttl)
+
+
+tenant_cache = TenantCache()
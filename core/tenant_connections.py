@@ -0,0 +1,91 @@
+# core/tenant_connections.py - سجل اتصالات قواعد بيانات العملاء
+import copy
+import threading
+from collections import OrderedDict
+
+from asgiref.local import Local
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+
+
+class TenantConnectionRegistry:
+    """
+    تسجيل قواعد بيانات العملاء في django.db.connections عند أول استخدام
+    بدل إضافتها يدوياً إلى settings.DATABASES:
+    - إعدادات الاتصال تُبنى من قاعدة 'default' مع تغيير اسم القاعدة فقط
+    - كل thread يحتفظ بعدد محدود من الاتصالات المفتوحة، ويتم إغلاق الأقدم
+      استخداماً عند تجاوز الحد (LRU)
+    """
+
+    def __init__(self, max_open=None):
+        self.max_open = max_open or getattr(settings, 'TENANT_MAX_OPEN_CONNECTIONS', 32)
+        self._lock = threading.Lock()
+        # django.db.connections مرتبط بالـ thread الفعلي (thread_critical)، لذلك
+        # ترتيب الاستخدام يجب أن يُحفظ بنفس الطريقة: Local() العادي يتبع سياق
+        # المهمة async فيبدأ كل طلب ASGI بقائمة فارغة ولا يتم الإغلاق أبداً
+        self._local = Local(thread_critical=True)
+
+    def build_config(self, db_name, **overrides):
+        """بناء إعدادات الاتصال من قاعدة 'default'"""
+        config = copy.deepcopy(connections.settings['default'])
+        config['NAME'] = db_name
+        config['TEST'] = dict(config.get('TEST') or {}, NAME=None)
+        config.update(overrides)
+        return config
+
+    def register(self, db_name, **overrides):
+        """تسجيل إعدادات القاعدة فقط (بدون فتح اتصال)"""
+        if db_name not in connections.settings or overrides:
+            with self._lock:
+                if db_name not in connections.settings or overrides:
+                    connections.settings[db_name] = self.build_config(db_name, **overrides)
+        return db_name
+
+    def ensure(self, db_name):
+        """تسجيل القاعدة إن لزم وتحديث ترتيب الاستخدام مع إغلاق الاتصالات الزائدة"""
+        if db_name == 'default':
+            return db_name
+        recent = self._touch(db_name)
+        if len(recent) > self.max_open:
+            self._evict(recent)
+        return db_name
+
+    async def aensure(self, db_name):
+        """
+        نسخة ASGI من ensure: الاستعلامات تُنفذ في thread الـ sync_to_async وليس في
+        thread الـ event loop، فالترتيب والإغلاق يتمان هناك على اتصالات ذلك الـ thread
+        """
+        if db_name == 'default':
+            return db_name
+        return await sync_to_async(self.ensure)(db_name)
+
+    def _touch(self, db_name):
+        self.register(db_name)
+        recent = getattr(self._local, 'recent', None)
+        if recent is None:
+            recent = self._local.recent = OrderedDict()
+        recent[db_name] = None
+        recent.move_to_end(db_name)
+        return recent
+
+    def _evict(self, recent):
+        for alias in list(recent):
+            if len(recent) <= self.max_open:
+                break
+            connection = connections[alias]
+            # لا نغلق اتصالاً داخل transaction مفتوحة
+            if connection.in_atomic_block:
+                continue
+            connection.close()
+            del recent[alias]
+
+    def close_all(self):
+        """إغلاق كل اتصالات العملاء المفتوحة في الـ thread الحالي"""
+        recent = getattr(self._local, 'recent', None) or {}
+        for alias in list(recent):
+            connections[alias].close()
+        recent.clear()
+
+
+tenant_connections = TenantConnectionRegistry()
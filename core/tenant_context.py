@@ -0,0 +1,72 @@
+# core/tenant_context.py - سياق العميل الحالي
+# يعتمد على contextvars بدل thread-local حتى يعمل مع ASGI و threads معاً:
+# كل طلب أو مهمة async لها نسختها الخاصة من القيمة
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+
+_current_db = ContextVar('tenant_db', default='default')
+_current_tenant_id = ContextVar('tenant_id', default=None)
+
+
+def get_current_db():
+    """اسم قاعدة بيانات العميل الحالي ('default' إذا لم يتم تحديد عميل)"""
+    return _current_db.get()
+
+
+def set_current_db(db_name):
+    """تعيين قاعدة العميل الحالي وإرجاع token لاستعادة القيمة السابقة"""
+    return _current_db.set(db_name)
+
+
+def reset_current_db(token):
+    _current_db.reset(token)
+
+
+def get_current_tenant_id():
+    """معرّف العميل الحالي (تستخدمه TenantManager لتصفية الجداول المشتركة)"""
+    return _current_tenant_id.get()
+
+
+def set_current_tenant_id(tenant_id):
+    return _current_tenant_id.set(tenant_id)
+
+
+def reset_current_tenant_id(token):
+    _current_tenant_id.reset(token)
+
+
+@contextmanager
+def using_tenant(tenant):
+    """
+    تشغيل كود خارج دورة الطلب (مهام الخلفية مثل Celery) على قاعدة عميل معين
+    يقبل كائن Tenant أو اسم قاعدة البيانات مباشرة:
+
+        with using_tenant(tenant):
+            Order.objects.filter(status='pending').count()
+    """
+    from .models import Tenant
+    from .schemas import PUBLIC_SCHEMA, activate_schema
+    from .tenant_connections import tenant_connections
+
+    if isinstance(tenant, str):
+        # البحث عن العميل صاحب القاعدة حتى تعمل تصفية الجداول المشتركة
+        tenant = Tenant.objects.using('default').filter(db_name=tenant).first() or tenant
+
+    if isinstance(tenant, Tenant):
+        db_name, tenant_id, schema = tenant.db_alias, tenant.pk, tenant.active_schema
+    else:
+        db_name, tenant_id, schema = tenant, None, PUBLIC_SCHEMA
+
+    db_name = tenant_connections.ensure(db_name)
+    previous_schema = getattr(connections['default'], 'desired_schema', PUBLIC_SCHEMA)
+    activate_schema(schema)
+    db_token = _current_db.set(db_name)
+    tenant_token = _current_tenant_id.set(tenant_id)
+    try:
+        yield db_name
+    finally:
+        _current_tenant_id.reset(tenant_token)
+        _current_db.reset(db_token)
+        activate_schema(previous_schema)
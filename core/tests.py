@@ -1,3 +1,384 @@
-from django.test import TestCase
+import datetime
+import threading
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import SESSION_KEY, authenticate, get_user_model
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import DatabaseError, connections
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase
+from django.utils import timezone
+
+from routers.db_router import TenantDatabaseRouter
+from tenant.models import Customer, CustomerSummary
+
+from .jobs import ProvisioningQueue, stage_admin, stage_seed
+from .limits import usage_counters
+from .management.commands import migrate_tenants
+from .memberships import membership_cache
+from .models import ProvisioningJob, Tenant, TenantDatabasePool, TenantUsage, UserTenant
+from .permissions import TenantPermission
+from .placement import move_tenant, placement_alias
+from .provisioning import claim_pooled_database
+from .tenant_cache import TenantCache, tenant_cache
+from .tenant_context import reset_current_db, reset_current_tenant_id, set_current_db, set_current_tenant_id
+
+
+class TenantDatabaseRouterTests(SimpleTestCase):
+
+    def setUp(self):
+        token = set_current_db('tenant_current')
+        self.addCleanup(reset_current_db, token)
+        self.router = TenantDatabaseRouter()
+
+    def test_instance_keeps_its_database(self):
+        customer = Customer()
+        customer._state.db = 'tenant_loaded'
+        self.assertEqual(self.router.db_for_write(Customer, instance=customer), 'tenant_loaded')
+        self.assertEqual(self.router.db_for_read(CustomerSummary, instance=customer), 'tenant_loaded')
+
+    def test_falls_back_to_current_tenant(self):
+        self.assertEqual(self.router.db_for_read(Customer), 'tenant_current')
+        self.assertEqual(self.router.db_for_write(Customer, instance=Customer()), 'tenant_current')
+        self.assertEqual(self.router.db_for_write(Tenant), 'default')
+
+
+class TenantCacheTests(TestCase):
+
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Vision', subdomain='vision', db_name='tenant_vision')
+        caches['default'].clear()
+        self.addCleanup(caches['default'].clear)
+
+    def make_cache(self, **kwargs):
+        return TenantCache(**{'max_size': 2, 'ttl': 60, 'negative_ttl': 30, 'alias': '', **kwargs})
+
+    def test_lru_evicts_least_recently_used(self):
+        cache = self.make_cache()
+        cache.get('vision')
+        cache.get('a')
+        cache.get('vision')  # يصبح الأحدث استخداماً
+        cache.get('b')
+        self.assertEqual(list(cache._entries), ['vision', 'b'])
+        self.assertEqual(cache.stats()['evictions'], 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(cache.get('vision'), self.tenant)
+
+    def test_entries_expire_after_ttl(self):
+        cache = self.make_cache(ttl=10, negative_ttl=5)
+        with mock.patch('core.tenant_cache.time.monotonic', return_value=100.0) as clock:
+            cache.get('vision')
+            self.assertIsNone(cache.get('missing'))
+            clock.return_value = 106.0
+            with self.assertNumQueries(1):
+                cache.get('vision')
+                cache.get('missing')  # انتهت مدة النتيجة السلبية فقط
+            clock.return_value = 111.0
+            with self.assertNumQueries(1):
+                cache.get('vision')
+        self.assertEqual(cache.stats()['db_queries'], 4)
+
+    def test_falls_back_to_shared_cache(self):
+        self.make_cache(alias='default').get('vision')
+        self.make_cache(alias='default').get('missing')
+        other = self.make_cache(alias='default')
+        with self.assertNumQueries(0):
+            self.assertEqual(other.get('vision'), self.tenant)
+            self.assertIsNone(other.get('missing'))
+        self.assertEqual(other.stats()['shared_hits'], 2)
+
+    def test_invalidate_clears_both_tiers(self):
+        cache = self.make_cache(alias='default')
+        cache.get('vision')
+        Tenant.objects.filter(pk=self.tenant.pk).update(name='Renamed')
+        cache.invalidate('vision')
+        self.assertNotIn('vision', cache._entries)
+        self.assertIsNone(caches['default'].get(cache._key('vision')))
+        with self.assertNumQueries(1):
+            self.assertEqual(cache.get('vision').name, 'Renamed')
+
+    def test_wait_for_version_needs_every_process(self):
+        mover = self.make_cache(alias='default', sync_interval=0)
+        worker = self.make_cache(alias='default', sync_interval=0)
+        self.assertFalse(worker.get('vision').maintenance)
+        Tenant.objects.filter(pk=self.tenant.pk).update(maintenance=True)
+        version = mover.invalidate('vision')
+        self.assertFalse(mover.wait_for_version(version, timeout=0))
+        # أول طلب في العملية الأخرى يزامن الإصدار ويفرغ كاشها المحلي قبل الاستخدام
+        self.assertTrue(worker.get('vision').maintenance)
+        self.assertTrue(mover.wait_for_version(version, timeout=0))
+
+
+class ClaimPooledDatabaseTests(TestCase):
+
+    def test_failed_rename_keeps_the_pool_row(self):
+        TenantDatabasePool.objects.create(db_name='pool_missing_db', template_version='x')
+        with self.assertRaises(DatabaseError):
+            claim_pooled_database('tenant_new')
+        self.assertTrue(TenantDatabasePool.objects.filter(db_name='pool_missing_db').exists())
+
+    def test_empty_pool(self):
+        self.assertFalse(claim_pooled_database('tenant_new'))
+
+
+class ProvisioningIdentityTests(TestCase):
+
+    def make_job(self, **fields):
+        return ProvisioningJob.objects.create(
+            name='Vision', subdomain='vision', db_name='default',
+            admin_email='owner@vision.test', admin_password='!', **fields,
+        )
+
+    def test_seed_and_admin_share_one_identity(self):
+        job = self.make_job()
+        stage_seed(job)
+        stage_admin(job)
+        user = get_user_model().objects.get(username='owner@vision.test')
+        self.assertEqual(user.global_id, job.admin_global_id)
+        self.assertTrue(UserTenant.objects.filter(user=user, tenant=job.tenant, role='admin').exists())
+
+    def test_existing_admin_keeps_their_identity(self):
+        existing = get_user_model().objects.create_user(username='owner@vision.test', password='x')
+        job = self.make_job()
+        stage_seed(job)
+        stage_admin(job)
+        self.assertEqual(job.admin_global_id, existing.global_id)
+        self.assertEqual(get_user_model().objects.filter(username='owner@vision.test').count(), 1)
+
+    def test_eager_run_keeps_request_connections_open(self):
+        job = self.make_job(completed_stages=list(ProvisioningJob.STAGES))
+        ProvisioningQueue(eager=True).enqueue(job.pk)
+        # close_all() داخل transaction الاختبار يجعل أي استعلام تالٍ يفشل
+        self.assertTrue(ProvisioningJob.objects.filter(pk=job.pk).exists())
+
+
+class TenantPermissionTests(TestCase):
+
+    def setUp(self):
+        membership_cache.clear()
+        self.addCleanup(membership_cache.clear)
+        self.tenant = Tenant.objects.create(name='Vision', subdomain='vision', db_name='tenant_vision')
+        self.shared_user = get_user_model().objects.create_user(username='owner', password='x')
+        self.membership = UserTenant.objects.create(user=self.shared_user, tenant=self.tenant, role='manager')
+
+    def check(self, user):
+        request = RequestFactory().get('/')
+        request.tenant, request.user = self.tenant, user
+        return TenantPermission().has_permission(request, None), request
+
+    def tenant_db_user(self, global_id):
+        # نفس الشخص في قاعدة العميل: مفتاح مختلف عن صفه في 'default'
+        return get_user_model()(pk=self.shared_user.pk + 1000, username='owner', global_id=global_id)
+
+    def test_matches_membership_by_global_id(self):
+        allowed, request = self.check(self.tenant_db_user(self.shared_user.global_id))
+        self.assertTrue(allowed)
+        self.assertEqual(request.tenant_role, 'manager')
+
+    def test_rejects_other_identity(self):
+        other = get_user_model().objects.create_user(username='other', password='x')
+        allowed, _ = self.check(self.tenant_db_user(other.global_id))
+        self.assertFalse(allowed)
+
+    def test_deactivation_invalidates_cache(self):
+        user = self.tenant_db_user(self.shared_user.global_id)
+        self.assertTrue(self.check(user)[0])
+        self.membership.is_active = False
+        self.membership.save()
+        self.assertFalse(self.check(user)[0])
+
+
+class UsageCounterTests(TestCase):
+    """عدادات حدود الخطة تتبع الإضافة والحذف، و reconcile_usage يصحح ما تفوته الإشارات"""
+
+    def setUp(self):
+        self.tenant = Tenant.objects.create(
+            name='Vision', subdomain='vision', db_name='tenant_vision', placement='shared', max_users=3,
+        )
+        self.addCleanup(usage_counters.invalidate, self.tenant.pk)
+        self.users = [get_user_model().objects.create_user(username=f'user{i}', password='x') for i in range(4)]
+
+    def active_users(self):
+        return TenantUsage.objects.get(tenant=self.tenant).active_users
+
+    def join(self, *users, **fields):
+        return [UserTenant.objects.create(user=user, tenant=self.tenant, **fields) for user in users]
+
+    def test_create_increments(self):
+        self.join(*self.users[:2])
+        self.join(self.users[2], is_active=False)
+        self.assertEqual(self.active_users(), 2)
+        self.assertTrue(self.tenant.is_within_limits('users'))
+        self.join(self.users[3])
+        self.assertFalse(self.tenant.is_within_limits('users'))
+
+    def test_delete_and_deactivate_decrement(self):
+        first, second, third = self.join(*self.users[:3])
+        first.delete()
+        second.is_active = False
+        second.save()
+        self.assertEqual(self.active_users(), 1)
+        third.is_active = True
+        third.save()  # بدون تغيير في الحالة
+        self.assertEqual(self.active_users(), 1)
+
+    def test_bulk_paths(self):
+        self.join(self.users[0])
+        # حذف queryset يطلق post_delete لكل صف
+        UserTenant.objects.filter(tenant=self.tenant).delete()
+        self.assertEqual(self.active_users(), 0)
+        # bulk_create و update() لا يطلقان الإشارات: reconcile_usage يصحح الانحراف
+        UserTenant.objects.bulk_create([UserTenant(user=user, tenant=self.tenant) for user in self.users[:3]])
+        self.assertEqual(self.active_users(), 0)
+        call_command('reconcile_usage', tenant=['vision'], stdout=StringIO())
+        self.assertEqual(self.active_users(), 3)
+        self.assertFalse(self.tenant.is_within_limits('users'))
+        UserTenant.objects.filter(user=self.users[0]).update(is_active=False)
+        call_command('reconcile_usage', tenant=['vision'], stdout=StringIO())
+        self.assertEqual(self.active_users(), 2)
+
+
+class ConcurrentUsageCounterTests(TransactionTestCase):
+
+    def test_concurrent_creates_are_all_counted(self):
+        tenant = Tenant.objects.create(name='Vision', subdomain='vision', db_name='tenant_vision')
+        self.addCleanup(usage_counters.invalidate, tenant.pk)
+        users = [get_user_model().objects.create_user(username=f'user{i}', password='x') for i in range(8)]
+        # لا يوجد صف TenantUsage بعد: كل الـ threads تتسابق على إنشائه
+        TenantUsage.objects.filter(tenant=tenant).delete()
+        barrier = threading.Barrier(len(users))
+
+        def join(user):
+            try:
+                barrier.wait(5)
+                UserTenant.objects.create(user=user, tenant=tenant)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=join, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(UserTenant.objects.filter(tenant=tenant).count(), 8)
+        self.assertEqual(TenantUsage.objects.get(tenant=tenant).active_users, 8)
+
+
+class MoveTenantTests(TransactionTestCase):
+    """نقل عميل من الجداول المشتركة إلى schema مستقل مع تغييرات أثناء النسخ"""
+
+    @classmethod
+    def setUpClass(cls):
+        # اتصال الـ schema يُسجل بعد إنشاء قاعدة الاختبار وقبل التحقق من databases
+        cls.target = placement_alias(Tenant(subdomain='mover'), 'schema')
+        cls.databases = {'default', cls.target}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[cls.target].close()
+        with connections['default'].cursor() as cursor:
+            cursor.execute("DROP SCHEMA IF EXISTS tenant_mover CASCADE")
+
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Mover', subdomain='mover', db_name='tenant_mover', placement='shared')
+        token = set_current_tenant_id(self.tenant.pk)
+        self.addCleanup(reset_current_tenant_id, token)
+        self.customers = [
+            Customer.objects.create(first_name=name, last_name='Ali', email=f'{name}@example.com')
+            for name in ('Sara', 'Omar', 'Lina')
+        ]
+
+    def write_during_copy(self, line):
+        # بعد نسخ العملاء وقبل التحويل، من اتصال آخر كما في طلبات حقيقية
+        # (التعديل بـ update() لا يغير أي حقل تاريخ)
+        if line.startswith('Customer:') and line.endswith('rows copied'):
+            writer = threading.Thread(target=self.write_changes)
+            writer.start()
+            writer.join()
+
+    def write_changes(self):
+        token = set_current_tenant_id(self.tenant.pk)
+        try:
+            sara, omar, _ = self.customers
+            Customer.objects.filter(pk=sara.pk).update(first_name='Sarah')
+            omar.delete()
+            Customer.objects.create(first_name='Nour', last_name='Ali', email='nour@example.com')
+        finally:
+            reset_current_tenant_id(token)
+            connections.close_all()
+
+    def move(self, **options):
+        with mock.patch.object(tenant_cache, 'ttl', 0):
+            return move_tenant(self.tenant, 'schema', log=self.write_during_copy, **options)
+
+    def test_changes_during_copy_reach_the_target(self):
+        moved = self.move()
+        self.assertEqual(moved.placement, 'schema')
+        names = set(Customer._base_manager.using(self.target).values_list('first_name', flat=True))
+        self.assertEqual(names, {'Sarah', 'Lina', 'Nour'})
+        self.assertEqual(CustomerSummary._base_manager.using(self.target).count(), 3)
+
+    def test_source_rows_are_removed(self):
+        self.move()
+        self.assertFalse(Customer._base_manager.using('default').filter(tenant_id=self.tenant.pk).exists())
+        with connections['default'].cursor() as cursor:
+            cursor.execute("SELECT to_regclass('tenant_move_log_%s')", [self.tenant.pk])
+            self.assertIsNone(cursor.fetchone()[0])
+
+    def test_keep_source(self):
+        self.move(keep_source=True)
+        self.assertEqual(Customer._base_manager.using('default').filter(tenant_id=self.tenant.pk).count(), 3)
+
+    def test_members_without_rows_can_log_in_after_the_move(self):
+        # موظف بدون طلبات أو أي صف يشير إليه: عضويته فقط، وجلسة مفتوحة قبل النقل
+        staff = get_user_model().objects.create_user(username='optician', password='secret')
+        UserTenant.objects.create(user=staff, tenant=self.tenant, role='sales')
+        session = Session.objects.create(
+            session_key='optician-session',
+            session_data=SessionStore().encode({SESSION_KEY: str(staff.pk)}),
+            expire_date=timezone.now() + datetime.timedelta(days=1),
+        )
+        self.move()
+
+        token = set_current_db(self.target)
+        self.addCleanup(reset_current_db, token)
+        self.assertEqual(authenticate(username='optician', password='secret').global_id, staff.global_id)
+        copied = Session.objects.using(self.target).get(session_key=session.session_key)
+        self.assertEqual(copied.get_decoded()[SESSION_KEY], str(staff.pk))
+        # sequence المستخدمين في المكان الجديد بعد المفاتيح المنسوخة
+        created = get_user_model().objects.db_manager(self.target).create_user(username='new', password='x')
+        self.assertGreater(created.pk, staff.pk)
+
+
+class MigrateTenantsTests(TestCase):
+    """قاعدة مستقلة و schema فقط؛ الجداول المشتركة تُحدَّث مع migrate العادي"""
+
+    def setUp(self):
+        self.shared = Tenant.objects.create(name='Small', subdomain='small', db_name='tenant_small', placement='shared')
+        self.schema = Tenant.objects.create(
+            name='Mid', subdomain='mid', db_name='tenant_mid', placement='schema', schema_name='tenant_mid',
+        )
+        self.database = Tenant.objects.create(name='Big', subdomain='big', db_name='tenant_big', placement='database')
+        # الاتصالات المسجلة أثناء الاختبار تُزال حتى لا يمر عليها تنظيف TestCase
+        for alias in ('tenant_mid__schema', 'tenant_big'):
+            self.addCleanup(connections.settings.pop, alias, None)
+
+    def test_targets_by_placement(self):
+        targets = migrate_tenants.migration_targets(Tenant.objects.all())
+        self.assertEqual(targets, [('tenant_mid__schema', self.schema.pk), ('tenant_big', self.database.pk)])
+        options = connections.settings['tenant_mid__schema']['OPTIONS']['options']
+        self.assertIn('search_path=tenant_mid,public', options)
+
+    def test_each_target_is_migrated_on_its_own_connection(self):
+        with mock.patch.object(migrate_tenants, 'call_command') as call_command:
+            for alias, pk in migrate_tenants.migration_targets(Tenant.objects.all()):
+                self.assertEqual(migrate_tenants.migrate_tenant(alias, pk, None)[1], 'migrated')
+        self.assertEqual(
+            [call.kwargs['database'] for call in call_command.call_args_list],
+            ['tenant_mid__schema', 'tenant_big'],
+        )
@@ -0,0 +1,8 @@
+from django.urls import path
+
+from . import views
+
+urlpatterns = [
+    path('', views.create_tenant, name='create-tenant'),
+    path('jobs/<int:job_id>/', views.provisioning_status, name='provisioning-status'),
+]
@@ -2,52 +2,65 @@ from django.shortcuts import render
 
 # Create your views here.
 # views.py - إنشاء عميل جديد
+from django.contrib.auth.hashers import make_password
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from django.contrib.auth.models import User
-from .models import UserTenant
+
+from .jobs import provisioning_queue
+from .models import ProvisioningJob, Tenant
 
 @api_view(['POST'])
 def create_tenant(request):
-    """إنشاء عميل جديد مع قاعدة بيانات منفصلة"""
+    """
+    إنشاء عميل جديد مع قاعدة بيانات منفصلة
+    التجهيز يتم في الخلفية، والرد يحتوي رابط متابعة حالة المهمة
+    """
     data = request.data
     
     try:
-        # إنشاء قاعدة البيانات
-        db_name = TenantManager.create_tenant_database(data['subdomain'])
-        
-        # إنشاء سجل العميل
-        tenant = Tenant.objects.create(
-            name=data['name'],
-            subdomain=data['subdomain'],
-            database_name=db_name,
-            plan=data.get('plan', 'basic')
-        )
-        
-        # تشغيل migrations على قاعدة البيانات الجديدة
-        TenantManager.run_migrations_for_tenant(db_name)
-        
-        # إنشاء المستخدم المدير
-        admin_user = User.objects.create_user(
-            username=data['admin_email'],
-            email=data['admin_email'],
-            password=data['admin_password']
-        )
+        subdomain = data['subdomain']
+        if Tenant.objects.filter(subdomain=subdomain).exists():
+            raise ValueError(f"subdomain '{subdomain}' is already taken")
         
-        UserTenant.objects.create(
-            user=admin_user,
-            tenant=tenant,
-            role='admin'
+        job, created = ProvisioningJob.objects.get_or_create(
+            subdomain=subdomain,
+            defaults={
+                'name': data['name'],
+                'db_name': f"tenant_{subdomain}",
+                'admin_email': data['admin_email'],
+                'admin_password': make_password(data['admin_password']),
+            },
         )
+        # إعادة إرسال نفس الطلب بعد فشل سابق تعيد المحاولة من المرحلة المتوقفة
+        if created or job.status == 'failed':
+            provisioning_queue.enqueue(job.pk)
         
-        return Response({
-            'success': True,
-            'tenant_id': tenant.id,
-            'subdomain': tenant.subdomain
-        })
+        return Response(job_status_payload(job), status=202)
         
     except Exception as e:
         return Response({
             'success': False,
             'error': str(e)
-        }, status=400)
\ No newline at end of file
+        }, status=400)
+
+@api_view(['GET'])
+def provisioning_status(request, job_id):
+    """متابعة حالة مهمة تجهيز العميل"""
+    try:
+        job = ProvisioningJob.objects.get(pk=job_id)
+    except ProvisioningJob.DoesNotExist:
+        return Response({'success': False, 'error': 'job not found'}, status=404)
+    return Response(job_status_payload(job))
+
+def job_status_payload(job):
+    return {
+        'success': job.status != 'failed',
+        'job_id': job.pk,
+        'status': job.status,
+        'stage': job.current_stage,
+        'completed_stages': job.completed_stages,
+        'error': job.error,
+        'tenant_id': job.tenant_id,
+        'subdomain': job.subdomain,
+        'status_url': f"/api/tenants/jobs/{job.pk}/",
+    }
@@ -2,6 +2,8 @@ from django.core.management import call_command
 from django.db import connections
 import psycopg2
 
+from core.tenant_connections import tenant_connections
+
 def create_new_client_db(db_name, db_user, db_password):
     # إنشاء قاعدة بيانات (PostgreSQL مثال)
     conn = psycopg2.connect(dbname='postgres', user='postgres', password='yourpass')
@@ -11,15 +13,8 @@ def create_new_client_db(db_name, db_user, db_password):
     cursor.close()
     conn.close()
 
-    # إعداد الاتصال مؤقتًا
-    settings.DATABASES[db_name] = {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': db_name,
-        'USER': db_user,
-        'PASSWORD': db_password,
-        'HOST': 'localhost',
-        'PORT': '',
-    }
+    # تسجيل الاتصال في سجل اتصالات العملاء
+    tenant_connections.register(db_name, USER=db_user, PASSWORD=db_password)
 
     # تنفيذ المايجريشن
     call_command('migrate', database=db_name)
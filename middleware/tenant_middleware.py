@@ -1,5 +1,4 @@
 # middleware.py
-from core.models import Tenant
 
 # class TenantMiddleware:
 #     def __init__(self, get_response):
@@ -43,20 +42,108 @@ from core.models import Tenant
 #                 return subdomain
 #         return None
 
-from core.models import Tenant
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.http import HttpResponse
+
+from core.placement import usage_recorder
+from core.schemas import PUBLIC_SCHEMA, switch_schema
+from core.tenant_cache import tenant_cache
+from core.tenant_connections import tenant_connections
+from core.tenant_context import (
+    reset_current_db, reset_current_tenant_id, set_current_db, set_current_tenant_id,
+)
 
 class TenantMiddleware:
+    """
+    تحديد العميل من الـ subdomain وتعيين قاعدة بياناته في السياق الحالي
+    يدعم الوضعين المتزامن و async حتى لا يضطر Django لتشغيله في thread
+    عند خدمة طلبات ASGI
+    """
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        host = request.get_host().split(':')[0]
-        subdomain = host.split('.')[0]
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        # البحث عبر الكاش بدل استعلام قاعدة البيانات الرئيسية في كل طلب
+        tenant = tenant_cache.get(self.get_subdomain(request))
+        request.tenant = tenant
+        if tenant and tenant.maintenance:
+            return self.maintenance_response()
+        if tenant:
+            # حجم الطلبات لكل عميل (لمحرك التوزيع) يُكتب في قاعدة البيانات على فترات
+            if usage_recorder.hit(tenant.pk):
+                usage_recorder.flush()
+            # تسجيل اتصال قاعدة العميل عند أول طلب له في هذا الـ worker
+            request.tenant_db = tenant_connections.ensure(tenant.db_alias)
+        else:
+            request.tenant_db = 'default'
+
+        # وضع schema: SET search_path فقط إذا تغير العميل على هذا الاتصال،
+        # ثم استعادة الـ schema السابق بعد الطلب حتى لا يبقى الاتصال على schema العميل
+        previous_schema = switch_schema(self.get_schema(tenant))
 
+        # الـ router يقرأ قاعدة العميل من السياق الحالي
+        token = set_current_db(request.tenant_db)
+        tenant_token = set_current_tenant_id(tenant.pk if tenant else None)
         try:
-            tenant = Tenant.objects.get(subdomain=subdomain)
-            request.tenant_db = tenant.db_name
-        except Tenant.DoesNotExist:
+            return self.get_response(request)
+        finally:
+            reset_current_tenant_id(tenant_token)
+            reset_current_db(token)
+            switch_schema(previous_schema)
+
+    async def __acall__(self, request):
+        tenant = await tenant_cache.aget(self.get_subdomain(request))
+        request.tenant = tenant
+        if tenant and tenant.maintenance:
+            return self.maintenance_response()
+        if tenant:
+            if usage_recorder.hit(tenant.pk):
+                await sync_to_async(usage_recorder.flush)()
+            request.tenant_db = await tenant_connections.aensure(tenant.db_alias)
+        else:
             request.tenant_db = 'default'
 
-        return self.get_response(request)
+        # الاستعلامات تُنفذ في thread الـ sync_to_async وليس في thread الـ event loop،
+        # لذلك الفحص والتفعيل والاستعادة كلها تتم هناك على نفس كائن الاتصال.
+        # الطلبات الأخرى تستعيد schema السابق دائماً، فالاتصال يبقى على public
+        # ولا يحتاج عميل public/قاعدة مستقلة أي انتقال إلى ذلك الـ thread
+        schema = self.get_schema(tenant)
+        previous_schema = None
+        if schema != PUBLIC_SCHEMA:
+            previous_schema = await sync_to_async(switch_schema)(schema)
+
+        token = set_current_db(request.tenant_db)
+        tenant_token = set_current_tenant_id(tenant.pk if tenant else None)
+        try:
+            return await self.get_response(request)
+        finally:
+            reset_current_tenant_id(tenant_token)
+            reset_current_db(token)
+            if previous_schema is not None:
+                await sync_to_async(switch_schema)(previous_schema)
+
+    def maintenance_response(self):
+        # العميل في مرحلة التحويل الأخيرة أثناء نقله (core/placement.py)
+        response = HttpResponse('Tenant is being migrated, retry shortly', status=503)
+        response['Retry-After'] = '30'
+        return response
+
+    def get_schema(self, tenant):
+        return tenant.active_schema if tenant else PUBLIC_SCHEMA
+
+    def get_subdomain(self, request):
+        host = request.get_host().split(':')[0]
+        return host.split('.')[0]
+
+
+class SyncTenantMiddleware(TenantMiddleware):
+    """النسخة المتزامنة فقط (للمقارنة في scripts/load_test_asgi.py)"""
+    async_capable = False
@@ -39,6 +39,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'tenant',
     'core',
 ]
@@ -48,6 +49,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    config('TENANT_MIDDLEWARE', default='middleware.tenant_middleware.TenantMiddleware'),
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -100,9 +102,51 @@ DATABASES = {
 }
 
 
-DATABASE_ROUTERS = ['routers.db_router.TenantRouter']
+DATABASE_ROUTERS = ['routers.db_router.TenantDatabaseRouter']
 AUTH_USER_MODEL = 'tenant.CustomUser'
 
+# كاش تحديد العميل في TenantMiddleware
+# TENANT_CACHE_ALIAS: اسم كاش Django المشترك بين العمليات (فارغ = تعطيل المستوى المشترك)
+TENANT_CACHE_SIZE = config('TENANT_CACHE_SIZE', default=1024, cast=int)
+TENANT_CACHE_TTL = config('TENANT_CACHE_TTL', default=60, cast=int)
+TENANT_CACHE_NEGATIVE_TTL = config('TENANT_CACHE_NEGATIVE_TTL', default=30, cast=int)
+TENANT_CACHE_ALIAS = config('TENANT_CACHE_ALIAS', default='') or None
+# كل كم ثانية تقرأ العملية إصدار الكاش المشترك (إبطال العميل يصل لكل العمليات خلال هذه المدة)
+TENANT_CACHE_SYNC_INTERVAL = config('TENANT_CACHE_SYNC_INTERVAL', default=1, cast=float)
+
+# الحد الأقصى لاتصالات قواعد العملاء المفتوحة في كل thread (الأقدم يُغلق أولاً)
+TENANT_MAX_OPEN_CONNECTIONS = config('TENANT_MAX_OPEN_CONNECTIONS', default=32, cast=int)
+
+# القاعدة التي تحتوي جداول العملاء المشتركة (عملاء الخطط الصغيرة، placement='shared')
+SHARED_TENANT_DATABASE = config('SHARED_TENANT_DATABASE', default='default')
+
+# حدود نقل العميل لوضع أعلى (core/placement.py) وفترة كتابة عداد الطلبات بالثواني
+TENANT_PLACEMENT_THRESHOLDS = {
+    'schema': {'size_mb': config('TENANT_SCHEMA_SIZE_MB', default=500, cast=int),
+               'requests': config('TENANT_SCHEMA_REQUESTS', default=50_000, cast=int)},
+    'database': {'size_mb': config('TENANT_DATABASE_SIZE_MB', default=5_000, cast=int),
+                 'requests': config('TENANT_DATABASE_REQUESTS', default=500_000, cast=int)},
+}
+TENANT_USAGE_FLUSH_INTERVAL = config('TENANT_USAGE_FLUSH_INTERVAL', default=30, cast=int)
+
+# مدة بقاء عدادات حدود الخطة في الذاكرة بالثواني (core/limits.py)
+TENANT_LIMITS_TTL = config('TENANT_LIMITS_TTL', default=10, cast=int)
+
+# عدد أرقام الطلبات التي يحجزها كل worker دفعة واحدة (1 = ترقيم بدون فجوات)
+ORDER_NUMBER_BLOCK_SIZE = config('ORDER_NUMBER_BLOCK_SIZE', default=1, cast=int)
+
+# قاعدة القالب التي تُنسخ منها قواعد العملاء الجديدة (python manage.py fill_tenant_pool)
+TENANT_TEMPLATE_DATABASE = config('TENANT_TEMPLATE_DATABASE', default='tenant_template')
+
+# مهام تجهيز العملاء في الخلفية (PROVISIONING_EAGER=True ينفذها مباشرة، مفيد في الاختبارات)
+PROVISIONING_WORKERS = config('PROVISIONING_WORKERS', default=2, cast=int)
+PROVISIONING_MAX_ATTEMPTS = config('PROVISIONING_MAX_ATTEMPTS', default=3, cast=int)
+PROVISIONING_EAGER = config('PROVISIONING_EAGER', default=False, cast=bool)
+
+# نقاط الولاء (tenant/loyalty.py): نقاط لكل وحدة من قيمة الطلب المسلَّم ومدة صلاحيتها بالأيام
+LOYALTY_POINTS_PER_UNIT = config('LOYALTY_POINTS_PER_UNIT', default='0.1')
+LOYALTY_POINTS_TTL_DAYS = config('LOYALTY_POINTS_TTL_DAYS', default=365, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -40,9 +40,41 @@
 #             # قواعد بيانات العملاء للنماذج الخاصة بهم
 #             return app_label in ['glasses_store', 'inventory', 'sales']
 
+from core.schemas import in_tenant_schema
+from core.tenant_context import _current_db
+
+# تطبيقات مشتركة تبقى دائماً على قاعدة 'default' (مثل جدول العملاء نفسه)
+SHARED_APPS = frozenset({'core'})
+
+
+def _instance_db(hints):
+    """
+    قاعدة الكائن المرتبط بالعملية (حفظ كائن أو الوصول لكائنات مرتبطة به)، كما في توجيه
+    Django الافتراضي: كائن قُرئ بـ using(alias) يبقى على قاعدته مهما كان العميل الحالي
+    """
+    instance = hints.get('instance')
+    if instance is not None:
+        return instance._state.db
+
+
 class TenantDatabaseRouter:
+    """
+    توجيه الاستعلامات لقاعدة العميل الحالي من contextvars
+    (يتم تعيينه في TenantMiddleware أو using_tenant)
+    """
+
     def db_for_read(self, model, **hints):
-        return getattr(hints.get('request', None), 'tenant_db', 'default')
+        if model._meta.app_label in SHARED_APPS:
+            return 'default'
+        return _instance_db(hints) or _current_db.get()
 
     def db_for_write(self, model, **hints):
-        return getattr(hints.get('request', None), 'tenant_db', 'default')
+        if model._meta.app_label in SHARED_APPS:
+            return 'default'
+        return _instance_db(hints) or _current_db.get()
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """جداول التطبيقات المشتركة لا تُنشأ في قواعد العملاء ولا في schemas العملاء"""
+        if app_label in SHARED_APPS:
+            return db == 'default' and not in_tenant_schema(db)
+        return None
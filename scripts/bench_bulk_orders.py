@@ -0,0 +1,61 @@
+# scripts/bench_bulk_orders.py - قياس سرعة إدخال الطلبات دفعة واحدة (عناصر/ثانية)
+# التشغيل: python scripts/bench_bulk_orders.py tenant_vision --orders 2000 --lines 5
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'opticsSaas.settings')
+
+import django
+django.setup()
+
+from django.contrib.auth import get_user_model
+
+from core.tenant_context import using_tenant
+from tenant.bulk import ingest_orders
+from tenant.models import Customer, Product
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('db_name')
+    parser.add_argument('--orders', type=int, default=2000)
+    parser.add_argument('--lines', type=int, default=5)
+    args = parser.parse_args()
+
+    with using_tenant(args.db_name):
+        product_ids = list(Product.objects.values_list('id', flat=True)[:500])
+        customer_ids = list(Customer.objects.values_list('id', flat=True)[:500])
+        user = get_user_model().objects.first()
+        if not (product_ids and customer_ids and user):
+            sys.exit("قاعدة العميل تحتاج منتجات وعملاء ومستخدم واحد على الأقل")
+
+        orders = [{
+            'customer_id': random.choice(customer_ids),
+            'status': 'delivered',
+            'payment_status': 'paid',
+            'subtotal': 100,
+            'total_amount': 100,
+            'paid_amount': 100,
+            'items': [
+                {'product_id': random.choice(product_ids), 'quantity': 1, 'unit_price': '20.00'}
+                for _ in range(args.lines)
+            ],
+        } for _ in range(args.orders)]
+
+        started = time.perf_counter()
+        result = ingest_orders(orders, created_by=user)
+        elapsed = time.perf_counter() - started
+
+    print(f"orders:      {result['orders']}")
+    print(f"lines:       {result['items']} ({result['items'] / elapsed:.0f} lines/s)")
+    print(f"products:    {result['products']}")
+    print(f"elapsed:     {elapsed:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
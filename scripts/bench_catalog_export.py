@@ -0,0 +1,105 @@
+# scripts/bench_catalog_export.py - أقصى استهلاك ذاكرة لتصدير الكتالوج: قائمة كاملة مقابل التدفق
+# ru_maxrss لا ينخفض، لذلك كل طريقة تُشغَّل في عملية مستقلة:
+#   python scripts/bench_catalog_export.py tenant_vision --mode list
+#   python scripts/bench_catalog_export.py tenant_vision --mode stream
+# عبر HTTP (الـ view والـ middleware و StreamingHttpResponse في الخادم نفسه):
+#   uvicorn opticsSaas.asgi:application --port 8000 &
+#   python scripts/bench_catalog_export.py tenant_vision --mode http --server-pid $! \
+#       --url http://127.0.0.1:8000/api/products/export/ --host vision.localhost --auth user:password
+# (النتيجة الممثلة تحتاج قاعدة بحوالي مليون منتج)
+import argparse
+import base64
+import json
+import os
+import resource
+import sys
+import time
+from pathlib import Path
+from urllib.request import Request, urlopen
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'opticsSaas.settings')
+
+import django
+django.setup()
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from core.tenant_context import using_tenant
+from tenant.catalog import export_catalog
+from tenant.models import Product
+
+
+def server_peak_mb(pid):
+    """أقصى ذاكرة لعملية الخادم (VmHWM من /proc، لينكس فقط)"""
+    with open(f'/proc/{pid}/status') as status:
+        for line in status:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    return 0
+
+
+def fetch(args):
+    """قراءة الاستجابة على أجزاء وقياس زمن أول بايت"""
+    request = Request(args.url, headers={'Host': args.host})
+    if args.auth:
+        request.add_header('Authorization', 'Basic ' + base64.b64encode(args.auth.encode()).decode())
+    started = time.perf_counter()
+    first_byte = None
+    written = rows = 0
+    with urlopen(request) as response:
+        while chunk := response.read(64 * 1024):
+            if first_byte is None:
+                first_byte = time.perf_counter() - started
+            written += len(chunk)
+            rows += chunk.count(b'\n')
+    return rows, written, first_byte or 0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('db_name')
+    parser.add_argument('--mode', choices=['list', 'stream', 'http'], required=True)
+    parser.add_argument('--url', default='http://127.0.0.1:8000/api/products/export/')
+    parser.add_argument('--host', default='vision.localhost', help="Host header (يحدد العميل)")
+    parser.add_argument('--auth', help="user:password (Basic)")
+    parser.add_argument('--server-pid', type=int, help="عملية الخادم لقياس ذاكرتها")
+    args = parser.parse_args()
+
+    if args.mode == 'http':
+        before = server_peak_mb(args.server_pid) if args.server_pid else 0
+        started = time.perf_counter()
+        rows, written, first_byte = fetch(args)
+        print("mode:        http")
+        print(f"rows:        {rows}")
+        print(f"bytes:       {written}")
+        print(f"first byte:  {first_byte * 1000:.0f} ms")
+        print(f"seconds:     {time.perf_counter() - started:.1f}")
+        if args.server_pid:
+            print(f"server peak RSS MB: {server_peak_mb(args.server_pid):.0f} (before request: {before:.0f})")
+        return
+
+    with using_tenant(args.db_name) as db_name:
+        started = time.perf_counter()
+        written = 0
+        with open(os.devnull, 'w') as output:
+            if args.mode == 'list':
+                # الطريقة السابقة (get_products): كل المنتجات ككائنات ثم قائمة dicts
+                data = [{'id': p.id, 'name': p.name, 'price': str(p.selling_price)} for p in Product.objects.all()]
+                written = output.write(json.dumps(data, cls=DjangoJSONEncoder))
+                rows = len(data)
+            else:
+                rows = 0
+                for line in export_catalog('ndjson', using=db_name):
+                    written += output.write(line)
+                    rows += 1
+
+    print(f"mode:        {args.mode}")
+    print(f"rows:        {rows}")
+    print(f"bytes:       {written}")
+    print(f"seconds:     {time.perf_counter() - started:.1f}")
+    print(f"peak RSS MB: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f}")
+
+
+if __name__ == '__main__':
+    main()
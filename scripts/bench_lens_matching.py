@@ -0,0 +1,70 @@
+# scripts/bench_lens_matching.py - مطابقة 100 ألف وصفة مع العدسات والإطارات (بيانات عشوائية)
+# التشغيل: python scripts/bench_lens_matching.py --prescriptions 100000
+# لا يحتاج قاعدة بيانات: المصفوفات تُولَّد مباشرة بنفس شكل prescription_arrays وغيرها
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'opticsSaas.settings')
+
+import django
+django.setup()
+
+import numpy as np
+
+from tenant.lens_matching import match
+
+
+def random_prescriptions(rng, count):
+    def quarter_steps(low, high):
+        return np.round(rng.uniform(low, high, count) * 4) / 4
+
+    pd = rng.normal(63, 4, count)
+    pd[rng.random(count) < 0.05] = np.nan  # وصفات بدون PD
+    return {
+        'id': np.arange(1, count + 1),
+        'right_sphere': quarter_steps(-12, 8), 'right_cylinder': quarter_steps(-4, 0),
+        'left_sphere': quarter_steps(-12, 8), 'left_cylinder': quarter_steps(-4, 0),
+        'pupillary_distance': pd,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--prescriptions', type=int, default=100_000)
+    parser.add_argument('--lenses', type=int, default=40)
+    parser.add_argument('--frames', type=int, default=20_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    prescriptions = random_prescriptions(rng, args.prescriptions)
+    lenses = {
+        'id': np.arange(1, args.lenses + 1),
+        'min_sphere': -rng.choice([4, 6, 8, 10, 14], args.lenses).astype(float),
+        'max_sphere': rng.choice([4, 6, 8], args.lenses).astype(float),
+        'max_cylinder': rng.choice([2, 4, 6], args.lenses).astype(float),
+    }
+    frames = {
+        'id': np.arange(1, args.frames + 1),
+        'frame_pd': rng.integers(46, 60, args.frames) + rng.integers(14, 22, args.frames).astype(float),
+    }
+
+    started = time.perf_counter()
+    result = match(prescriptions, lenses, frames)
+    elapsed = time.perf_counter() - started
+
+    frame_counts = result.frame_stop - result.frame_start
+    print(f"prescriptions:            {len(result)}")
+    print(f"lens types / frames:      {args.lenses} / {args.frames}")
+    print(f"match time:               {elapsed:.2f} s")
+    print(f"avg lens options:         {result.lens_mask.sum(axis=1).mean():.1f}")
+    print(f"avg frame options:        {frame_counts.mean():.0f}")
+    print(f"without any lens option:  {(~result.lens_mask.any(axis=1)).sum()}")
+    print(f"example:                  {result.options(0)['lens_type_ids'][:5]} ...")
+
+
+if __name__ == '__main__':
+    main()
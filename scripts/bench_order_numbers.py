@@ -0,0 +1,79 @@
+# scripts/bench_order_numbers.py - إنشاء 200 طلب بالتوازي على قاعدة عميل
+# التشغيل: python scripts/bench_order_numbers.py tenant_vision [--legacy] [--block-size 20]
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'opticsSaas.settings')
+
+import django
+django.setup()
+
+from django.db import IntegrityError, connections
+
+from core.tenant_context import using_tenant
+from tenant.models import Customer, Order
+from tenant.sequences import order_numbers
+
+
+def legacy_order_number():
+    """الطريقة القديمة: البحث عن آخر طلب لليوم ثم الزيادة في Python"""
+    import datetime
+    prefix = f"ORD-{datetime.date.today().strftime('%Y%m%d')}"
+    last_order = Order.objects.filter(
+        order_number__startswith=prefix
+    ).order_by('-created_at').first()
+    next_number = int(last_order.order_number.split('-')[-1]) + 1 if last_order else 1
+    return f"{prefix}-{next_number:04d}"
+
+
+def create_order(db_name, customer_id, legacy):
+    with using_tenant(db_name):
+        try:
+            started = time.perf_counter()
+            order = Order(customer_id=customer_id, subtotal=0, total_amount=0)
+            if legacy:
+                order.order_number = legacy_order_number()
+            order.save()
+            return time.perf_counter() - started, None
+        except IntegrityError as exc:
+            return time.perf_counter() - started, exc
+        finally:
+            connections.close_all()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('db_name')
+    parser.add_argument('--orders', type=int, default=200)
+    parser.add_argument('--legacy', action='store_true')
+    parser.add_argument('--block-size', type=int, default=1)
+    args = parser.parse_args()
+
+    order_numbers.block_size = args.block_size
+    with using_tenant(args.db_name):
+        customer, _ = Customer.objects.get_or_create(
+            email='bench@example.com', defaults={'first_name': 'Bench', 'last_name': 'Customer'}
+        )
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.orders) as pool:
+        results = list(pool.map(
+            lambda _: create_order(args.db_name, customer.pk, args.legacy), range(args.orders)
+        ))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _ in results)
+    collisions = sum(1 for _, error in results if error)
+    print(f"mode:        {'legacy' if args.legacy else f'sequence (block={args.block_size})'}")
+    print(f"orders:      {args.orders} in {elapsed:.2f}s ({args.orders / elapsed:.0f}/s)")
+    print(f"collisions:  {collisions}")
+    print(f"p99 ms:      {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+# scripts/bench_plan_limits.py - زمن طلب الكتالوج مع COUNT(*) لكل طلب مقابل عداد الاستخدام
+# التشغيل: python scripts/bench_plan_limits.py tenant_vision --requests 2000
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'opticsSaas.settings')
+
+import django
+django.setup()
+
+from django.test import RequestFactory
+
+from core.models import Tenant
+from core.tenant_context import using_tenant
+from tenant.models import Product
+from tenant.views import product_list
+
+
+def count_limit(tenant):
+    """الطريقة السابقة: COUNT(*) على المنتجات النشطة في كل طلب"""
+    return Product.objects.filter(is_active=True).count() < tenant.max_products
+
+
+def run(label, tenant, requests, factory):
+    request_times = []
+    for _ in range(requests):
+        request = factory.get('/api/products/')
+        request.tenant = tenant
+        started = time.perf_counter()
+        product_list(request)
+        request_times.append((time.perf_counter() - started) * 1000)
+    request_times.sort()
+    p99 = request_times[int(len(request_times) * 0.99) - 1]
+    print(f"{label:<24} median {statistics.median(request_times):7.2f} ms   p99 {p99:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('db_name')
+    parser.add_argument('--requests', type=int, default=1000)
+    args = parser.parse_args()
+
+    tenant = Tenant.objects.using('default').get(db_name=args.db_name)
+    factory = RequestFactory()
+    with using_tenant(tenant):
+        print(f"active products: {Product.objects.filter(is_active=True).count()}")
+        original = Tenant.is_within_limits
+        Tenant.is_within_limits = count_limit
+        try:
+            run("COUNT(*) per request", tenant, args.requests, factory)
+        finally:
+            Tenant.is_within_limits = original
+        run("usage counter", tenant, args.requests, factory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+# scripts/bench_price_sort.py - الترتيب والتصفية بالسعر: Python مقابل الأعمدة المفهرسة
+# التشغيل: python scripts/bench_price_sort.py tenant_vision
+# (القاعدة تحتاج حوالي 200 ألف منتج لنتيجة ممثلة)
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'opticsSaas.settings')
+
+import django
+django.setup()
+
+from core.tenant_context import using_tenant
+from tenant.models import Product
+
+
+def timed(label, func):
+    started = time.perf_counter()
+    result = func()
+    print(f"{label:<36} {(time.perf_counter() - started) * 1000:10.1f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('db_name')
+    parser.add_argument('--limit', type=int, default=50)
+    args = parser.parse_args()
+
+    with using_tenant(args.db_name):
+        print(f"products: {Product.objects.count()}")
+
+        python_page = timed("python: sort by current_price", lambda: sorted(
+            Product.objects.filter(is_active=True), key=lambda p: (p.current_price, p.id)
+        )[:args.limit])
+        db_page = timed("db: order_by effective_price", lambda: list(
+            Product.objects.filter(is_active=True).by_price()[:args.limit]
+        ))
+        assert [p.id for p in python_page] == [p.id for p in db_page]
+
+        timed("python: margin below 20%", lambda: [
+            p.id for p in Product.objects.filter(is_active=True, cost_price__gt=0)
+            if p.profit_margin < 20
+        ])
+        timed("db: margin_below(20)", lambda: list(
+            Product.objects.filter(is_active=True).margin_below(20).values_list('id', flat=True)
+        ))
+
+
+if __name__ == '__main__':
+    main()
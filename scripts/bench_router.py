@@ -0,0 +1,54 @@
+# scripts/bench_router.py - قياس تكلفة الـ router لكل استعلام
+# التشغيل: python scripts/bench_router.py
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.tenant_context import reset_current_db, set_current_db
+from routers.db_router import TenantDatabaseRouter
+
+
+class HintRouter:
+    """الـ router القديم: يعتمد على تمرير request في hints"""
+
+    def db_for_read(self, model, **hints):
+        return getattr(hints.get('request', None), 'tenant_db', 'default')
+
+
+class _Meta:
+    app_label = 'tenant'
+
+
+class Model:
+    _meta = _Meta
+
+
+class Request:
+    tenant_db = 'tenant_vision'
+
+
+def run(number=1_000_000):
+    old, new = HintRouter(), TenantDatabaseRouter()
+    request = Request()
+
+    token = set_current_db('tenant_vision')
+    try:
+        results = {
+            'old (no hint)': timeit.timeit(lambda: old.db_for_read(Model), number=number),
+            'old (request hint)': timeit.timeit(
+                lambda: old.db_for_read(Model, request=request), number=number
+            ),
+            'new (contextvar)': timeit.timeit(lambda: new.db_for_read(Model), number=number),
+        }
+        assert new.db_for_read(Model) == 'tenant_vision'
+    finally:
+        reset_current_db(token)
+
+    for name, seconds in results.items():
+        print(f"{name:<20} {seconds / number * 1e9:8.1f} ns/query")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,65 @@
+# scripts/bench_sales_rollups.py - استعلامات لوحة المبيعات: الطلبات الأصلية مقابل جداول التجميع
+# التشغيل: python scripts/bench_sales_rollups.py tenant_vision --years 3
+# (يُفضل قاعدة بثلاث سنوات من الطلبات؛ يتم تحديث جداول التجميع أولاً)
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'opticsSaas.settings')
+
+import django
+django.setup()
+
+from core.tenant_context import using_tenant
+from tenant.analytics import SOURCES, refresh_rollups, sales_report
+from tenant.models import Order
+
+RAW_SOURCES = {source.name: source for source in SOURCES if source.raw}
+
+REPORTS = [
+    ('revenue by month', ['total_amount', 'tax_amount', 'discount_amount'], [], 'month'),
+    ('revenue by sales person', ['total_amount'], ['sales_person'], 'total'),
+    ('revenue by day', ['total_amount'], [], 'day'),
+    ('brand revenue by quarter', ['revenue', 'quantity'], ['brand'], 'quarter'),
+    ('category revenue by month', ['revenue'], ['category'], 'month'),
+]
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('db_name')
+    parser.add_argument('--years', type=int, default=3)
+    args = parser.parse_args()
+
+    today = date.today()
+    end = date(today.year, today.month, 1) - timedelta(days=1)  # آخر يوم في الشهر السابق
+    start = date(end.year - args.years + 1, 1, 1)
+
+    with using_tenant(args.db_name) as using:
+        print(f"orders: {Order.objects.count()}  range: {start} .. {end}")
+        days, elapsed = timed(lambda: refresh_rollups(using=using))
+        print(f"refresh: {days} days in {elapsed:.0f} ms")
+        _, elapsed = timed(lambda: refresh_rollups(using=using))
+        print(f"refresh with nothing new: {elapsed:.0f} ms\n")
+
+        for label, metrics, group_by, granularity in REPORTS:
+            (source, rows), rollup_ms = timed(
+                lambda: sales_report(start, end, metrics, group_by, granularity, using=using)
+            )
+            raw = RAW_SOURCES['orders' if 'total_amount' in metrics else 'order_items']
+            raw_rows, raw_ms = timed(lambda: raw.report(start, end, metrics, group_by, granularity, using))
+            print(f"{label:<28} raw {raw_ms:9.1f} ms   {source:<20} {rollup_ms:8.1f} ms   rows {len(rows)}/{len(raw_rows)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+# scripts/bench_segments.py - زمن شريحة "عيد الميلاد هذا الأسبوع": Python مقابل SQL المفهرس
+# التشغيل: python scripts/bench_segments.py tenant_vision
+# (النتيجة الممثلة تحتاج قاعدة بحوالي مليوني عميل)
+import argparse
+import os
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'opticsSaas.settings')
+
+import django
+django.setup()
+
+from django.utils import timezone
+
+from core.tenant_context import get_current_tenant_id, using_tenant
+from tenant.models import Customer
+from tenant.segments import segment_count, segment_queryset, stream_contacts
+
+
+def timed(label, func):
+    started = time.perf_counter()
+    result = func()
+    print(f"{label:<40} {(time.perf_counter() - started) * 1000:10.1f} ms   -> {result}")
+    return result
+
+
+def python_birthdays(days):
+    """الطريقة البديلة: المرور على كل العملاء في Python"""
+    today = timezone.localdate()
+    upcoming = {((today + timedelta(days=i)).month, (today + timedelta(days=i)).day) for i in range(days)}
+    return sum(
+        1 for dob in Customer.objects.filter(accepts_marketing=True, date_of_birth__isnull=False)
+        .values_list('date_of_birth', flat=True).iterator(chunk_size=5000)
+        if (dob.month, dob.day) in upcoming
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('db_name')
+    parser.add_argument('--days', type=int, default=7)
+    args = parser.parse_args()
+    segment = {'birthday_within_days': args.days}
+
+    with using_tenant(args.db_name) as using:
+        tenant_id = get_current_tenant_id()
+        print(f"customers: {Customer.objects.count()}")
+        timed("python: iterate all customers", lambda: python_birthdays(args.days))
+        timed("sql: indexed birthday count", lambda: segment_queryset(segment, using).count())
+        timed("cached count (first call)", lambda: segment_count(segment, using, tenant_id))
+        timed("cached count (second call)", lambda: segment_count(segment, using, tenant_id))
+        timed("stream contacts (server-side cursor)", lambda: sum(
+            len(chunk) for chunk in stream_contacts(segment, using=using)
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+# scripts/bench_tenancy_modes.py - مقارنة أوضاع العملاء: قاعدة مستقلة، schema، جداول مشتركة
+# يمر على العملاء بالتناوب (مثل طلبات حقيقية من عملاء مختلفين) ويقيس:
+# - زمن "الطلب" (تحديد العميل + استعلام بسيط على جدول المنتجات)
+# - عدد الاتصالات المفتوحة على الخادم
+# - أقصى ذاكرة للعملية (RSS)
+#
+# التشغيل (بعد إنشاء العملاء بكل وضع):
+#   python scripts/bench_tenancy_modes.py --mode database --tenants 1000
+#   python scripts/bench_tenancy_modes.py --mode schema --tenants 1000
+#   python scripts/bench_tenancy_modes.py --mode shared --tenants 10000
+import argparse
+import itertools
+import os
+import resource
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'opticsSaas.settings')
+
+import django
+django.setup()
+
+from django.db import connections
+
+from core.models import Tenant
+from core.tenant_context import using_tenant
+from tenant.models import Product
+
+
+def server_connections():
+    with connections['default'].cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM pg_stat_activity WHERE usename = current_user")
+        return cursor.fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--mode', choices=['database', 'schema', 'shared'], required=True)
+    parser.add_argument('--tenants', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=20000)
+    args = parser.parse_args()
+
+    tenants = list(Tenant.objects.filter(placement=args.mode).order_by('id')[:args.tenants])
+    if not tenants:
+        sys.exit(f"لا يوجد عملاء بوضع {args.mode}")
+
+    latencies = []
+    peak_connections = 0
+    for index, tenant in enumerate(itertools.islice(itertools.cycle(tenants), args.requests)):
+        started = time.perf_counter()
+        with using_tenant(tenant):
+            Product.objects.filter(is_active=True).exists()
+        latencies.append(time.perf_counter() - started)
+        if index % 1000 == 0:
+            peak_connections = max(peak_connections, server_connections())
+
+    latencies.sort()
+    print(f"mode:              {args.mode} ({len(tenants)} tenants)")
+    print(f"median ms:         {latencies[len(latencies) // 2] * 1000:.2f}")
+    print(f"p99 ms:            {latencies[int(len(latencies) * 0.99) - 1] * 1000:.2f}")
+    print(f"peak connections:  {peak_connections}")
+    print(f"peak RSS MB:       {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f}")
+
+
+if __name__ == '__main__':
+    main()
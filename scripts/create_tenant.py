@@ -1,9 +1,10 @@
 import os
 import django
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'optica_saas.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'opticsSaas.settings')
 django.setup()
 
 from core.models import Tenant
+from core.tenant_connections import tenant_connections
 from django.db import connections
 from django.core.management import call_command
 
@@ -19,6 +20,7 @@ def create_tenant(name, subdomain):
     with connections['default'].cursor() as cursor:
         cursor.execute(f"CREATE DATABASE {db_name};")
 
+    tenant_connections.register(db_name)
     call_command('migrate', database=db_name)
     print(f"[✔] Tenant '{name}' created with DB: {db_name}")
 
@@ -0,0 +1,76 @@
+# scripts/load_test_asgi.py - اختبار حمل لمسار ASGI (طلبات/ثانية و p99)
+#
+# تشغيل الخادم مرتين، مرة بكل نسخة من الـ middleware:
+#   TENANT_MIDDLEWARE=middleware.tenant_middleware.SyncTenantMiddleware \
+#       uvicorn opticsSaas.asgi:application --port 8000
+#   uvicorn opticsSaas.asgi:application --port 8000
+#
+# ثم في كل مرة:
+#   python scripts/load_test_asgi.py --host vision.localhost --concurrency 100 --duration 30
+import argparse
+import asyncio
+import statistics
+import time
+
+
+async def worker(args, deadline, latencies, errors):
+    reader, writer = await asyncio.open_connection(args.address, args.port)
+    request = (
+        f"GET {args.path} HTTP/1.1\r\n"
+        f"Host: {args.host}\r\n"
+        f"Connection: keep-alive\r\n\r\n"
+    ).encode()
+    try:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+
+            status_line = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                name, _, value = line.decode().partition(':')
+                if name.lower() == 'content-length':
+                    length = int(value)
+            await reader.readexactly(length)
+
+            if b' 200 ' not in status_line:
+                errors.append(status_line)
+            latencies.append(time.perf_counter() - started)
+    finally:
+        writer.close()
+
+
+async def run(args):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + args.duration
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        worker(args, deadline, latencies, errors) for _ in range(args.concurrency)
+    ])
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0
+    print(f"requests:   {len(latencies)} ({len(errors)} errors)")
+    print(f"req/sec:    {len(latencies) / elapsed:.0f}")
+    print(f"median ms:  {statistics.median(latencies) * 1000:.2f}")
+    print(f"p99 ms:     {p99 * 1000:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--address', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--host', default='vision.localhost', help="Host header (يحدد العميل)")
+    parser.add_argument('--path', default='/api/health/')
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=30)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,265 @@
+# tenant/analytics.py - جداول تجميع المبيعات: تحديث تدريجي واختيار أنسب جدول للاستعلام
+# التحديث: الطلبات التي تغير updated_at لها منذ آخر تشغيل تحدد الأيام المتأثرة،
+# وتُعاد حساب هذه الأيام فقط (ثم شهورها) بدل إعادة تجميع كل السجل
+# - حفظ عنصر طلب أو حذفه يحدّث updated_at للطلب (tenant/signals.py)
+# - ما لا يمر بـ save() لا يُكتشف: حذف طلب، update() على الطلبات أو عناصرها، SQL مباشر؛
+#   لذلك يُشغَّل refresh_sales_rollups --full دورياً (ليلياً مثلاً) بجانب التشغيل التدريجي
+# الاستعلام: أخشن جدول يحتوي الأبعاد والمقاييس المطلوبة وتتوافق حدود فترته،
+# وإن لم يوجد يُجمَّع من Order/OrderItem مباشرة
+from datetime import datetime, time, timedelta
+
+from django.db import router, transaction
+from django.db.models import Count, DateField, F, Max, Sum
+from django.db.models.functions import Trunc, TruncDate, TruncMonth
+from django.utils import timezone
+
+from .models import DailyProductSales, DailySales, MonthlySales, Order, OrderItem, RollupWatermark
+
+WATERMARK = 'sales'
+# الطلبات التي تُثبَّت بعد تشغيل سابق بـ updated_at أقدم قليلاً تُعالج مرة أخرى (إعادة الحساب آمنة)
+# يغطي فقط الفرق بين وقت الحفظ ووقت الـ commit، وليس التعديلات التي لا تغير updated_at
+OVERLAP = timedelta(minutes=5)
+DAY_BATCH = 31
+BATCH_SIZE = 1000
+
+ORDER_METRICS = ('order_count', 'total_amount', 'tax_amount', 'discount_amount')
+PRODUCT_METRICS = ('order_count', 'quantity', 'revenue')
+GRANULARITIES = ['day', 'week', 'month', 'quarter', 'year', 'total']
+# الفترات التي يمكن حسابها من جدول بدقة معينة
+ANSWERABLE = {
+    'day': set(GRANULARITIES),
+    'month': {'month', 'quarter', 'year', 'total'},
+}
+
+
+def _day_bounds(first, last):
+    """حدود datetime (بتوقيت الإعدادات) من بداية first حتى نهاية last"""
+    start = timezone.make_aware(datetime.combine(first, time.min))
+    end = timezone.make_aware(datetime.combine(last + timedelta(days=1), time.min))
+    return start, end
+
+
+def _order_aggregates():
+    return {
+        'order_count': Count('id'),
+        'total_amount': Sum('total_amount'),
+        'tax_amount': Sum('tax_amount'),
+        'discount_amount': Sum('discount_amount'),
+    }
+
+
+def _aggregate(queryset, group, aggregates):
+    """
+    values(*group).annotate(...) مع أسماء مؤقتة (Django يرفض annotation باسم حقل موجود
+    مثل total_amount) ثم إرجاع الصفوف بالأسماء الأصلية
+    """
+    rows = queryset.values(*group).annotate(
+        **{f"agg_{name}": aggregate for name, aggregate in aggregates.items()}
+    )
+    for row in rows:
+        yield {key[4:] if key.startswith('agg_') else key: value for key, value in row.items()}
+
+
+def rebuild_days(days, using):
+    """إعادة حساب DailySales و DailyProductSales لأيام محددة"""
+    start, end = _day_bounds(min(days), max(days))
+    orders = (
+        Order.objects.using(using)
+        .filter(created_at__gte=start, created_at__lt=end)
+        .exclude(status='cancelled')
+        .annotate(day=TruncDate('created_at'))
+        .filter(day__in=days)
+    )
+    items = (
+        OrderItem.objects.using(using)
+        .filter(order__created_at__gte=start, order__created_at__lt=end)
+        .exclude(order__status='cancelled')
+        .annotate(day=TruncDate('order__created_at'))
+        .filter(day__in=days)
+    )
+
+    with transaction.atomic(using=using):
+        DailySales.objects.using(using).filter(day__in=days).delete()
+        DailySales.objects.using(using).bulk_create(
+            [
+                DailySales(day=row.pop('day'), sales_person_id=row.pop('sales_person'), **row)
+                for row in _aggregate(orders.order_by(), ['day', 'sales_person'], _order_aggregates())
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+        DailyProductSales.objects.using(using).filter(day__in=days).delete()
+        DailyProductSales.objects.using(using).bulk_create(
+            [
+                DailyProductSales(
+                    day=row['day'], product_id=row['product'],
+                    brand_id=row['product__brand'], category_id=row['product__category'],
+                    order_count=row['order_count'], quantity=row['quantity'], revenue=row['revenue'],
+                )
+                for row in _aggregate(items.order_by(), ['day', 'product', 'product__brand', 'product__category'], {
+                    'order_count': Count('order', distinct=True),
+                    'quantity': Sum('quantity'),
+                    'revenue': Sum('total_price'),
+                })
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+
+def rebuild_months(months, using):
+    """MonthlySales من DailySales للشهور المتأثرة (months = أول يوم في كل شهر)"""
+    last_month = max(months)
+    next_month = (last_month + timedelta(days=32)).replace(day=1)
+    daily = (
+        DailySales.objects.using(using)
+        .filter(day__gte=min(months), day__lt=next_month)
+        .annotate(month=TruncMonth('day'))
+        .filter(month__in=months)
+    )
+    with transaction.atomic(using=using):
+        MonthlySales.objects.using(using).filter(month__in=months).delete()
+        MonthlySales.objects.using(using).bulk_create(
+            [
+                MonthlySales(month=row.pop('month'), sales_person_id=row.pop('sales_person'), **row)
+                for row in _aggregate(daily.order_by(), ['month', 'sales_person'], {
+                    name: Sum(name) for name in ORDER_METRICS
+                })
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+
+def drop_stale_rollups(days, months, using):
+    """
+    حذف صفوف التجميع للأيام والشهور التي لم يعد فيها أي طلب (حُذفت كل طلباتها):
+    الأيام المعاد حسابها تأتي من الطلبات الموجودة فقط، فلا تشمل هذه الأيام أبداً
+    """
+    with transaction.atomic(using=using):
+        DailySales.objects.using(using).exclude(day__in=days).delete()
+        DailyProductSales.objects.using(using).exclude(day__in=days).delete()
+        MonthlySales.objects.using(using).exclude(month__in=months).delete()
+
+
+def refresh_rollups(using=None, full=False):
+    """
+    تحديث جداول التجميع من الطلبات المعدلة منذ آخر تشغيل، ويرجع عدد الأيام المعاد حسابها
+    full=True يعيد حساب كل الأيام: للتشغيل الدوري الذي يلتقط الحذف والتعديل بـ update()
+    """
+    using = using or router.db_for_write(DailySales)
+    watermark = RollupWatermark.objects.using(using).filter(name=WATERMARK).first()
+    changed = Order.objects.using(using)
+    if watermark and not full:
+        changed = changed.filter(updated_at__gt=watermark.updated_at - OVERLAP)
+
+    latest = changed.aggregate(latest=Max('updated_at'))['latest']
+    if latest is None:
+        if full:
+            drop_stale_rollups([], [], using)
+        return 0
+    days = sorted(
+        changed.filter(updated_at__lte=latest)
+        .annotate(day=TruncDate('created_at'))
+        .order_by()
+        .values_list('day', flat=True)
+        .distinct()
+    )
+    for start in range(0, len(days), DAY_BATCH):
+        rebuild_days(days[start:start + DAY_BATCH], using)
+    months = sorted({day.replace(day=1) for day in days})
+    for start in range(0, len(months), DAY_BATCH):
+        rebuild_months(months[start:start + DAY_BATCH], using)
+    if full:
+        drop_stale_rollups(days, months, using)
+
+    RollupWatermark.objects.using(using).update_or_create(name=WATERMARK, defaults={'updated_at': latest})
+    return len(days)
+
+
+class Source:
+    """مصدر يمكنه الإجابة عن تقرير: جدول تجميع أو الجداول الأصلية"""
+
+    def __init__(self, name, model, date_field, grain, dimensions, metrics, raw=False):
+        self.name = name
+        self.model = model
+        self.date_field = date_field
+        self.grain = grain
+        self.dimensions = dimensions  # اسم البعد في التقرير -> الحقل
+        self.metrics = metrics  # اسم المقياس -> تجميع
+        self.raw = raw
+
+    def answers(self, start, end, metrics, group_by, granularity):
+        if not set(metrics) <= set(self.metrics) or not set(group_by) <= set(self.dimensions):
+            return False
+        if granularity not in ANSWERABLE[self.grain]:
+            return False
+        if self.grain == 'month':
+            # الفترة يجب أن تبدأ أول الشهر وتنتهي آخره
+            return start.day == 1 and (end + timedelta(days=1)).day == 1
+        return True
+
+    def report(self, start, end, metrics, group_by, granularity, using):
+        queryset = self.model.objects.using(using)
+        if self.raw:
+            range_start, range_end = _day_bounds(start, end)
+            queryset = queryset.filter(**{
+                f"{self.date_field}__gte": range_start, f"{self.date_field}__lt": range_end,
+            }).exclude(**{self.cancelled_lookup: 'cancelled'})
+        else:
+            queryset = queryset.filter(**{f"{self.date_field}__range": (start, end)})
+
+        fields = {name: self.dimensions[name] for name in group_by}
+        annotations = {f"dim_{name}": F(field) for name, field in fields.items()}
+        group = list(annotations)
+        if granularity != 'total':
+            annotations['period'] = Trunc(self.date_field, granularity, output_field=DateField())
+            group.insert(0, 'period')
+        rows = _aggregate(
+            queryset.annotate(**annotations).order_by(*group), group,
+            {name: self.metrics[name] for name in metrics},
+        )
+        return [
+            {key[4:] if key.startswith('dim_') else key: value for key, value in row.items()}
+            for row in rows
+        ]
+
+    @property
+    def cancelled_lookup(self):
+        return 'status' if self.model is Order else 'order__status'
+
+
+# من الأخشن للأدق؛ الجداول الأصلية في النهاية
+SOURCES = [
+    Source('monthly_sales', MonthlySales, 'month', 'month', {'sales_person': 'sales_person'}, {
+        'order_count': Sum('order_count'), 'total_amount': Sum('total_amount'),
+        'tax_amount': Sum('tax_amount'), 'discount_amount': Sum('discount_amount'),
+    }),
+    Source('daily_sales', DailySales, 'day', 'day', {'sales_person': 'sales_person'}, {
+        'order_count': Sum('order_count'), 'total_amount': Sum('total_amount'),
+        'tax_amount': Sum('tax_amount'), 'discount_amount': Sum('discount_amount'),
+    }),
+    Source('daily_product_sales', DailyProductSales, 'day', 'day', {
+        'product': 'product', 'brand': 'brand', 'category': 'category',
+    }, {
+        'order_count': Sum('order_count'), 'quantity': Sum('quantity'), 'revenue': Sum('revenue'),
+    }),
+    Source('orders', Order, 'created_at', 'day', {'sales_person': 'sales_person'}, _order_aggregates(), raw=True),
+    Source('order_items', OrderItem, 'order__created_at', 'day', {
+        'sales_person': 'order__sales_person', 'product': 'product',
+        'brand': 'product__brand', 'category': 'product__category',
+    }, {
+        'order_count': Count('order', distinct=True), 'quantity': Sum('quantity'), 'revenue': Sum('total_price'),
+    }, raw=True),
+]
+
+
+def sales_report(start, end, metrics=('total_amount',), group_by=(), granularity='day', using=None):
+    """
+    مجاميع المبيعات بين start و end (تاريخان، شاملان)، ويرجع (اسم المصدر، الصفوف)
+    كل صف: period (إلا مع granularity='total') + الأبعاد + المقاييس
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"unknown granularity: {granularity}")
+    for source in SOURCES:
+        if source.answers(start, end, metrics, group_by, granularity):
+            return source.name, source.report(start, end, metrics, group_by, granularity, using)
+    raise ValueError(f"no source for metrics {list(metrics)} grouped by {list(group_by)}")
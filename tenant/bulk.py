@@ -0,0 +1,207 @@
+# bulk.py - إدخال الطلبات دفعة واحدة (مزامنة نقاط البيع غير المتصلة)
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+
+from django.db import connections, router, transaction
+from django.db.models import F
+
+from core.tenant_context import get_current_tenant_id
+
+from .customer360 import record_orders
+from .models import (
+    Customer, LensType, Order, OrderItem, PrescriptionRecord, Product, ProductVariant, Stock, StockMovement,
+)
+from .sequences import order_numbers
+
+BATCH_SIZE = 1000
+
+ORDER_FIELDS = [
+    'status', 'payment_status', 'subtotal', 'tax_amount', 'discount_amount',
+    'total_amount', 'paid_amount', 'notes', 'internal_notes', 'sales_person_id',
+]
+# المراجع التي يجب أن تخص العميل الحالي (TenantManager يصفي بالعميل في الجداول المشتركة)
+ITEM_REFERENCES = {
+    'product_id': Product,
+    'variant_id': ProductVariant,
+    'lens_type_id': LensType,
+    'prescription_id': PrescriptionRecord,
+}
+
+
+def ingest_orders(orders, created_by, using=None):
+    """
+    إدخال مجموعة طلبات مع عناصرها وتحديث المخزون في transaction واحدة:
+    0. التحقق من المدخلات ومن أن العملاء والمنتجات تخص العميل الحالي (ValueError قبل أي كتابة)
+    1. حجز أرقام الطلبات كمجموعة واحدة من العداد اليومي
+    2. bulk_create للطلبات ثم لعناصرها
+    3. تجميع الكميات لكل منتج وخصمها من Stock بجملة UPDATE واحدة
+       (ValueError وإلغاء الدفعة كلها إذا كان المخزون سيصبح سالباً)
+    4. bulk_create لحركات المخزون (حركة خروج لكل عنصر)
+
+    كل طلب عبارة عن dict يحتوي customer_id و items وحقول Order الاختيارية،
+    وكل عنصر يحتوي product_id و quantity و unit_price
+    """
+    using = using or router.db_for_write(Order)
+    orders = _parse_orders(orders)
+    if not orders:
+        return {'orders': 0, 'items': 0, 'products': 0}
+    _check_references(orders, using)
+
+    with transaction.atomic(using=using):
+        numbers = order_numbers.allocate_block(len(orders), using=using)
+
+        order_objs = []
+        for data, number in zip(orders, numbers):
+            order = Order(order_number=number, customer_id=data['customer_id'])
+            for field in ORDER_FIELDS:
+                if field in data:
+                    setattr(order, field, data[field])
+            order_objs.append(order)
+        Order.objects.using(using).bulk_create(order_objs, batch_size=BATCH_SIZE)
+        # bulk_create لا يطلق إشارات Order، لذلك يُحدَّث ملخص العملاء هنا
+        record_orders(order_objs, using)
+
+        item_objs, movement_objs = [], []
+        deltas = Counter()
+        for data, order in zip(orders, order_objs):
+            for item in data['items']:
+                product_id, quantity, unit_price = item['product_id'], item['quantity'], item['unit_price']
+                item_objs.append(OrderItem(
+                    order=order,
+                    product_id=product_id,
+                    variant_id=item.get('variant_id'),
+                    lens_type_id=item.get('lens_type_id'),
+                    prescription_id=item.get('prescription_id'),
+                    quantity=quantity,
+                    unit_price=unit_price,
+                    total_price=item.get('total_price', unit_price * quantity),
+                ))
+                movement_objs.append(StockMovement(
+                    product_id=product_id,
+                    movement_type='out',
+                    quantity=quantity,
+                    reference_number=order.order_number,
+                    created_by=created_by,
+                ))
+                deltas[product_id] += quantity
+        OrderItem.objects.using(using).bulk_create(item_objs, batch_size=BATCH_SIZE)
+
+        apply_stock_deltas(deltas, using)
+        StockMovement.objects.using(using).bulk_create(movement_objs, batch_size=BATCH_SIZE)
+
+    return {'orders': len(order_objs), 'items': len(item_objs), 'products': len(deltas)}
+
+
+def _integer(value, label):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{label} غير صالح: {value!r}")
+
+
+def _parse_orders(orders):
+    """
+    التحقق من شكل الدفعة قبل أي كتابة: ValueError لأي طلب أو عنصر ناقص أو غير صالح
+    ويرجع نسخة بمعرفات وكميات وأسعار محولة لأنواعها
+    """
+    if not isinstance(orders, list):
+        raise ValueError("orders يجب أن تكون قائمة")
+    parsed = []
+    for data in orders:
+        if not isinstance(data, dict) or not isinstance(data.get('items'), list):
+            raise ValueError(f"طلب غير صالح: {data!r}")
+        parsed.append(dict(
+            data,
+            customer_id=_integer(data.get('customer_id'), 'customer_id'),
+            items=[_parse_item(item) for item in data['items']],
+        ))
+    return parsed
+
+
+def _parse_item(item):
+    if not isinstance(item, dict):
+        raise ValueError(f"عنصر غير صالح: {item!r}")
+    product_id = _integer(item.get('product_id'), 'product_id')
+    quantity = _integer(item.get('quantity', 1), 'quantity')
+    if quantity < 1:
+        raise ValueError(f"كمية غير صالحة للمنتج {product_id}: {quantity}")
+    try:
+        unit_price = Decimal(str(item['unit_price']))
+    except (KeyError, InvalidOperation):
+        raise ValueError(f"سعر غير صالح للمنتج {product_id}: {item.get('unit_price')!r}")
+    item = dict(item, product_id=product_id, quantity=quantity, unit_price=unit_price)
+    for field in ITEM_REFERENCES:
+        if item.get(field) is not None:
+            item[field] = _integer(item[field], field)
+    return item
+
+
+def _check_references(orders, using):
+    """كل العملاء والمنتجات (وباقي المراجع) يجب أن تخص العميل الحالي، وإلا ValueError قبل الإدخال"""
+    wanted = {Customer: {data['customer_id'] for data in orders}}
+    for data in orders:
+        for item in data['items']:
+            for field, model in ITEM_REFERENCES.items():
+                if item.get(field) is not None:
+                    wanted.setdefault(model, set()).add(item[field])
+    for model, ids in wanted.items():
+        found = set(model.objects.using(using).filter(pk__in=ids).values_list('pk', flat=True))
+        missing = ids - found
+        if missing:
+            raise ValueError(f"{model.__name__} غير موجود لدى العميل: {sorted(missing)}")
+
+
+def apply_stock_deltas(deltas, using):
+    """
+    خصم الكميات المجمعة من Stock (يتم إنشاء صفوف المخزون الناقصة أولاً)
+    الخصم مشروط بكفاية الكمية في نفس جملة UPDATE، فلا يمكن لطلبين متزامنين
+    تجاوز المخزون؛ أي منتج لا يكفي مخزونه يرفع ValueError (والـ transaction تُلغى)
+    """
+    product_ids = list(deltas)
+    existing = set(
+        Stock.objects.using(using)
+        .filter(product_id__in=product_ids)
+        .values_list('product_id', flat=True)
+    )
+    Stock.objects.using(using).bulk_create(
+        [Stock(product_id=pk) for pk in product_ids if pk not in existing],
+        batch_size=BATCH_SIZE, ignore_conflicts=True,
+    )
+
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        short = [
+            product_id for product_id, quantity in deltas.items()
+            if not Stock.objects.using(using)
+            .filter(product_id=product_id, quantity_on_hand__gte=quantity)
+            .update(quantity_on_hand=F('quantity_on_hand') - quantity)
+        ]
+        _check_shortage(short)
+        return
+
+    # PostgreSQL: جملة UPDATE ... FROM (VALUES ...) واحدة لكل دفعة منتجات
+    # SQL مباشر لا يمر بـ TenantManager، لذلك تُضاف تصفية العميل صراحة (الجداول المشتركة)
+    table = connection.ops.quote_name(Stock._meta.db_table)
+    tenant_id = get_current_tenant_id()
+    tenant_filter, tenant_params = ("AND s.tenant_id = %s ", [tenant_id]) if tenant_id is not None else ("", [])
+    items = list(deltas.items())
+    updated = set()
+    with connection.cursor() as cursor:
+        for start in range(0, len(items), BATCH_SIZE):
+            chunk = items[start:start + BATCH_SIZE]
+            values = ', '.join(['(%s, %s)'] * len(chunk))
+            cursor.execute(
+                f"UPDATE {table} AS s "
+                f"SET quantity_on_hand = s.quantity_on_hand - d.quantity, last_updated = NOW() "
+                f"FROM (VALUES {values}) AS d (product_id, quantity) "
+                f"WHERE s.product_id = d.product_id AND s.quantity_on_hand >= d.quantity {tenant_filter}"
+                f"RETURNING s.product_id",
+                [value for pair in chunk for value in pair] + tenant_params,
+            )
+            updated.update(row[0] for row in cursor.fetchall())
+    _check_shortage([product_id for product_id in deltas if product_id not in updated])
+
+
+def _check_shortage(product_ids):
+    if product_ids:
+        raise ValueError(f"المخزون غير كافٍ للمنتجات: {sorted(product_ids)}")
@@ -0,0 +1,74 @@
+# tenant/catalog.py - قراءة الكتالوج بصفحات keyset وتصدير كامل بذاكرة ثابتة
+# الصفحات مرتبة بـ (created_at, id) تنازلياً، والمؤشر آخر قيمة في الصفحة السابقة
+# لذلك تكلفة أي صفحة ثابتة مهما كان عمقها (بدون OFFSET)
+import base64
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .models import Product
+
+CATALOG_FIELDS = (
+    'id', 'sku', 'name', 'brand_id', 'category_id', 'frame_shape', 'frame_color',
+    'gender', 'effective_price', 'is_featured', 'created_at',
+)
+EXPORT_CHUNK_SIZE = 2000
+
+
+def encode_cursor(row):
+    value = f"{row['created_at'].isoformat()}|{row['id']}"
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_cursor(cursor):
+    created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit('|', 1)
+    created_at = parse_datetime(created_at)
+    if created_at is None:
+        raise ValueError(f"invalid cursor: {cursor}")
+    return created_at, int(pk)
+
+
+def catalog_queryset(using=None):
+    queryset = Product.objects.filter(is_active=True)
+    if using:
+        queryset = queryset.using(using)
+    return queryset.order_by('-created_at', '-id').values(*CATALOG_FIELDS)
+
+
+def catalog_page(cursor=None, limit=50, using=None):
+    """صفحة من الكتالوج ومؤشر الصفحة التالية (None في آخر صفحة)"""
+    queryset = catalog_queryset(using)
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+    rows = list(queryset[:limit + 1])
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def export_catalog(fmt='ndjson', using=None):
+    """
+    الكتالوج كاملاً كنص متدفق (NDJSON سطر لكل منتج أو مصفوفة JSON)
+    iterator() يقرأ من server-side cursor على دفعات بدون إنشاء كائنات Product
+    الاستجابة تُقرأ بعد خروج الطلب من TenantMiddleware، لذلك يُبنى الـ queryset
+    هنا (تصفية العميل) مع using صريح بدل الاعتماد على السياق وقت القراءة
+    """
+    rows = catalog_queryset(using).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    return _stream_ndjson(rows) if fmt == 'ndjson' else _stream_json(rows)
+
+
+def _stream_ndjson(rows):
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode(row) + '\n'
+
+
+def _stream_json(rows):
+    encoder = DjangoJSONEncoder()
+    yield '['
+    separator = ''
+    for row in rows:
+        yield separator + encoder.encode(row)
+        separator = ',\n'
+    yield ']\n'
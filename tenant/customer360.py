@@ -0,0 +1,176 @@
+# tenant/customer360.py - تحديث ملخص العميل (CustomerSummary) تدريجياً
+# كل طلب يساهم في الملخص بـ (عدد، قيمة، رصيد مفتوح)؛ عند حفظه أو حذفه يُطبَّق
+# الفرق بين مساهمته القديمة والجديدة بـ F() بدل إعادة تجميع كل طلبات العميل
+import json
+from collections import defaultdict
+from decimal import Decimal
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Case, Count, DecimalField, F, Max, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import CustomerSummary, Order, PrescriptionRecord
+
+BATCH_SIZE = 1000
+ZERO = Decimal('0')
+
+PRESCRIPTION_FIELDS = (
+    'id', 'prescription_date', 'right_sphere', 'right_cylinder', 'right_axis',
+    'left_sphere', 'left_cylinder', 'left_axis', 'pupillary_distance', 'doctor_name',
+)
+
+
+def order_contribution(status, payment_status, total_amount, paid_amount):
+    """(عدد، قيمة، رصيد مفتوح) الذي يضيفه الطلب للملخص"""
+    if status == 'cancelled':
+        return 0, ZERO, ZERO
+    open_balance = ZERO if payment_status == 'refunded' else total_amount - paid_amount
+    return 1, total_amount, open_balance
+
+
+def contribution_of(order):
+    return order_contribution(order.status, order.payment_status, order.total_amount, order.paid_amount)
+
+
+def ensure_summaries(customer_ids, using):
+    CustomerSummary.objects.using(using).bulk_create(
+        [CustomerSummary(customer_id=pk) for pk in customer_ids],
+        batch_size=BATCH_SIZE, ignore_conflicts=True,
+    )
+
+
+def apply_order_deltas(deltas, using, create=True):
+    """
+    deltas: {customer_id: [عدد، قيمة، رصيد، آخر زيارة]} (الناتج من جمع مساهمات الطلبات)
+    صف UPDATE واحد لكل عميل، والعميل الذي لا يملك ملخصاً يُنشأ له أولاً
+    (create=False عند الحذف: قد يكون العميل نفسه في طريقه للحذف)
+    """
+    if create:
+        ensure_summaries(list(deltas), using)
+    for customer_id, (count, value, balance, visit) in deltas.items():
+        updates = {
+            'order_count': F('order_count') + count,
+            'lifetime_value': F('lifetime_value') + value,
+            'open_balance': F('open_balance') + balance,
+        }
+        if visit is not None:
+            updates['last_visit'] = Greatest(Coalesce('last_visit', Value(visit)), Value(visit))
+        CustomerSummary.objects.using(using).filter(customer_id=customer_id).update(**updates)
+
+
+def record_orders(orders, using):
+    """إضافة طلبات جديدة للملخص (مستخدمة بعد bulk_create في ingest_orders)"""
+    deltas = defaultdict(lambda: [0, ZERO, ZERO, None])
+    for order in orders:
+        delta = deltas[order.customer_id]
+        count, value, balance = contribution_of(order)
+        delta[0] += count
+        delta[1] += value
+        delta[2] += balance
+        if delta[3] is None or order.created_at > delta[3]:
+            delta[3] = order.created_at
+    apply_order_deltas(deltas, using)
+
+
+def record_order_change(order, previous, using):
+    """
+    تطبيق الفرق بين حالة الطلب قبل الحفظ (previous من pre_save أو None لطلب جديد)
+    وبعده (order أو None عند الحذف)
+    """
+    deltas = defaultdict(lambda: [0, ZERO, ZERO, None])
+    if previous:
+        count, value, balance = order_contribution(
+            previous['status'], previous['payment_status'], previous['total_amount'], previous['paid_amount']
+        )
+        delta = deltas[previous['customer_id']]
+        delta[0] -= count
+        delta[1] -= value
+        delta[2] -= balance
+    if order is not None:
+        count, value, balance = contribution_of(order)
+        delta = deltas[order.customer_id]
+        delta[0] += count
+        delta[1] += value
+        delta[2] += balance
+        delta[3] = order.created_at
+    apply_order_deltas({pk: delta for pk, delta in deltas.items() if any(delta)}, using, create=order is not None)
+
+
+def prescription_snapshot(values):
+    """قيم الوصفة بصيغة JSON (Decimal والتاريخ كنصوص)"""
+    return json.loads(json.dumps(values, cls=DjangoJSONEncoder))
+
+
+def refresh_prescription(customer_id, using, create=True):
+    """نسخ الوصفة الحالية للملخص (استعلام واحد عبر الفهرس الجزئي)"""
+    values = (
+        PrescriptionRecord.objects.using(using).active()
+        .filter(customer_id=customer_id)
+        .order_by('-prescription_date', '-id')
+        .values(*PRESCRIPTION_FIELDS)
+        .first()
+    )
+    if create:
+        ensure_summaries([customer_id], using)
+    CustomerSummary.objects.using(using).filter(customer_id=customer_id).update(
+        active_prescription_id=values['id'] if values else None,
+        prescription=prescription_snapshot(values) if values else None,
+    )
+
+
+def rebuild_summaries(customer_ids=None, using=None):
+    """
+    إعادة بناء الملخصات من الجداول الأصلية (للتعبئة الأولى أو تصحيح الانحراف)
+    التجميع يتم في قاعدة البيانات باستعلام واحد لكل الطلبات
+    """
+    orders = Order.objects.using(using).exclude(status='cancelled')
+    prescriptions = PrescriptionRecord.objects.using(using).active()
+    if customer_ids is not None:
+        orders = orders.filter(customer_id__in=customer_ids)
+        prescriptions = prescriptions.filter(customer_id__in=customer_ids)
+
+    remaining = Case(
+        When(payment_status='refunded', then=Value(ZERO)),
+        default=F('total_amount') - F('paid_amount'),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+    summaries = {
+        row['customer_id']: CustomerSummary(
+            customer_id=row['customer_id'],
+            order_count=row['order_count'],
+            lifetime_value=row['lifetime_value'],
+            open_balance=row['open_balance'],
+            last_visit=row['last_visit'],
+        )
+        for row in orders.order_by().values('customer_id').annotate(
+            order_count=Count('id'),
+            lifetime_value=Sum('total_amount'),
+            open_balance=Sum(remaining),
+            last_visit=Max('created_at'),
+        )
+    }
+
+    for customer_id in customer_ids or ():
+        summaries.setdefault(customer_id, CustomerSummary(customer_id=customer_id))
+
+    # أحدث وصفة نشطة لكل عميل: الترتيب يضع الأحدث أولاً ونأخذ أول صف لكل عميل
+    for values in prescriptions.order_by('customer_id', '-prescription_date', '-id').values(
+        'customer_id', *PRESCRIPTION_FIELDS
+    ).iterator(chunk_size=BATCH_SIZE):
+        customer_id = values.pop('customer_id')
+        summary = summaries.setdefault(customer_id, CustomerSummary(customer_id=customer_id))
+        if summary.active_prescription_id is None:
+            summary.active_prescription_id = values['id']
+            summary.prescription = prescription_snapshot(values)
+
+    CustomerSummary.objects.using(using).bulk_create(
+        summaries.values(),
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['customer'],
+        update_fields=[
+            'order_count', 'lifetime_value', 'open_balance', 'last_visit',
+            'active_prescription', 'prescription', 'updated_at',
+        ],
+    )
+    return len(summaries)
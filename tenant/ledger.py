@@ -0,0 +1,104 @@
+# ledger.py - دفتر المخزون: Stock مشتق من StockMovement بشكل تراكمي
+import datetime
+
+from django.conf import settings
+from django.db.models import (
+    Case, DecimalField, ExpressionWrapper, F, IntegerField, OuterRef, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Stock, StockCheckpoint, StockMovement
+
+# أثر الحركة على الكمية داخل SQL (مطابق لـ StockMovement.signed_quantity)
+SIGNED_QUANTITY = Case(
+    When(movement_type__in=StockMovement.SIGNED_TYPES, then=F('quantity')),
+    default=-F('quantity'),
+    output_field=IntegerField(),
+)
+
+COST_FIELD = DecimalField(max_digits=10, decimal_places=2)
+
+# أطول مدة متوقعة لـ transaction تضيف حركة مخزون: المعرّف يُحجز عند INSERT لكن
+# الصف لا يظهر إلا عند COMMIT، فحركة بمعرّف أقل من آخر معرّف ظاهر قد تكون ما زالت مفتوحة
+RECONCILE_LAG = datetime.timedelta(seconds=getattr(settings, 'STOCK_RECONCILE_LAG_SECONDS', 300))
+
+
+def apply_movement(movement, using):
+    """
+    تطبيق حركة واحدة على Stock بجملة UPDATE ذرّية (بدون قراءة ثم كتابة)
+    حركات الدخول بتكلفة تحدّث متوسط التكلفة المتحرك
+    """
+    delta = movement.signed_quantity
+    updates = {
+        'quantity_on_hand': F('quantity_on_hand') + delta,
+        'last_updated': timezone.now(),
+    }
+    if movement.movement_type == 'in' and movement.unit_cost is not None and delta > 0:
+        cost = movement.unit_cost
+        updates['last_cost'] = Value(cost, output_field=COST_FIELD)
+        updates['average_cost'] = Case(
+            When(quantity_on_hand__lte=0, then=Value(cost, output_field=COST_FIELD)),
+            default=ExpressionWrapper(
+                (F('quantity_on_hand') * F('average_cost') + Value(delta * cost, output_field=COST_FIELD))
+                / (F('quantity_on_hand') + delta),
+                output_field=COST_FIELD,
+            ),
+        )
+
+    stock = Stock.objects.using(using).filter(product_id=movement.product_id)
+    if not stock.update(**updates):
+        Stock.objects.using(using).get_or_create(product_id=movement.product_id)
+        stock.update(**updates)
+
+
+def safe_movement_horizon(using, lag=RECONCILE_LAG):
+    """
+    آخر معرّف حركة يمكن اعتباره نهائياً: أحدث حركة أُنشئت قبل lag على الأقل
+    كل الحركات بمعرّف أقل منه بدأت قبلها فانتهت transaction الخاصة بها
+    (باستخدام Max('id') وحده تضيع حركة تُثبَّت لاحقاً بمعرّف أقل من النقطة المرجعية)
+    """
+    return (
+        StockMovement.objects.using(using)
+        .filter(created_at__lte=timezone.now() - lag)
+        .order_by('-id')
+        .values_list('id', flat=True)
+        .first()
+    ) or 0
+
+
+def reconcile(using, chunk_size=5000):
+    """
+    مقارنة Stock بالكمية المتوقعة من (النقطة المرجعية + الحركات بعدها)
+    يعمل كـ generator على cursor من جهة الخادم، فالذاكرة لا تعتمد على عدد الحركات
+    ينتج (product_id, quantity_on_hand, expected, recent, max_movement_id):
+    - expected: الكمية حتى max_movement_id (تُحفظ كنقطة مرجعية جديدة)
+    - recent: أثر الحركات بعد max_movement_id (الحديثة أو التي أضيفت أثناء المطابقة)
+    max_movement_id هو safe_movement_horizon وليس آخر معرّف موجود
+    """
+    max_movement_id = safe_movement_horizon(using)
+    checkpoint = StockCheckpoint.objects.using(using).filter(product=OuterRef('product'))
+    movements = StockMovement.objects.using(using).filter(product=OuterRef('product')).order_by()
+
+    def total(queryset):
+        return Coalesce(Subquery(
+            queryset.values('product').annotate(total=Sum(SIGNED_QUANTITY)).values('total'),
+            output_field=IntegerField(),
+        ), 0)
+
+    rows = (
+        Stock.objects.using(using)
+        .annotate(
+            expected=Coalesce(Subquery(checkpoint.values('quantity')[:1]), 0) + total(
+                movements.filter(
+                    id__gt=Coalesce(Subquery(checkpoint.values('movement_id')[:1]), 0),
+                    id__lte=max_movement_id,
+                )
+            ),
+            recent=total(movements.filter(id__gt=max_movement_id)),
+        )
+        .order_by('product_id')
+        .values_list('product_id', 'quantity_on_hand', 'expected', 'recent')
+    )
+    for product_id, on_hand, expected, recent in rows.iterator(chunk_size=chunk_size):
+        yield product_id, on_hand, expected, recent, max_movement_id
@@ -0,0 +1,134 @@
+# tenant/lens_matching.py - مطابقة دفعة وصفات مع العدسات والإطارات دفعة واحدة بـ NumPy
+# الوصفات والعدسات والإطارات تتحول إلى مصفوفات أعمدة، ثم:
+# - العدسات: مصفوفة منطقية (وصفة × نوع عدسة) بعملية broadcast واحدة
+# - الإطارات: مرتبة حسب PD الإطار، ولكل وصفة نطاق [start, stop) بـ searchsorted
+#   بدل مقارنة كل وصفة بكل إطار
+import numpy as np
+from django.conf import settings
+
+from .models import LensType, PrescriptionRecord, Product
+
+# الفرق المسموح بين PD المريض و PD الإطار (عرض العدسة + الجسر) بالمليمتر
+# ويضيق كلما زادت قوة الوصفة (مقسوماً على القوة / 4 فوق 4 ديوبتر)
+PD_TOLERANCE_MM = getattr(settings, 'LENS_PD_TOLERANCE_MM', 8.0)
+STRONG_POWER = 4.0
+
+PRESCRIPTION_FIELDS = (
+    'id', 'right_sphere', 'right_cylinder', 'left_sphere', 'left_cylinder', 'pupillary_distance',
+)
+
+
+def _columns(rows, count):
+    """قائمة صفوف -> مصفوفة float لكل عمود (None تصبح NaN)"""
+    if not rows:
+        return [np.empty(0) for _ in range(count)]
+    array = np.array(rows, dtype=float)
+    return [array[:, i] for i in range(count)]
+
+
+def prescription_arrays(queryset):
+    ids, r_sph, r_cyl, l_sph, l_cyl, pd = _columns(
+        list(queryset.values_list(*PRESCRIPTION_FIELDS)), len(PRESCRIPTION_FIELDS)
+    )
+    return {
+        'id': ids.astype(np.int64),
+        'right_sphere': r_sph, 'right_cylinder': r_cyl,
+        'left_sphere': l_sph, 'left_cylinder': l_cyl,
+        'pupillary_distance': pd,
+    }
+
+
+def lens_arrays(queryset=None):
+    queryset = LensType.objects.filter(is_active=True) if queryset is None else queryset
+    ids, min_sph, max_sph, max_cyl = _columns(
+        list(queryset.values_list('id', 'min_sphere', 'max_sphere', 'max_cylinder')), 4
+    )
+    return {'id': ids.astype(np.int64), 'min_sphere': min_sph, 'max_sphere': max_sph, 'max_cylinder': max_cyl}
+
+
+def frame_arrays(queryset=None):
+    queryset = Product.objects.filter(is_active=True) if queryset is None else queryset
+    ids, lens_width, bridge_width = _columns(
+        list(queryset.values_list('id', 'lens_width', 'bridge_width')), 3
+    )
+    return {'id': ids.astype(np.int64), 'frame_pd': lens_width + bridge_width}
+
+
+class MatchResult:
+    """نتيجة المطابقة: الوصفة رقم i تناسبها lens_ids[lens_mask[i]] و frame_ids[frame_start[i]:frame_stop[i]]"""
+
+    def __init__(self, prescription_ids, lens_ids, lens_mask, frame_ids, frame_start, frame_stop):
+        self.prescription_ids = prescription_ids
+        self.lens_ids = lens_ids
+        self.lens_mask = lens_mask
+        self.frame_ids = frame_ids
+        self.frame_start = frame_start
+        self.frame_stop = frame_stop
+
+    def __len__(self):
+        return len(self.prescription_ids)
+
+    def options(self, index):
+        return {
+            'prescription_id': int(self.prescription_ids[index]),
+            'lens_type_ids': self.lens_ids[self.lens_mask[index]].tolist(),
+            'frame_ids': self.frame_ids[self.frame_start[index]:self.frame_stop[index]].tolist(),
+        }
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.options(index)
+
+
+def _eye_fits(sphere, cylinder, lenses):
+    """(n, m): قوة خطي العين (sphere و sphere+cylinder) ضمن مدى كل عدسة"""
+    sphere = np.nan_to_num(sphere)[:, None]
+    cylinder = np.nan_to_num(cylinder)[:, None]
+    low = np.minimum(sphere, sphere + cylinder)
+    high = np.maximum(sphere, sphere + cylinder)
+    return (
+        (low >= lenses['min_sphere'][None, :])
+        & (high <= lenses['max_sphere'][None, :])
+        & (np.abs(cylinder) <= lenses['max_cylinder'][None, :])
+    )
+
+
+def match(prescriptions, lenses, frames, pd_tolerance=PD_TOLERANCE_MM):
+    """مطابقة كل الوصفات في تمريرة واحدة (المدخلات من prescription_arrays/lens_arrays/frame_arrays)"""
+    lens_mask = (
+        _eye_fits(prescriptions['right_sphere'], prescriptions['right_cylinder'], lenses)
+        & _eye_fits(prescriptions['left_sphere'], prescriptions['left_cylinder'], lenses)
+    )
+
+    # أقوى خط في العينين يحدد مدى الإزاحة المسموح
+    power = np.nanmax(np.abs(np.stack([
+        prescriptions['right_sphere'],
+        prescriptions['right_sphere'] + np.nan_to_num(prescriptions['right_cylinder']),
+        prescriptions['left_sphere'],
+        prescriptions['left_sphere'] + np.nan_to_num(prescriptions['left_cylinder']),
+        np.zeros(len(prescriptions['id'])),
+    ])), axis=0)
+    tolerance = pd_tolerance / np.maximum(1.0, power / STRONG_POWER)
+
+    order = np.argsort(frames['frame_pd'], kind='stable')
+    frame_pd = frames['frame_pd'][order]
+    pd = prescriptions['pupillary_distance']
+    frame_start = np.searchsorted(frame_pd, pd - tolerance, side='left')
+    frame_stop = np.searchsorted(frame_pd, pd + tolerance, side='right')
+    # بدون PD مسجل: كل الإطارات مناسبة
+    missing_pd = np.isnan(pd)
+    frame_start[missing_pd] = 0
+    frame_stop[missing_pd] = len(frame_pd)
+
+    return MatchResult(
+        prescriptions['id'], lenses['id'], lens_mask,
+        frames['id'][order], frame_start, frame_stop,
+    )
+
+
+def match_active_prescriptions(customer_ids=None):
+    """مطابقة الوصفات الحالية (عبر الفهرس الجزئي) مع كتالوج العميل الحالي"""
+    queryset = PrescriptionRecord.objects.active()
+    if customer_ids is not None:
+        queryset = queryset.filter(customer_id__in=customer_ids)
+    return match(prescription_arrays(queryset), lens_arrays(), frame_arrays())
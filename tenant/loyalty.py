@@ -0,0 +1,249 @@
+# tenant/loyalty.py - نقاط الولاء: سجل إضافة فقط ورصيد يتغير بـ F() في نفس الـ transaction
+# - الاكتساب: كل الطلبات المسلَّمة منذ آخر تشغيل في جملة SQL واحدة (PostgreSQL)
+# - الانتهاء: على دفعات مرتبة بالمفتاح حتى لا يُحمَّل العملاء أو السجل في الذاكرة
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Exists, F, Max, OuterRef
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core.tenant_context import get_current_tenant_id
+
+from .models import Customer, LoyaltyTransaction, Order
+from .segments import invalidate_counts
+
+POINTS_PER_UNIT = Decimal(str(getattr(settings, 'LOYALTY_POINTS_PER_UNIT', '0.1')))
+POINTS_TTL_DAYS = getattr(settings, 'LOYALTY_POINTS_TTL_DAYS', 365)
+# الطلبات المسلَّمة بتاريخ أقدم قليلاً من آخر تشغيل تُراجع مرة أخرى (القيد الفريد يمنع التكرار)
+ACCRUAL_OVERLAP = timedelta(days=1)
+CHUNK_SIZE = 5000
+
+
+def _using(using):
+    return using or router.db_for_write(LoyaltyTransaction)
+
+
+def _balances_changed(using):
+    """
+    الأرصدة تتغير بـ QuerySet.update() الذي لا يطلق إشارات Customer، لذلك تُبطل
+    أعداد شرائح التسويق (min_loyalty_points) هنا بعد تثبيت الـ transaction
+    """
+    tenant_id = get_current_tenant_id()
+    transaction.on_commit(lambda: invalidate_counts(using, tenant_id), using=using)
+
+
+def redeem(customer_id, points, order=None, using=None):
+    """خصم نقاط من العميل؛ UPDATE مشروط بالرصيد بدل قراءة الرصيد ثم كتابته"""
+    using = _using(using)
+    with transaction.atomic(using=using):
+        updated = Customer.objects.using(using).filter(pk=customer_id, loyalty_points__gte=points).update(
+            loyalty_points=F('loyalty_points') - points
+        )
+        if not updated:
+            raise ValueError(f"customer {customer_id}: not enough loyalty points for {points}")
+        _balances_changed(using)
+        return LoyaltyTransaction.objects.using(using).create(
+            customer_id=customer_id, kind='redemption', points=-points, order=order,
+        )
+
+
+def adjust(customer_id, points, note='', using=None):
+    """تعديل يدوي (موجب أو سالب)"""
+    using = _using(using)
+    with transaction.atomic(using=using):
+        Customer.objects.using(using).filter(pk=customer_id).update(loyalty_points=F('loyalty_points') + points)
+        _balances_changed(using)
+        return LoyaltyTransaction.objects.using(using).create(
+            customer_id=customer_id, kind='adjustment', points=points, note=note,
+        )
+
+
+def accrual_watermark(using):
+    """تاريخ تسليم آخر طلب اكتسب نقاطه (بداية التشغيل التالي)"""
+    last = LoyaltyTransaction.objects.using(using).filter(kind='accrual').aggregate(
+        last=Max('order__delivered_at')
+    )['last']
+    return last - ACCRUAL_OVERLAP if last else None
+
+
+def accrue_points(since=None, using=None):
+    """
+    نقاط كل الطلبات المسلَّمة منذ since (افتراضياً منذ آخر تشغيل)
+    يرجع (عدد الطلبات، مجموع النقاط)
+    """
+    using = _using(using)
+    since = since or accrual_watermark(using) or timezone.make_aware(datetime(2000, 1, 1))
+    if connections[using].vendor != 'postgresql':
+        return _accrue_points_chunked(since, using)
+
+    # INSERT ... SELECT من الطلبات ثم UPDATE للأرصدة من نفس الصفوف المُدخلة في جملة واحدة
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    ledger, orders, customers = (
+        quote(model._meta.db_table) for model in (LoyaltyTransaction, Order, Customer)
+    )
+    tenant_id = get_current_tenant_id()
+    tenant_filter = "AND o.tenant_id = %s" if tenant_id is not None else ""
+    params = [POINTS_PER_UNIT, POINTS_TTL_DAYS, since, POINTS_PER_UNIT]
+    if tenant_id is not None:
+        params.append(tenant_id)
+
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH inserted AS (
+                INSERT INTO {ledger}
+                    (tenant_id, customer_id, kind, points, order_id, expires_at, note, created_at)
+                SELECT o.tenant_id, o.customer_id, 'accrual', FLOOR(o.total_amount * %s)::integer, o.id,
+                       COALESCE(o.delivered_at, o.updated_at) + %s * INTERVAL '1 day', '', NOW()
+                FROM {orders} o
+                WHERE o.status = 'delivered'
+                  AND COALESCE(o.delivered_at, o.updated_at) >= %s
+                  AND FLOOR(o.total_amount * %s) > 0
+                  {tenant_filter}
+                ON CONFLICT (tenant_id, order_id) WHERE kind = 'accrual' DO NOTHING
+                RETURNING customer_id, points
+            ),
+            totals AS (
+                SELECT customer_id, SUM(points) AS points, COUNT(*) AS orders
+                FROM inserted GROUP BY customer_id
+            ),
+            updated AS (
+                UPDATE {customers} c SET loyalty_points = c.loyalty_points + t.points
+                FROM totals t WHERE c.id = t.customer_id
+                RETURNING t.orders, t.points
+            )
+            SELECT COALESCE(SUM(orders), 0), COALESCE(SUM(points), 0) FROM updated
+            """,
+            params,
+        )
+        orders_count, points = cursor.fetchone()
+        if points:
+            _balances_changed(using)
+    return int(orders_count), int(points)
+
+
+def _accrue_points_chunked(since, using):
+    """نفس accrue_points لقواعد غير PostgreSQL (SQLite في التطوير) على دفعات"""
+    already = LoyaltyTransaction.objects.using(using).filter(kind='accrual', order_id=OuterRef('pk'))
+    pending = (
+        Order.objects.using(using)
+        .annotate(delivered=Coalesce('delivered_at', 'updated_at'))
+        .filter(status='delivered', delivered__gte=since)
+        .filter(~Exists(already))
+        .order_by('pk')
+        .values('pk', 'customer_id', 'total_amount', 'delivered')
+    )
+    orders_count = total_points = 0
+    last_pk = 0
+    while True:
+        chunk = list(pending.filter(pk__gt=last_pk)[:CHUNK_SIZE])
+        if not chunk:
+            break
+        last_pk = chunk[-1]['pk']
+        rows, totals = [], Counter()
+        for order in chunk:
+            points = int(order['total_amount'] * POINTS_PER_UNIT)
+            if points <= 0:
+                continue
+            rows.append(LoyaltyTransaction(
+                customer_id=order['customer_id'], kind='accrual', points=points, order_id=order['pk'],
+                expires_at=order['delivered'] + timedelta(days=POINTS_TTL_DAYS),
+            ))
+            totals[order['customer_id']] += points
+        with transaction.atomic(using=using):
+            LoyaltyTransaction.objects.using(using).bulk_create(rows)
+            for customer_id, points in totals.items():
+                Customer.objects.using(using).filter(pk=customer_id).update(
+                    loyalty_points=F('loyalty_points') + points
+                )
+            if totals:
+                _balances_changed(using)
+        orders_count += len(rows)
+        total_points += sum(totals.values())
+    return orders_count, total_points
+
+
+def fifo_expiry(points, balance, later_unexpired):
+    """
+    ما ينتهي من اكتساب قديم بترتيب FIFO: الاستبدال يستهلك الأقدم أولاً، فالرصيد
+    الحالي يتكون من أحدث الاكتسابات. ما بقي من هذا الاكتساب هو الرصيد مطروحاً منه
+    الاكتسابات اللاحقة التي لم تنتهِ، بحد أقصى نقاطه الأصلية
+    """
+    return max(0, min(points, balance - later_unexpired))
+
+
+def expire_points(now=None, chunk_size=CHUNK_SIZE, using=None):
+    """
+    انتهاء نقاط الاكتساب المستحقة على دفعات؛ كل دفعة transaction مستقلة
+    ينتهي فقط ما بقي من كل اكتساب بعد الاستبدال (fifo_expiry)
+    يرجع (عدد حركات الانتهاء، مجموع النقاط المنتهية)
+    """
+    using = _using(using)
+    now = now or timezone.now()
+    expired = LoyaltyTransaction.objects.using(using).filter(kind='expiry', source_id=OuterRef('pk'))
+    due = (
+        LoyaltyTransaction.objects.using(using)
+        .filter(kind='accrual', expires_at__lte=now)
+        .filter(~Exists(expired))
+        .order_by('pk')
+        .values('pk', 'customer_id', 'points')
+    )
+
+    count = total = 0
+    last_pk = 0
+    while True:
+        chunk = list(due.filter(pk__gt=last_pk)[:chunk_size])
+        if not chunk:
+            break
+        last_pk = chunk[-1]['pk']
+        with transaction.atomic(using=using):
+            # قفل أرصدة عملاء الدفعة فقط، ثم استبعاد ما عالجه تشغيل آخر في نفس الوقت
+            balances = dict(
+                Customer.objects.using(using).select_for_update()
+                .filter(pk__in={row['customer_id'] for row in chunk})
+                .values_list('pk', 'loyalty_points')
+            )
+            done = set(
+                LoyaltyTransaction.objects.using(using)
+                .filter(kind='expiry', source_id__in=[row['pk'] for row in chunk])
+                .values_list('source_id', flat=True)
+            )
+            # الاكتسابات التي لم تنتهِ بعد لنفس العملاء (تشمل باقي الدفعة نفسها)
+            unexpired = defaultdict(list)
+            for customer_id, pk, points in (
+                LoyaltyTransaction.objects.using(using)
+                .filter(kind='accrual', customer_id__in=balances, pk__gte=chunk[0]['pk'])
+                .filter(~Exists(expired))
+                .order_by('pk')
+                .values_list('customer_id', 'pk', 'points')
+            ):
+                unexpired[customer_id].append((pk, points))
+
+            rows, totals = [], Counter()
+            for row in chunk:
+                if row['pk'] in done:
+                    continue
+                customer_id = row['customer_id']
+                later = sum(points for pk, points in unexpired[customer_id] if pk > row['pk'])
+                points = fifo_expiry(row['points'], balances.get(customer_id, 0), later)
+                balances[customer_id] = balances.get(customer_id, 0) - points
+                rows.append(LoyaltyTransaction(
+                    customer_id=customer_id, kind='expiry', points=-points, source_id=row['pk'],
+                ))
+                totals[customer_id] += points
+            LoyaltyTransaction.objects.using(using).bulk_create(rows)
+            for customer_id, points in totals.items():
+                if points:
+                    Customer.objects.using(using).filter(pk=customer_id).update(
+                        loyalty_points=F('loyalty_points') - points
+                    )
+            if any(totals.values()):
+                _balances_changed(using)
+        count += len(rows)
+        total += sum(totals.values())
+    return count, total
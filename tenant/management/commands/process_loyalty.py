@@ -0,0 +1,24 @@
+# process_loyalty.py - مهمة دورية: اكتساب نقاط الطلبات المسلَّمة ثم انتهاء النقاط المستحقة
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_datetime
+
+from core.tenant_context import using_tenant
+from tenant.loyalty import CHUNK_SIZE, accrue_points, expire_points
+
+
+class Command(BaseCommand):
+    help = "اكتساب نقاط الولاء للطلبات المسلَّمة منذ آخر تشغيل وانتهاء النقاط القديمة"
+
+    def add_arguments(self, parser):
+        parser.add_argument('db_name', help="اسم قاعدة بيانات العميل")
+        parser.add_argument('--since', help="بداية الفترة (ISO)، الافتراضي آخر تشغيل")
+        parser.add_argument('--skip-expiry', action='store_true')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, db_name, since, skip_expiry, chunk_size, **options):
+        with using_tenant(db_name) as using:
+            orders, points = accrue_points(since=parse_datetime(since) if since else None, using=using)
+            self.stdout.write(f"accrued {points} points for {orders} orders")
+            if not skip_expiry:
+                count, expired = expire_points(chunk_size=chunk_size, using=using)
+                self.stdout.write(f"expired {expired} points from {count} accruals")
@@ -0,0 +1,18 @@
+# rebuild_customer_summaries.py - تعبئة ملخصات العملاء من الطلبات والوصفات لعميل واحد
+from django.core.management.base import BaseCommand
+
+from core.tenant_context import using_tenant
+from tenant.customer360 import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = "إعادة بناء CustomerSummary (أول تفعيل أو بعد تعديل مباشر في قاعدة البيانات)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('db_name', help="اسم قاعدة بيانات العميل")
+        parser.add_argument('--customer', type=int, action='append', help="عميل محدد (يمكن تكراره)")
+
+    def handle(self, *args, db_name, customer, **options):
+        with using_tenant(db_name) as using:
+            count = rebuild_summaries(customer, using=using)
+        self.stdout.write(self.style.SUCCESS(f"{count} customer summaries rebuilt"))
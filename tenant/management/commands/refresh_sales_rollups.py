@@ -0,0 +1,26 @@
+# refresh_sales_rollups.py - تحديث جداول تجميع المبيعات لعميل واحد (يُشغَّل دورياً)
+# الجدولة المقترحة:
+#   كل بضع دقائق:  manage.py refresh_sales_rollups <db_name>
+#   ليلياً:         manage.py refresh_sales_rollups <db_name> --full
+# التشغيل التدريجي يعتمد على Order.updated_at، والتشغيل الكامل يلتقط ما لا يغيره
+# (حذف الطلبات و update() والـ SQL المباشر)
+from django.core.management.base import BaseCommand
+
+from core.tenant_context import using_tenant
+from tenant.analytics import refresh_rollups
+
+
+class Command(BaseCommand):
+    help = "إعادة حساب أيام المبيعات التي تغيرت طلباتها منذ آخر تشغيل"
+
+    def add_arguments(self, parser):
+        parser.add_argument('db_name', help="اسم قاعدة بيانات العميل")
+        parser.add_argument(
+            '--full', action='store_true',
+            help="إعادة حساب كل الأيام؛ يُشغَّل دورياً (ليلياً) لالتقاط حذف الطلبات والتعديل بـ update()",
+        )
+
+    def handle(self, *args, db_name, full, **options):
+        with using_tenant(db_name) as using:
+            days = refresh_rollups(using=using, full=full)
+        self.stdout.write(self.style.SUCCESS(f"{days} days refreshed"))
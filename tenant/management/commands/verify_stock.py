@@ -0,0 +1,57 @@
+# verify_stock.py - مطابقة المخزون مع حركاته لعميل واحد
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from core.tenant_context import using_tenant
+from tenant.ledger import reconcile
+from tenant.models import Stock, StockCheckpoint
+
+
+class Command(BaseCommand):
+    help = "مطابقة Stock مع StockMovement (من آخر نقطة مرجعية فقط)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('db_name', help="اسم قاعدة بيانات العميل")
+        parser.add_argument('--fix', action='store_true', help="تصحيح الكميات المختلفة")
+        parser.add_argument('--checkpoint', action='store_true', help="حفظ نقطة مرجعية جديدة")
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, db_name, fix, checkpoint, chunk_size, **options):
+        checked = mismatched = 0
+        checkpoints = []
+
+        with using_tenant(db_name) as using:
+            for product_id, on_hand, expected, recent, movement_id in reconcile(using, chunk_size):
+                checked += 1
+                difference = expected + recent - on_hand
+                if difference:
+                    mismatched += 1
+                    self.stdout.write(
+                        f"product {product_id}: on hand {on_hand}, expected {expected + recent}"
+                    )
+                    if fix:
+                        # تصحيح بالفرق حتى لا تضيع حركات متزامنة
+                        Stock.objects.using(using).filter(product_id=product_id).update(
+                            quantity_on_hand=F('quantity_on_hand') + difference
+                        )
+                if checkpoint:
+                    checkpoints.append(StockCheckpoint(
+                        product_id=product_id, quantity=expected, movement_id=movement_id
+                    ))
+                    if len(checkpoints) >= chunk_size:
+                        self.save_checkpoints(using, checkpoints)
+            self.save_checkpoints(using, checkpoints)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{checked} products checked, {mismatched} mismatched"
+        ))
+
+    def save_checkpoints(self, using, checkpoints):
+        if checkpoints:
+            StockCheckpoint.objects.using(using).bulk_create(
+                checkpoints,
+                update_conflicts=True,
+                unique_fields=['product'],
+                update_fields=['quantity', 'movement_id', 'created_at'],
+            )
+            checkpoints.clear()
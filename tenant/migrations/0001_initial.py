@@ -0,0 +1,271 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:58
+
+import django.contrib.auth.models
+import django.contrib.auth.validators
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Brand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('country', models.CharField(blank=True, max_length=50)),
+                ('website', models.URLField(blank=True)),
+                ('description', models.TextField(blank=True)),
+                ('logo', models.ImageField(blank=True, null=True, upload_to='brands/')),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Customer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_name', models.CharField(max_length=100)),
+                ('last_name', models.CharField(max_length=100)),
+                ('email', models.EmailField(max_length=254, unique=True)),
+                ('phone', models.CharField(blank=True, max_length=20)),
+                ('date_of_birth', models.DateField(blank=True, null=True)),
+                ('address_line1', models.CharField(blank=True, max_length=200)),
+                ('address_line2', models.CharField(blank=True, max_length=200)),
+                ('city', models.CharField(blank=True, max_length=100)),
+                ('postal_code', models.CharField(blank=True, max_length=20)),
+                ('customer_since', models.DateTimeField(auto_now_add=True)),
+                ('is_vip', models.BooleanField(default=False)),
+                ('loyalty_points', models.IntegerField(default=0)),
+                ('accepts_marketing', models.BooleanField(default=True)),
+                ('preferred_contact', models.CharField(choices=[('email', 'بريد إلكتروني'), ('phone', 'هاتف'), ('sms', 'رسائل نصية')], default='email', max_length=10)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FrameMaterial',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('properties', models.JSONField(default=dict)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LensType',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('description', models.TextField(blank=True)),
+                ('price_multiplier', models.DecimalField(decimal_places=2, default=1.0, max_digits=5)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='OrderNumberSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('last_value', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Supplier',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('contact_person', models.CharField(blank=True, max_length=100)),
+                ('email', models.EmailField(blank=True, max_length=254)),
+                ('phone', models.CharField(blank=True, max_length=20)),
+                ('address', models.TextField(blank=True)),
+                ('payment_terms', models.CharField(blank=True, max_length=100)),
+                ('is_active', models.BooleanField(default=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CustomUser',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('password', models.CharField(max_length=128, verbose_name='password')),
+                ('last_login', models.DateTimeField(blank=True, null=True, verbose_name='last login')),
+                ('is_superuser', models.BooleanField(default=False, help_text='Designates that this user has all permissions without explicitly assigning them.', verbose_name='superuser status')),
+                ('username', models.CharField(error_messages={'unique': 'A user with that username already exists.'}, help_text='Required. 150 characters or fewer. Letters, digits and @/./+/-/_ only.', max_length=150, unique=True, validators=[django.contrib.auth.validators.UnicodeUsernameValidator()], verbose_name='username')),
+                ('first_name', models.CharField(blank=True, max_length=150, verbose_name='first name')),
+                ('last_name', models.CharField(blank=True, max_length=150, verbose_name='last name')),
+                ('email', models.EmailField(blank=True, max_length=254, verbose_name='email address')),
+                ('is_staff', models.BooleanField(default=False, help_text='Designates whether the user can log into this admin site.', verbose_name='staff status')),
+                ('is_active', models.BooleanField(default=True, help_text='Designates whether this user should be treated as active. Unselect this instead of deleting accounts.', verbose_name='active')),
+                ('date_joined', models.DateTimeField(default=django.utils.timezone.now, verbose_name='date joined')),
+                ('role', models.CharField(choices=[('admin', 'Admin'), ('sales', 'Sales'), ('technician', 'Technician')], max_length=20)),
+                ('groups', models.ManyToManyField(blank=True, help_text='The groups this user belongs to. A user will get all permissions granted to each of their groups.', related_name='user_set', related_query_name='user', to='auth.group', verbose_name='groups')),
+                ('user_permissions', models.ManyToManyField(blank=True, help_text='Specific permissions for this user.', related_name='user_set', related_query_name='user', to='auth.permission', verbose_name='user permissions')),
+            ],
+            options={
+                'verbose_name': 'user',
+                'verbose_name_plural': 'users',
+                'abstract': False,
+            },
+            managers=[
+                ('objects', django.contrib.auth.models.UserManager()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('description', models.TextField(blank=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('parent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='tenant.category')),
+            ],
+            options={
+                'verbose_name_plural': 'Categories',
+            },
+        ),
+        migrations.CreateModel(
+            name='Order',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_number', models.CharField(max_length=20, unique=True)),
+                ('status', models.CharField(choices=[('pending', 'في الانتظار'), ('confirmed', 'مؤكد'), ('processing', 'قيد التحضير'), ('ready', 'جاهز للاستلام'), ('delivered', 'تم التسليم'), ('cancelled', 'ملغي')], default='pending', max_length=20)),
+                ('payment_status', models.CharField(choices=[('pending', 'في الانتظار'), ('partial', 'دفع جزئي'), ('paid', 'مدفوع بالكامل'), ('refunded', 'مسترد')], default='pending', max_length=20)),
+                ('subtotal', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('tax_amount', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('discount_amount', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('total_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('paid_amount', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('notes', models.TextField(blank=True, help_text='ملاحظات خاصة بالطلب')),
+                ('internal_notes', models.TextField(blank=True, help_text='ملاحظات داخلية للموظفين فقط')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('confirmed_at', models.DateTimeField(blank=True, null=True)),
+                ('delivered_at', models.DateTimeField(blank=True, null=True)),
+                ('expected_delivery', models.DateTimeField(blank=True, null=True)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='orders', to='tenant.customer')),
+                ('sales_person', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PrescriptionRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('right_sphere', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('right_cylinder', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('right_axis', models.IntegerField(blank=True, null=True)),
+                ('left_sphere', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('left_cylinder', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('left_axis', models.IntegerField(blank=True, null=True)),
+                ('pupillary_distance', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('doctor_name', models.CharField(blank=True, max_length=200)),
+                ('prescription_date', models.DateField()),
+                ('notes', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='prescriptions', to='tenant.customer')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Product',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('sku', models.CharField(max_length=50, unique=True)),
+                ('description', models.TextField(blank=True)),
+                ('short_description', models.CharField(blank=True, max_length=255)),
+                ('frame_shape', models.CharField(choices=[('round', 'دائري'), ('square', 'مربع'), ('rectangular', 'مستطيل'), ('aviator', 'طيار'), ('cat_eye', 'عين القطة'), ('oval', 'بيضاوي')], max_length=20)),
+                ('frame_color', models.CharField(max_length=50)),
+                ('frame_size', models.CharField(max_length=20)),
+                ('bridge_width', models.IntegerField(help_text='عرض الجسر بالمليمتر')),
+                ('lens_width', models.IntegerField(help_text='عرض العدسة بالمليمتر')),
+                ('temple_length', models.IntegerField(help_text='طول الذراع بالمليمتر')),
+                ('gender', models.CharField(choices=[('unisex', 'للجميع'), ('men', 'رجالي'), ('women', 'نسائي'), ('kids', 'أطفال')], default='unisex', max_length=10)),
+                ('age_group', models.CharField(blank=True, max_length=20)),
+                ('cost_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('selling_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('discount_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('is_featured', models.BooleanField(default=False)),
+                ('requires_prescription', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('main_image', models.ImageField(blank=True, null=True, upload_to='products/')),
+                ('meta_title', models.CharField(blank=True, max_length=200)),
+                ('meta_description', models.CharField(blank=True, max_length=300)),
+                ('brand', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tenant.brand')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tenant.category')),
+                ('frame_material', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tenant.framematerial')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ProductImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image', models.ImageField(upload_to='products/')),
+                ('alt_text', models.CharField(blank=True, max_length=200)),
+                ('order', models.PositiveIntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='images', to='tenant.product')),
+            ],
+            options={
+                'ordering': ['order'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductVariant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('color', models.CharField(max_length=50)),
+                ('color_code', models.CharField(help_text='كود اللون الهكساديسيمال', max_length=7)),
+                ('additional_price', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('sku_suffix', models.CharField(max_length=10)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='variants', to='tenant.product')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='OrderItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField(default=1)),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('total_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('lens_type', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='tenant.lenstype')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='tenant.order')),
+                ('prescription', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='tenant.prescriptionrecord')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tenant.product')),
+                ('variant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='tenant.productvariant')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Stock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity_on_hand', models.IntegerField(default=0)),
+                ('quantity_reserved', models.IntegerField(default=0)),
+                ('reorder_point', models.IntegerField(default=10)),
+                ('max_stock_level', models.IntegerField(default=100)),
+                ('average_cost', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('last_cost', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('last_updated', models.DateTimeField(auto_now=True)),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stock', to='tenant.product')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('movement_type', models.CharField(choices=[('in', 'دخول'), ('out', 'خروج'), ('adjustment', 'تعديل'), ('transfer', 'تحويل')], max_length=20)),
+                ('quantity', models.IntegerField()),
+                ('unit_cost', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('reference_number', models.CharField(blank=True, max_length=100)),
+                ('notes', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tenant.product')),
+            ],
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:58
+
+import django.db.models.deletion
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenant', '0002_stock_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stock',
+            name='preferred_supplier',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_items', to='tenant.supplier'),
+        ),
+        migrations.AddIndex(
+            model_name='stock',
+            index=models.Index(condition=models.Q(('quantity_on_hand__lte', django.db.models.expressions.CombinedExpression(models.F('quantity_reserved'), '+', models.F('reorder_point')))), fields=['preferred_supplier', 'product'], name='stock_needs_reorder_idx'),
+        ),
+    ]
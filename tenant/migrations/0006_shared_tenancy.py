@@ -0,0 +1,286 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:58
+
+import django.db.models.deletion
+import django.db.models.expressions
+from django.db import migrations, models
+
+TENANT_MODELS = [
+    'brand', 'category', 'customer', 'framematerial', 'lenstype', 'order', 'orderitem', 'ordernumbersequence',
+    'prescriptionrecord', 'product', 'productimage', 'productvariant', 'stock', 'stockcheckpoint',
+    'stockmovement', 'supplier',
+]
+
+
+def assign_tenant(apps, schema_editor):
+    """
+    الصفوف الموجودة قبل الجداول المشتركة تنتمي لصاحب القاعدة (أو الـ schema) التي يتم ترحيلها
+    صفوف بدون عميل معروف لا يمكن تخمين صاحبها، لذلك يتوقف الترحيل بدل إسنادها خطأ
+    """
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT current_schema()")
+        schema = cursor.fetchone()[0]
+    Tenant = apps.get_model('core', 'Tenant')
+    owners = Tenant.objects.using('default')
+    if schema != 'public':
+        owner = owners.filter(schema_name=schema).first()
+    else:
+        owner = owners.filter(db_name__in=[connection.alias, connection.settings_dict['NAME']]).first()
+
+    for model_name in TENANT_MODELS:
+        rows = apps.get_model('tenant', model_name)._base_manager.using(connection.alias).filter(tenant__isnull=True)
+        if owner is not None:
+            rows.update(tenant=owner.pk)
+        elif rows.exists():
+            raise RuntimeError(
+                f"tenant.{model_name}: rows in '{connection.alias}' ({schema}) have no owning tenant; "
+                "set tenant_id before migrating"
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_shared_tenancy'),
+        ('tenant', '0005_product_price_columns'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_active_price_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_active_margin_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='stock',
+            name='stock_needs_reorder_idx',
+        ),
+        migrations.AddField(
+            model_name='brand',
+            name='tenant',
+            field=models.ForeignKey(db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.tenant'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='tenant',
+            field=models.ForeignKey(db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.tenant'),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='tenant',
+            field=models.ForeignKey(db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.tenant'),
+        ),
+        migrations.AddField(
+            model_name='framematerial',
+            name='tenant',
+            field=models.ForeignKey(db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.tenant'),
+        ),
+        migrations.AddField(
+            model_name='lenstype',
+            name='tenant',
+            field=models.ForeignKey(db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.tenant'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='tenant',
+            field=models.ForeignKey(db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.tenant'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='tenant',
+            field=models.ForeignKey(db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.tenant'),
+        ),
+        migrations.AddField(
+            model_name='ordernumbersequence',
+            name='tenant',
+            field=models.ForeignKey(db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.tenant'),
+        ),
+        migrations.AddField(
+            model_name='prescriptionrecord',
+            name='tenant',
+            field=models.ForeignKey(db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.tenant'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='tenant',
+            field=models.ForeignKey(db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.tenant'),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='tenant',
+            field=models.ForeignKey(db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.tenant'),
+        ),
+        migrations.AddField(
+            model_name='productvariant',
+            name='tenant',
+            field=models.ForeignKey(db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.tenant'),
+        ),
+        migrations.AddField(
+            model_name='stock',
+            name='tenant',
+            field=models.ForeignKey(db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.tenant'),
+        ),
+        migrations.AddField(
+            model_name='stockcheckpoint',
+            name='tenant',
+            field=models.ForeignKey(db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.tenant'),
+        ),
+        migrations.AddField(
+            model_name='stockmovement',
+            name='tenant',
+            field=models.ForeignKey(db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.tenant'),
+        ),
+        migrations.AddField(
+            model_name='supplier',
+            name='tenant',
+            field=models.ForeignKey(db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.tenant'),
+        ),
+        migrations.AlterField(
+            model_name='customer',
+            name='email',
+            field=models.EmailField(max_length=254),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='order_number',
+            field=models.CharField(max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='ordernumbersequence',
+            name='day',
+            field=models.DateField(),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='sku',
+            field=models.CharField(max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['tenant', 'customer', 'created_at'], name='order_tenant_customer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['tenant', 'status', 'created_at'], name='order_tenant_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['tenant', 'is_active', 'effective_price'], name='product_active_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['tenant', 'is_active', 'margin_percent'], name='product_active_margin_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['tenant', 'brand'], name='product_tenant_brand_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['tenant', 'created_at'], name='product_tenant_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stock',
+            index=models.Index(condition=models.Q(('quantity_on_hand__lte', django.db.models.expressions.CombinedExpression(models.F('quantity_reserved'), '+', models.F('reorder_point')))), fields=['tenant', 'preferred_supplier', 'product'], name='stock_needs_reorder_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='customer',
+            constraint=models.UniqueConstraint(fields=('tenant', 'email'), name='customer_tenant_email_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='order',
+            constraint=models.UniqueConstraint(fields=('tenant', 'order_number'), name='order_tenant_number_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='ordernumbersequence',
+            constraint=models.UniqueConstraint(fields=('tenant', 'day'), name='order_sequence_tenant_day_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='product',
+            constraint=models.UniqueConstraint(fields=('tenant', 'sku'), name='product_tenant_sku_uniq'),
+        ),
+        migrations.RunPython(assign_tenant, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='brand',
+            name='tenant',
+            field=models.ForeignKey(db_constraint=False, editable=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.tenant'),
+        ),
+        migrations.AlterField(
+            model_name='category',
+            name='tenant',
+            field=models.ForeignKey(db_constraint=False, editable=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.tenant'),
+        ),
+        migrations.AlterField(
+            model_name='customer',
+            name='tenant',
+            field=models.ForeignKey(db_constraint=False, editable=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.tenant'),
+        ),
+        migrations.AlterField(
+            model_name='framematerial',
+            name='tenant',
+            field=models.ForeignKey(db_constraint=False, editable=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.tenant'),
+        ),
+        migrations.AlterField(
+            model_name='lenstype',
+            name='tenant',
+            field=models.ForeignKey(db_constraint=False, editable=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.tenant'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='tenant',
+            field=models.ForeignKey(db_constraint=False, editable=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.tenant'),
+        ),
+        migrations.AlterField(
+            model_name='orderitem',
+            name='tenant',
+            field=models.ForeignKey(db_constraint=False, editable=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.tenant'),
+        ),
+        migrations.AlterField(
+            model_name='ordernumbersequence',
+            name='tenant',
+            field=models.ForeignKey(db_constraint=False, editable=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.tenant'),
+        ),
+        migrations.AlterField(
+            model_name='prescriptionrecord',
+            name='tenant',
+            field=models.ForeignKey(db_constraint=False, editable=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.tenant'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='tenant',
+            field=models.ForeignKey(db_constraint=False, editable=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.tenant'),
+        ),
+        migrations.AlterField(
+            model_name='productimage',
+            name='tenant',
+            field=models.ForeignKey(db_constraint=False, editable=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.tenant'),
+        ),
+        migrations.AlterField(
+            model_name='productvariant',
+            name='tenant',
+            field=models.ForeignKey(db_constraint=False, editable=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.tenant'),
+        ),
+        migrations.AlterField(
+            model_name='stock',
+            name='tenant',
+            field=models.ForeignKey(db_constraint=False, editable=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.tenant'),
+        ),
+        migrations.AlterField(
+            model_name='stockcheckpoint',
+            name='tenant',
+            field=models.ForeignKey(db_constraint=False, editable=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.tenant'),
+        ),
+        migrations.AlterField(
+            model_name='stockmovement',
+            name='tenant',
+            field=models.ForeignKey(db_constraint=False, editable=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.tenant'),
+        ),
+        migrations.AlterField(
+            model_name='supplier',
+            name='tenant',
+            field=models.ForeignKey(db_constraint=False, editable=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.tenant'),
+        ),
+    ]
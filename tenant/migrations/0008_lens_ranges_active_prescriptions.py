@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_tenant_features'),
+        ('tenant', '0007_product_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lenstype',
+            name='is_active',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='lenstype',
+            name='max_cylinder',
+            field=models.DecimalField(decimal_places=2, default=4, max_digits=5),
+        ),
+        migrations.AddField(
+            model_name='lenstype',
+            name='max_sphere',
+            field=models.DecimalField(decimal_places=2, default=8, max_digits=5),
+        ),
+        migrations.AddField(
+            model_name='lenstype',
+            name='min_sphere',
+            field=models.DecimalField(decimal_places=2, default=-10, max_digits=5),
+        ),
+        migrations.AddIndex(
+            model_name='prescriptionrecord',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['tenant', 'customer', 'prescription_date'], name='prescription_active_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_tenant_features'),
+        ('tenant', '0009_customersummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoyaltyTransaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('accrual', 'اكتساب'), ('redemption', 'استبدال'), ('expiry', 'انتهاء صلاحية'), ('adjustment', 'تعديل يدوي')], max_length=20)),
+                ('points', models.IntegerField()),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+                ('note', models.CharField(blank=True, max_length=200)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='loyalty_transactions', to='tenant.customer')),
+                ('order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='tenant.order')),
+                ('source', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='tenant.loyaltytransaction')),
+                ('tenant', models.ForeignKey(db_constraint=False, editable=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.tenant')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tenant', 'customer', 'created_at'], name='loyalty_customer_idx'), models.Index(condition=models.Q(('kind', 'accrual')), fields=['tenant', 'expires_at'], name='loyalty_accrual_expiry_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('kind', 'accrual')), fields=('tenant', 'order'), name='loyalty_accrual_order_uniq'), models.UniqueConstraint(condition=models.Q(('kind', 'expiry')), fields=('tenant', 'source'), name='loyalty_expiry_source_uniq')],
+            },
+        ),
+    ]
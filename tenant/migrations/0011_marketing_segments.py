@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:00
+
+import django.db.models.expressions
+import django.db.models.functions.comparison
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_tenant_features'),
+        ('tenant', '0010_loyaltytransaction'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='birthday',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.comparison.Cast(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.functions.datetime.ExtractMonth('date_of_birth'), '*', models.Value(100)), '+', django.db.models.functions.datetime.ExtractDay('date_of_birth')), models.IntegerField()), output_field=models.IntegerField(null=True)),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(condition=models.Q(('accepts_marketing', True)), fields=['tenant', 'birthday'], name='customer_marketing_birthday_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(condition=models.Q(('accepts_marketing', True)), fields=['tenant', 'city'], name='customer_marketing_city_idx'),
+        ),
+    ]
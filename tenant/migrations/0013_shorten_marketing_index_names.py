@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:00
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenant', '0012_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.RenameIndex(
+            model_name='customer',
+            new_name='customer_mkt_birthday_idx',
+            old_name='customer_marketing_birthday_idx',
+        ),
+        migrations.RenameIndex(
+            model_name='customer',
+            new_name='customer_mkt_city_idx',
+            old_name='customer_marketing_city_idx',
+        ),
+    ]
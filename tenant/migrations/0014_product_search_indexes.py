@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:00
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.operations
+import django.db.models.functions.text
+from django.db import migrations
+
+# نفس الفهارس التي كان ينشئها post_migrate سابقاً، لذلك IF NOT EXISTS في القواعد الموجودة
+SEARCH_INDEXES = [
+    ('tenant_product_search_idx', "gin (search_vector)"),
+    ('tenant_product_sku_trgm_idx', "gin (UPPER(sku::text) gin_trgm_ops)"),
+    ('tenant_product_name_trgm_idx', "gin (UPPER(name::text) gin_trgm_ops)"),
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_tenant_features'),
+        ('tenant', '0013_shorten_marketing_index_names'),
+    ]
+
+    operations = [
+        django.contrib.postgres.operations.TrigramExtension(),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    f"CREATE INDEX IF NOT EXISTS {name} ON tenant_product USING {definition}",
+                    f"DROP INDEX IF EXISTS {name}",
+                )
+                for name, definition in SEARCH_INDEXES
+            ],
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='product',
+                    index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='tenant_product_search_idx'),
+                ),
+                migrations.AddIndex(
+                    model_name='product',
+                    index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('sku'), name='gin_trgm_ops'), name='tenant_product_sku_trgm_idx'),
+                ),
+                migrations.AddIndex(
+                    model_name='product',
+                    index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='tenant_product_name_trgm_idx'),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,32 @@
+import uuid
+
+from django.db import migrations, models
+
+
+def fill_global_ids(apps, schema_editor):
+    """قيمة مختلفة لكل مستخدم موجود (default في AddField تُحسب مرة واحدة لكل الصفوف)"""
+    CustomUser = apps.get_model('tenant', 'CustomUser')
+    users = CustomUser.objects.using(schema_editor.connection.alias)
+    for pk in users.filter(global_id__isnull=True).values_list('pk', flat=True).iterator():
+        users.filter(pk=pk).update(global_id=uuid.uuid4())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenant', '0014_product_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='global_id',
+            field=models.UUIDField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_global_ids, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='customuser',
+            name='global_id',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+        ),
+    ]
@@ -0,0 +1,8 @@
+from .users import CustomUser
+from .glasses import (
+    Brand, Category, FrameMaterial, LensType, Product, ProductImage, ProductVariant,
+)
+from .inventory import Supplier, Stock, StockCheckpoint, StockMovement
+from .customers import Customer, CustomerSummary, LoyaltyTransaction, PrescriptionRecord
+from .sales import Order, OrderItem, OrderNumberSequence
+from .analytics import DailyProductSales, DailySales, MonthlySales, RollupWatermark
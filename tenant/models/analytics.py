@@ -0,0 +1,82 @@
+# models/analytics.py - جداول تجميع المبيعات للوحات المعلومات (تُحدَّث من tenant/analytics.py)
+from django.conf import settings
+from django.db import models
+
+from .base import TenantMixin
+
+class DailySales(TenantMixin):
+    """مجاميع الطلبات لكل يوم وموظف مبيعات (بدون الطلبات الملغاة)"""
+    day = models.DateField()
+    sales_person = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    order_count = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    tax_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    discount_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tenant', 'day', 'sales_person'], nulls_distinct=False, name='daily_sales_uniq',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.day} - {self.sales_person_id}"
+
+class MonthlySales(TenantMixin):
+    """نفس DailySales مجمعة لكل شهر (month = أول يوم في الشهر)"""
+    month = models.DateField()
+    sales_person = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    order_count = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    tax_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    discount_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tenant', 'month', 'sales_person'], nulls_distinct=False, name='monthly_sales_uniq',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.month:%Y-%m} - {self.sales_person_id}"
+
+class DailyProductSales(TenantMixin):
+    """مبيعات كل منتج يومياً، مع العلامة والفئة منسوختين من المنتج للتجميع بهما"""
+    day = models.DateField()
+    product = models.ForeignKey('Product', on_delete=models.CASCADE, related_name='+')
+    brand = models.ForeignKey('Brand', on_delete=models.CASCADE, related_name='+')
+    category = models.ForeignKey('Category', on_delete=models.CASCADE, related_name='+')
+    order_count = models.PositiveIntegerField(default=0)
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)  # مجموع total_price
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tenant', 'day', 'product'], name='daily_product_sales_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['tenant', 'brand', 'day'], name='daily_sales_brand_idx'),
+            models.Index(fields=['tenant', 'category', 'day'], name='daily_sales_category_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.day} - {self.product_id}"
+
+class RollupWatermark(TenantMixin):
+    """آخر Order.updated_at تمت معالجته في جداول التجميع"""
+    name = models.CharField(max_length=50)
+    updated_at = models.DateTimeField()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tenant', 'name'], name='rollup_watermark_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.name}: {self.updated_at}"
@@ -0,0 +1,57 @@
+# models/base.py - أساس نماذج العملاء (يدعم وضع الجداول المشتركة)
+from django.conf import settings
+from django.db import models
+
+from core.tenant_context import get_current_db, get_current_tenant_id
+
+
+class TenantQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        """bulk_create لا يستدعي save()، لذلك يتم تعيين العميل هنا"""
+        objs = list(objs)
+        tenant_id = get_current_tenant_id()
+        for obj in objs:
+            if obj.tenant_id is None:
+                obj.tenant_id = tenant_id
+        return super().bulk_create(objs, *args, **kwargs)
+
+
+class TenantManager(models.Manager.from_queryset(TenantQuerySet)):
+    """
+    مدير يضيف تصفية العميل الحالي تلقائياً لكل الاستعلامات
+    في القاعدة المشتركة بدون عميل محدد يرجع queryset فارغ لمنع تسرب البيانات
+    في قاعدة عميل مستقلة بدون عميل محدد (أوامر الإدارة) يرجع كل الصفوف
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        tenant_id = get_current_tenant_id()
+        if tenant_id is not None:
+            return queryset.filter(tenant_id=tenant_id)
+        if get_current_db() == settings.SHARED_TENANT_DATABASE:
+            return queryset.none()
+        return queryset
+
+
+class TenantMixin(models.Model):
+    """
+    يضيف عمود العميل لكل نموذج حتى يمكن وضع عملاء الخطط الصغيرة في جداول مشتركة
+    بدون قيد FK على مستوى قاعدة البيانات: جدول العملاء موجود في 'default' فقط
+    """
+    tenant = models.ForeignKey(
+        'core.Tenant',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        editable=False,
+        related_name='+',
+    )
+
+    objects = TenantManager()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if self.tenant_id is None:
+            self.tenant_id = get_current_tenant_id()
+        super().save(*args, **kwargs)
@@ -1,11 +1,16 @@
 
 # models/customers.py - إدارة العملاء
-class Customer(models.Model):
+from django.db import models
+from django.db.models.functions import Cast, ExtractDay, ExtractMonth
+
+from .base import TenantManager, TenantMixin, TenantQuerySet
+
+class Customer(TenantMixin):
     """عملاء المتجر"""
     # معلومات شخصية
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
-    email = models.EmailField(unique=True)
+    email = models.EmailField()  # فريد داخل كل عميل
     phone = models.CharField(max_length=20, blank=True)
     date_of_birth = models.DateField(null=True, blank=True)
     
@@ -28,14 +33,47 @@ class Customer(models.Model):
         ('sms', 'رسائل نصية')
     ], default='email')
     
+    # يوم الميلاد بصيغة MMDD (مثل 1231) حتى تكون شرائح أعياد الميلاد بحث فهرس
+    birthday = models.GeneratedField(
+        expression=Cast(ExtractMonth('date_of_birth') * 100 + ExtractDay('date_of_birth'), models.IntegerField()),
+        output_field=models.IntegerField(null=True),
+        db_persist=True,
+    )
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tenant', 'email'], name='customer_tenant_email_uniq'),
+        ]
+        indexes = [
+            # شرائح التسويق تشمل فقط من يقبل الرسائل، لذلك الفهارس جزئية
+            models.Index(
+                fields=['tenant', 'birthday'], condition=models.Q(accepts_marketing=True),
+                name='customer_mkt_birthday_idx',
+            ),
+            models.Index(
+                fields=['tenant', 'city'], condition=models.Q(accepts_marketing=True),
+                name='customer_mkt_city_idx',
+            ),
+        ]
+    
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
     
     @property
     def full_name(self):
         return f"{self.first_name} {self.last_name}"
+    
+    @property
+    def active_prescription(self):
+        """الوصفة الحالية (من الفهرس الجزئي بدل تحميل كل سجل الوصفات)"""
+        return self.prescriptions.active().order_by('-prescription_date', '-id').first()
+
+class PrescriptionQuerySet(TenantQuerySet):
+    def active(self):
+        """الوصفات الحالية فقط (نفس شرط الفهرس الجزئي prescription_active_idx)"""
+        return self.filter(is_active=True)
 
-class PrescriptionRecord(models.Model):
+class PrescriptionRecord(TenantMixin):
     """سجلات الوصفة الطبية"""
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='prescriptions')
     
@@ -58,5 +96,83 @@ class PrescriptionRecord(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True)  # الوصفة الحالية
     
+    objects = TenantManager.from_queryset(PrescriptionQuerySet)()
+    
+    class Meta:
+        indexes = [
+            # الوصفات غير الحالية (السجل القديم) لا تدخل في الفهرس
+            models.Index(
+                fields=['tenant', 'customer', 'prescription_date'],
+                condition=models.Q(is_active=True),
+                name='prescription_active_idx',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"وصفة {self.customer.full_name} - {self.prescription_date}"
+
+class CustomerSummary(TenantMixin):
+    """
+    ملخص العميل لشاشة نقطة البيع (نموذج قراءة): صف واحد لكل عميل يُقرأ بالمفتاح
+    يُحدَّث تدريجياً عند كتابة الطلبات والوصفات (tenant/customer360.py)
+    """
+    customer = models.OneToOneField(Customer, on_delete=models.CASCADE, primary_key=True, related_name='summary')
+    order_count = models.PositiveIntegerField(default=0)  # بدون الطلبات الملغاة
+    lifetime_value = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    open_balance = models.DecimalField(max_digits=12, decimal_places=2, default=0)  # مجموع remaining_amount
+    last_visit = models.DateTimeField(null=True, blank=True)
+    
+    # الوصفة الحالية ونسخة من قيمها حتى لا تحتاج الشاشة استعلاماً آخر
+    active_prescription = models.ForeignKey(
+        PrescriptionRecord, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    prescription = models.JSONField(null=True, blank=True)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"ملخص {self.customer_id}"
+
+class LoyaltyTransaction(TenantMixin):
+    """
+    سجل نقاط الولاء (إضافة فقط، لا يُعدَّل ولا يُحذف)
+    Customer.loyalty_points هو مجموع هذا السجل ويُحدَّث معه بـ F() في نفس الـ transaction
+    """
+    KIND_CHOICES = [
+        ('accrual', 'اكتساب'),
+        ('redemption', 'استبدال'),
+        ('expiry', 'انتهاء صلاحية'),
+        ('adjustment', 'تعديل يدوي'),
+    ]
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='loyalty_transactions')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    points = models.IntegerField()  # موجبة للإضافة وسالبة للخصم
+    order = models.ForeignKey('Order', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    # للاكتساب: موعد انتهاء النقاط، وللانتهاء: حركة الاكتساب التي انتهت
+    expires_at = models.DateTimeField(null=True, blank=True)
+    source = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    note = models.CharField(max_length=200, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        constraints = [
+            # الطلب يكتسب نقاطه مرة واحدة، وحركة الاكتساب تنتهي مرة واحدة (يسمح بإعادة تشغيل المهام)
+            models.UniqueConstraint(
+                fields=['tenant', 'order'], condition=models.Q(kind='accrual'),
+                name='loyalty_accrual_order_uniq',
+            ),
+            models.UniqueConstraint(
+                fields=['tenant', 'source'], condition=models.Q(kind='expiry'),
+                name='loyalty_expiry_source_uniq',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['tenant', 'customer', 'created_at'], name='loyalty_customer_idx'),
+            models.Index(
+                fields=['tenant', 'expires_at'], condition=models.Q(kind='accrual'),
+                name='loyalty_accrual_expiry_idx',
+            ),
+        ]
+    
     def __str__(self):
-        return f"وصفة {self.customer.full_name} - {self.prescription_date}"
\ No newline at end of file
+        return f"{self.customer_id} {self.kind} {self.points:+d}"
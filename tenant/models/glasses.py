@@ -1,9 +1,14 @@
 # models/glasses.py - نماذج خاصة بالنظارات
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.functions import Cast, Coalesce, NullIf, Upper
 from django.contrib.auth.models import User
 from decimal import Decimal
 
-class Brand(models.Model):
+from .base import TenantManager, TenantMixin, TenantQuerySet
+
+class Brand(TenantMixin):
     """العلامات التجارية للنظارات"""
     name = models.CharField(max_length=100)
     country = models.CharField(max_length=50, blank=True)
@@ -16,7 +21,7 @@ class Brand(models.Model):
     def __str__(self):
         return self.name
 
-class Category(models.Model):
+class Category(TenantMixin):
     """فئات النظارات"""
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
@@ -29,7 +34,7 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
-class FrameMaterial(models.Model):
+class FrameMaterial(TenantMixin):
     """مواد الإطار"""
     name = models.CharField(max_length=50)  # مثل: معدن، بلاستيك، تيتانيوم
     properties = models.JSONField(default=dict)  # خصائص المادة
@@ -37,16 +42,39 @@ class FrameMaterial(models.Model):
     def __str__(self):
         return self.name
 
-class LensType(models.Model):
+class LensType(TenantMixin):
     """أنواع العدسات"""
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
     price_multiplier = models.DecimalField(max_digits=5, decimal_places=2, default=1.0)
     
+    # المدى الذي تصنعه العدسة (بالديوبتر) ويستخدمه tenant.lens_matching
+    min_sphere = models.DecimalField(max_digits=5, decimal_places=2, default=-10)
+    max_sphere = models.DecimalField(max_digits=5, decimal_places=2, default=8)
+    max_cylinder = models.DecimalField(max_digits=5, decimal_places=2, default=4)  # القيمة المطلقة
+    is_active = models.BooleanField(default=True)
+    
     def __str__(self):
         return self.name
 
-class Product(models.Model):
+class ProductQuerySet(TenantQuerySet):
+    """استعلامات السعر وهامش الربح على الأعمدة المحسوبة (بدون تحميل المنتجات)"""
+    
+    def by_price(self, descending=False):
+        return self.order_by('-effective_price' if descending else 'effective_price', 'id')
+    
+    def price_between(self, min_price=None, max_price=None):
+        queryset = self
+        if min_price is not None:
+            queryset = queryset.filter(effective_price__gte=min_price)
+        if max_price is not None:
+            queryset = queryset.filter(effective_price__lte=max_price)
+        return queryset
+    
+    def margin_below(self, percent):
+        return self.filter(margin_percent__lt=percent)
+
+class Product(TenantMixin):
     """المنتج الأساسي (النظارة)"""
     GENDER_CHOICES = [
         ('unisex', 'للجميع'),
@@ -66,7 +94,7 @@ class Product(models.Model):
     
     # معلومات أساسية
     name = models.CharField(max_length=200)
-    sku = models.CharField(max_length=50, unique=True)  # رمز المنتج
+    sku = models.CharField(max_length=50)  # رمز المنتج (فريد داخل كل عميل)
     brand = models.ForeignKey(Brand, on_delete=models.CASCADE)
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
     
@@ -110,6 +138,44 @@ class Product(models.Model):
     meta_title = models.CharField(max_length=200, blank=True)
     meta_description = models.CharField(max_length=300, blank=True)
     
+    # البحث النصي (يتم تحديثه من tenant.search، والفهارس تُنشأ بعد migrate)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
+    # نسخ محسوبة في قاعدة البيانات من current_price و profit_margin للترتيب والتصفية
+    # (تتحدث تلقائياً مع أي تعديل، لكن قيمتها على الكائن تحتاج refresh_from_db بعد save)
+    effective_price = models.GeneratedField(
+        expression=Coalesce(NullIf('discount_price', 0), 'selling_price'),
+        output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        db_persist=True,
+    )
+    margin_percent = models.GeneratedField(
+        expression=Cast(
+            (Coalesce(NullIf('discount_price', 0), 'selling_price') - models.F('cost_price'))
+            * 100 / NullIf('cost_price', 0),
+            models.FloatField(),
+        ),
+        output_field=models.FloatField(),
+        db_persist=True,
+    )
+    
+    objects = TenantManager.from_queryset(ProductQuerySet)()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tenant', 'sku'], name='product_tenant_sku_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['tenant', 'is_active', 'effective_price'], name='product_active_price_idx'),
+            models.Index(fields=['tenant', 'is_active', 'margin_percent'], name='product_active_margin_idx'),
+            models.Index(fields=['tenant', 'brand'], name='product_tenant_brand_idx'),
+            models.Index(fields=['tenant', 'created_at', 'id'], name='product_tenant_created_idx'),
+            # البحث النصي، وفهارس trigram على UPPER(...) تخدم أيضاً استعلامات icontains
+            # (إضافة pg_trgm تُنشأ في migration قبل هذه الفهارس)
+            GinIndex(fields=['search_vector'], name='tenant_product_search_idx'),
+            GinIndex(OpClass(Upper('sku'), name='gin_trgm_ops'), name='tenant_product_sku_trgm_idx'),
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='tenant_product_name_trgm_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.brand.name} {self.name}"
     
@@ -123,7 +189,7 @@ class Product(models.Model):
         """هامش الربح"""
         return ((self.current_price - self.cost_price) / self.cost_price) * 100
 
-class ProductImage(models.Model):
+class ProductImage(TenantMixin):
     """صور إضافية للمنتج"""
     product = models.ForeignKey(Product, related_name='images', on_delete=models.CASCADE)
     image = models.ImageField(upload_to='products/')
@@ -133,7 +199,7 @@ class ProductImage(models.Model):
     class Meta:
         ordering = ['order']
 
-class ProductVariant(models.Model):
+class ProductVariant(TenantMixin):
     """أشكال مختلفة للمنتج (ألوان مختلفة مثلاً)"""
     product = models.ForeignKey(Product, related_name='variants', on_delete=models.CASCADE)
     color = models.CharField(max_length=50)
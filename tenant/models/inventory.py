@@ -1,6 +1,12 @@
 
 # models/inventory.py - إدارة المخزون
-class Supplier(models.Model):
+from django.conf import settings
+from django.db import models, router, transaction
+
+from .base import TenantManager, TenantMixin, TenantQuerySet
+from .glasses import Product
+
+class Supplier(TenantMixin):
     """الموردين"""
     name = models.CharField(max_length=200)
     contact_person = models.CharField(max_length=100, blank=True)
@@ -13,9 +19,29 @@ class Supplier(models.Model):
     def __str__(self):
         return self.name
 
-class Stock(models.Model):
+# شرط إعادة الطلب داخل قاعدة البيانات (مطابق لـ Stock.needs_reorder)
+# الصيغة نفسها مستخدمة في الفهرس الجزئي حتى يستطيع PostgreSQL استخدامه
+REORDER_CONDITION = models.Q(
+    quantity_on_hand__lte=models.F('quantity_reserved') + models.F('reorder_point')
+)
+
+class StockQuerySet(TenantQuerySet):
+    def with_available(self):
+        """إضافة الكمية المتاحة كعمود محسوب في الاستعلام"""
+        return self.annotate(
+            available=models.F('quantity_on_hand') - models.F('quantity_reserved')
+        )
+    
+    def needs_reorder(self):
+        """المنتجات التي وصلت لنقطة إعادة الطلب (تستخدم الفهرس الجزئي)"""
+        return self.filter(REORDER_CONDITION)
+
+class Stock(TenantMixin):
     """مخزون المنتجات"""
     product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name='stock')
+    preferred_supplier = models.ForeignKey(
+        Supplier, on_delete=models.SET_NULL, null=True, blank=True, related_name='stock_items'
+    )
     quantity_on_hand = models.IntegerField(default=0)
     quantity_reserved = models.IntegerField(default=0)  # محجوز للطلبات
     reorder_point = models.IntegerField(default=10)  # نقطة إعادة الطلب
@@ -27,6 +53,18 @@ class Stock(models.Model):
     
     last_updated = models.DateTimeField(auto_now=True)
     
+    objects = TenantManager.from_queryset(StockQuerySet)()
+    
+    class Meta:
+        indexes = [
+            # فهرس جزئي يحتوي فقط المنتجات التي تحتاج إعادة طلب
+            models.Index(
+                fields=['tenant', 'preferred_supplier', 'product'],
+                condition=REORDER_CONDITION,
+                name='stock_needs_reorder_idx',
+            ),
+        ]
+    
     @property
     def available_quantity(self):
         """الكمية المتاحة للبيع"""
@@ -37,7 +75,7 @@ class Stock(models.Model):
         """هل يحتاج إعادة طلب؟"""
         return self.available_quantity <= self.reorder_point
 
-class StockMovement(models.Model):
+class StockMovement(TenantMixin):
     """حركات المخزون"""
     MOVEMENT_TYPES = [
         ('in', 'دخول'),
@@ -52,8 +90,48 @@ class StockMovement(models.Model):
     unit_cost = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     reference_number = models.CharField(max_length=100, blank=True)  # رقم الفاتورة أو الطلب
     notes = models.TextField(blank=True)
-    created_by = models.ForeignKey(User, on_delete=models.CASCADE)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    # أنواع الحركات التي تُطبّق كميتها بإشارتها (باقي الأنواع تُخصم): 'in' موجبة دائماً،
+    # و'adjustment' و'transfer' تحمل الاتجاه في الإشارة (موجبة = وارد من فرع آخر، سالبة = صادر)
+    SIGNED_TYPES = ('in', 'adjustment', 'transfer')
+    
+    class Meta:
+        indexes = [
+            # إعادة تطبيق حركات منتج بعد نقطة مرجعية (verify_stock)
+            models.Index(fields=['product', 'id']),
+        ]
+    
     def __str__(self):
         return f"{self.product.name} - {self.movement_type} - {self.quantity}"
+    
+    @property
+    def signed_quantity(self):
+        """أثر الحركة على الكمية المتوفرة"""
+        return self.quantity if self.movement_type in self.SIGNED_TYPES else -self.quantity
+    
+    def save(self, *args, **kwargs):
+        # كل حركة جديدة تُطبّق على Stock في نفس الـ transaction
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+        
+        from tenant.ledger import apply_movement
+        using = kwargs.get('using') or router.db_for_write(StockMovement, instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+            apply_movement(self, using)
+
+class StockCheckpoint(TenantMixin):
+    """
+    نقطة مرجعية لكمية كل منتج
+    المطابقة تعيد تطبيق الحركات التي بعد movement_id فقط بدل كل الجدول
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name='stock_checkpoint')
+    quantity = models.IntegerField(default=0)
+    movement_id = models.BigIntegerField(default=0)  # آخر حركة مشمولة في الكمية
+    created_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.product_id} - {self.quantity} @ {self.movement_id}"
+
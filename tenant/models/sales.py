@@ -1,5 +1,10 @@
-0
-class Order(models.Model):
+# models/sales.py - الطلبات والمبيعات
+from django.conf import settings
+from django.db import models
+
+from .base import TenantMixin
+
+class Order(TenantMixin):
     """طلبات الشراء"""
     STATUS_CHOICES = [
         ('pending', 'في الانتظار'),
@@ -18,7 +23,7 @@ class Order(models.Model):
     ]
     
     # معلومات الطلب الأساسية
-    order_number = models.CharField(max_length=20, unique=True)
+    order_number = models.CharField(max_length=20)  # فريد داخل كل عميل
     customer = models.ForeignKey('Customer', on_delete=models.CASCADE, related_name='orders')
     
     # حالة الطلب
@@ -44,7 +49,19 @@ class Order(models.Model):
     expected_delivery = models.DateTimeField(null=True, blank=True)
     
     # موظف المبيعات المسؤول
-    sales_person = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    sales_person = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tenant', 'order_number'], name='order_tenant_number_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['tenant', 'customer', 'created_at'], name='order_tenant_customer_idx'),
+            models.Index(fields=['tenant', 'status', 'created_at'], name='order_tenant_status_idx'),
+            # تحديث جداول التجميع: الطلبات المعدلة بعد آخر علامة، ثم طلبات الأيام المتأثرة
+            models.Index(fields=['tenant', 'updated_at'], name='order_tenant_updated_idx'),
+            models.Index(fields=['tenant', 'created_at'], name='order_tenant_created_idx'),
+        ]
     
     def __str__(self):
         return f"طلب {self.order_number} - {self.customer.full_name}"
@@ -66,27 +83,25 @@ class Order(models.Model):
         super().save(*args, **kwargs)
     
     def generate_order_number(self):
-        """إنشاء رقم طلب فريد"""
-        import datetime
-        today = datetime.date.today()
+        """إنشاء رقم طلب فريد من عداد اليوم (بدون البحث في جدول الطلبات)"""
+        from tenant.sequences import order_numbers
         # تنسيق: ORD-YYYYMMDD-XXXX
-        prefix = f"ORD-{today.strftime('%Y%m%d')}"
-        
-        # البحث عن آخر رقم طلب لليوم الحالي
-        last_order = Order.objects.filter(
-            order_number__startswith=prefix
-        ).order_by('-created_at').first()
-        
-        if last_order:
-            # استخراج الرقم التسلسلي وزيادته
-            last_number = int(last_order.order_number.split('-')[-1])
-            next_number = last_number + 1
-        else:
-            next_number = 1
-        
-        return f"{prefix}-{next_number:04d}"
+        return order_numbers.next_number()
+
+class OrderNumberSequence(TenantMixin):
+    """عداد أرقام الطلبات: صف واحد لكل يوم يحمل آخر رقم تم حجزه"""
+    day = models.DateField()
+    last_value = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tenant', 'day'], name='order_sequence_tenant_day_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.day} - {self.last_value}"
 
-class OrderItem(models.Model):
+class OrderItem(TenantMixin):
     """عناصر الطلب"""
     order = models.ForeignKey(Order, related_name='items', on_delete=models.CASCADE)
     product = models.ForeignKey('Product', on_delete=models.CASCADE)
@@ -101,4 +116,4 @@ class OrderItem(models.Model):
     lens_type = models.ForeignKey('LensType', on_delete=models.SET_NULL, null=True, blank=True)
     prescription = models.ForeignKey('PrescriptionRecord', on_delete=models.SET_NULL, null=True, blank=True)
     
-    # معلومات خاصة
\ No newline at end of file
+    # معلومات خاصة
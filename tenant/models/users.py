@@ -0,0 +1,16 @@
+# models/users.py - مستخدمي المتجر
+import uuid
+
+from django.contrib.auth.models import AbstractUser
+from django.db import models
+
+class CustomUser(AbstractUser):
+    ROLE_CHOICES = (
+        ('admin', 'Admin'),
+        ('sales', 'Sales'),
+        ('technician', 'Technician'),
+    )
+    role = models.CharField(max_length=20, choices=ROLE_CHOICES)
+    # هوية ثابتة للمستخدم عبر القواعد: نفس الشخص له صف في قاعدة العميل وصف في 'default'
+    # بمفتاحين مختلفين، وعضويات UserTenant تُطابق بهذه القيمة وليس بالمفتاح
+    global_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
@@ -0,0 +1,41 @@
+# replenishment.py - تقرير إعادة الطلب مجمّعاً حسب المورد
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Greatest
+
+from .models import Stock
+
+# الكمية المقترحة: حتى الحد الأقصى للمخزون
+SUGGESTED_QUANTITY = Greatest(
+    F('max_stock_level') - (F('quantity_on_hand') - F('quantity_reserved')), 0
+)
+
+
+def replenishment_summary(using=None):
+    """عدد المنتجات وإجمالي الكميات المقترحة لكل مورد (استعلام واحد مجمّع)"""
+    return list(
+        Stock.objects.using(using)
+        .needs_reorder()
+        .values('preferred_supplier', 'preferred_supplier__name')
+        .annotate(products=Count('id'), suggested_units=Sum(SUGGESTED_QUANTITY))
+        .order_by('preferred_supplier__name')
+    )
+
+
+def replenishment_lines(supplier_id=None, using=None, chunk_size=2000):
+    """
+    تفاصيل المنتجات التي تحتاج إعادة طلب، مرتبة حسب المورد
+    تُقرأ بـ iterator حتى لا يتم تحميل كل الكتالوج في الذاكرة
+    """
+    queryset = Stock.objects.using(using).needs_reorder().with_available()
+    if supplier_id is not None:
+        queryset = queryset.filter(preferred_supplier_id=supplier_id)
+    return (
+        queryset
+        .annotate(suggested_quantity=SUGGESTED_QUANTITY)
+        .values(
+            'preferred_supplier', 'product_id', 'product__sku', 'product__name',
+            'available', 'reorder_point', 'max_stock_level', 'suggested_quantity',
+        )
+        .order_by('preferred_supplier', 'product_id')
+        .iterator(chunk_size=chunk_size)
+    )
@@ -0,0 +1,135 @@
+# search.py - البحث النصي والتصفية حسب الخصائص في كتالوج المنتجات
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections, router
+from django.db.models import Case, CharField, Count, F, Q, Value, When
+
+from .models import Product
+
+# لغات البحث: كل نص يُفهرس بالعربية والإنجليزية معاً
+SEARCH_CONFIGS = getattr(settings, 'PRODUCT_SEARCH_CONFIGS', ('english', 'arabic'))
+
+# حدود شرائح السعر المستخدمة في facets
+PRICE_BUCKETS = getattr(settings, 'PRODUCT_PRICE_BUCKETS', (100, 250, 500, 1000))
+
+FACET_FIELDS = ('brand_id', 'frame_shape', 'gender', 'frame_material_id', 'price_bucket')
+
+
+def _tsvector_sql(column, weight):
+    return ' || '.join(
+        f"setweight(to_tsvector('{config}', coalesce({column}, '')), '{weight}')"
+        for config in SEARCH_CONFIGS
+    )
+
+
+def refresh_search_vectors(product_ids=None, using=None):
+    """
+    تحديث search_vector بجملة UPDATE واحدة (مع اسم العلامة التجارية)
+    product_ids=None يعني كل المنتجات
+    """
+    using = using or router.db_for_write(Product)
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+
+    from .models import Brand
+    qn = connection.ops.quote_name
+    vector = ' || '.join([
+        _tsvector_sql('p.name', 'A'),
+        f"setweight(to_tsvector('simple', coalesce(p.sku, '')), 'A')",
+        _tsvector_sql('b.name', 'B'),
+        _tsvector_sql('p.short_description', 'C'),
+        _tsvector_sql('p.description', 'D'),
+    ])
+    sql = (
+        f"UPDATE {qn(Product._meta.db_table)} AS p SET search_vector = {vector} "
+        f"FROM {qn(Brand._meta.db_table)} AS b WHERE b.id = p.brand_id"
+    )
+    params = []
+    if product_ids is not None:
+        sql += " AND p.id = ANY(%s)"
+        params.append(list(product_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def price_bucket():
+    """رقم شريحة السعر الحالي (مع الخصم) من العمود المحسوب effective_price"""
+    whens, lower = [], 0
+    for upper in PRICE_BUCKETS:
+        whens.append(When(effective_price__lt=upper, then=Value(f"{lower}-{upper}")))
+        lower = upper
+    return Case(*whens, default=Value(f"{lower}+"), output_field=CharField())
+
+
+def search_products(query=None, using=None, **filters):
+    """
+    البحث في المنتجات النشطة مع التصفية حسب الخصائص
+    filters: brand, frame_shape, gender, frame_material, min_price, max_price
+    PostgreSQL: tsvector (عربي/إنجليزي) + trigram على sku والاسم
+    SQLite (الاختبارات): icontains
+    """
+    using = using or router.db_for_read(Product)
+    queryset = (
+        Product.objects.using(using)
+        .filter(is_active=True)
+        .annotate(price_bucket=price_bucket())
+    )
+
+    for field in ('brand', 'frame_shape', 'gender', 'frame_material'):
+        if filters.get(field):
+            queryset = queryset.filter(**{field: filters[field]})
+    queryset = queryset.price_between(filters.get('min_price'), filters.get('max_price'))
+
+    if not query:
+        return queryset.order_by('-created_at')
+
+    if connections[using].vendor != 'postgresql':
+        return queryset.filter(
+            Q(name__icontains=query) | Q(sku__icontains=query)
+            | Q(description__icontains=query) | Q(brand__name__icontains=query)
+        ).order_by('name')
+
+    search_query = SearchQuery(query, config=SEARCH_CONFIGS[0], search_type='websearch')
+    for config in SEARCH_CONFIGS[1:]:
+        search_query |= SearchQuery(query, config=config, search_type='websearch')
+    return (
+        queryset
+        .filter(Q(search_vector=search_query) | Q(sku__icontains=query) | Q(name__icontains=query))
+        .annotate(rank=SearchRank(F('search_vector'), search_query))
+        .order_by('-rank', 'name')
+    )
+
+
+def facet_counts(queryset):
+    """
+    عدد المنتجات لكل قيمة من الخصائص (العلامة، الشكل، الجنس، المادة، شريحة السعر)
+    PostgreSQL: استعلام واحد بـ GROUPING SETS، غير ذلك استعلام لكل خاصية
+    """
+    queryset = queryset.order_by()
+    facets = {field: {} for field in FACET_FIELDS}
+
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        for field in FACET_FIELDS:
+            for row in queryset.values(field).annotate(count=Count('id')):
+                facets[field][row[field]] = row['count']
+        return facets
+
+    inner_sql, params = queryset.values(*FACET_FIELDS).query.sql_with_params()
+    columns = ', '.join(FACET_FIELDS)
+    sets = ', '.join(f"({field})" for field in FACET_FIELDS)
+    groupings = ', '.join(f"GROUPING({field})" for field in FACET_FIELDS)
+    sql = (
+        f"SELECT {columns}, {groupings}, COUNT(*) FROM ({inner_sql}) AS matched "
+        f"GROUP BY GROUPING SETS ({sets})"
+    )
+    size = len(FACET_FIELDS)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        for row in cursor.fetchall():
+            values, grouped, count = row[:size], row[size:size * 2], row[-1]
+            # GROUPING(x) = 0 يعني أن الصف مجمّع حسب هذا الحقل
+            field_index = grouped.index(0)
+            facets[FACET_FIELDS[field_index]][values[field_index]] = count
+    return facets
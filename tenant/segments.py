@@ -0,0 +1,151 @@
+# tenant/segments.py - شرائح التسويق: تعريف JSON -> شروط SQL على فهارس Customer
+# تعريف الشريحة dict مثل:
+#   {'birthday_within_days': 7, 'preferred_contact': 'sms', 'city': ['Riyadh', 'Jeddah']}
+# كل الشرائح تشمل فقط accepts_marketing=True (شرط الفهارس الجزئية)
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import Customer
+
+CONTACT_FIELDS = ('id', 'first_name', 'last_name', 'email', 'phone', 'preferred_contact')
+CHUNK_SIZE = 5000
+COUNT_TTL = getattr(settings, 'SEGMENT_COUNT_TTL', 600)
+# بعد سنة كاملة تتكرر نفس قيم MMDD، فلا فائدة من نطاق أطول
+MAX_BIRTHDAY_DAYS = 366
+
+
+def _birthdays(days, today):
+    """قيم MMDD للأيام القادمة (تشمل 29 فبراير في السنوات غير الكبيسة مع 28 فبراير)"""
+    values = set()
+    for offset in range(max(0, min(days, MAX_BIRTHDAY_DAYS))):
+        day = today + timedelta(days=offset)
+        values.add(day.month * 100 + day.day)
+    if 228 in values:
+        values.add(229)
+    return sorted(values)
+
+
+def _one_or_many(field, value):
+    values = value if isinstance(value, (list, tuple)) else [value]
+    if not values or not all(isinstance(item, str) for item in values):
+        raise ValueError(f"{field}: expected a string or a list of strings")
+    return Q(**{f"{field}__in": values}) if isinstance(value, (list, tuple)) else Q(**{field: value})
+
+
+def _integer(key, value):
+    """قيم التعريف تأتي من JSON: أي قيمة غير رقمية ValueError (وليس TypeError)"""
+    if isinstance(value, bool):
+        raise ValueError(f"{key}: expected an integer")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{key}: expected an integer") from None
+
+
+def _date(key, value):
+    parsed = parse_date(value) if isinstance(value, str) else None
+    if parsed is None:
+        raise ValueError(f"{key}: expected a date (YYYY-MM-DD)")
+    return parsed
+
+
+# مفتاح التعريف -> دالة تبني شرط Q
+FILTERS = {
+    'preferred_contact': lambda value, today: _one_or_many('preferred_contact', value),
+    'city': lambda value, today: _one_or_many('city', value),
+    'is_vip': lambda value, today: Q(is_vip=bool(value)),
+    'birthday_within_days': lambda value, today: Q(
+        birthday__in=_birthdays(_integer('birthday_within_days', value), today)
+    ),
+    'born_after': lambda value, today: Q(date_of_birth__gte=_date('born_after', value)),
+    'born_before': lambda value, today: Q(date_of_birth__lte=_date('born_before', value)),
+    'min_loyalty_points': lambda value, today: Q(loyalty_points__gte=_integer('min_loyalty_points', value)),
+    'customer_since_after': lambda value, today: Q(
+        customer_since__date__gte=_date('customer_since_after', value)
+    ),
+}
+# شروط تعتمد على تاريخ اليوم (يدخل التاريخ في مفتاح الكاش)
+DATE_RELATIVE = {'birthday_within_days'}
+
+
+def compile_segment(definition, today=None):
+    """تحويل تعريف الشريحة إلى Q (مفتاح أو قيمة غير صالحة = ValueError)"""
+    if not isinstance(definition, dict):
+        raise ValueError("segment must be an object")
+    unknown = set(definition) - set(FILTERS)
+    if unknown:
+        raise ValueError(f"unknown segment filters: {', '.join(sorted(unknown))}")
+    today = today or timezone.localdate()
+    condition = Q(accepts_marketing=True)
+    for key, value in definition.items():
+        condition &= FILTERS[key](value, today)
+    return condition
+
+
+def segment_queryset(definition, using=None, today=None):
+    queryset = Customer.objects.filter(compile_segment(definition, today))
+    return queryset.using(using) if using else queryset
+
+
+def stream_contacts(definition, chunk_size=CHUNK_SIZE, using=None):
+    """
+    جهات الاتصال على دفعات (قوائم dict) من server-side cursor
+    الـ queryset يُبنى قبل أول دفعة حتى تُطبق تصفية العميل الحالي
+    """
+    rows = segment_queryset(definition, using).order_by('id').values(*CONTACT_FIELDS).iterator(chunk_size=chunk_size)
+
+    def chunks():
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    return chunks()
+
+
+def _cache():
+    return caches[getattr(settings, 'TENANT_CACHE_ALIAS', None) or DEFAULT_CACHE_ALIAS]
+
+
+def _version_key(using, tenant_id):
+    return f"segments:{using}:{tenant_id}:version"
+
+
+def invalidate_counts(using, tenant_id):
+    """أي تعديل على العملاء يغير رقم الإصدار فتصبح كل الأعداد المخزنة قديمة"""
+    cache = _cache()
+    key = _version_key(using, tenant_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def segment_count(definition, using, tenant_id=None):
+    """عدد أعضاء الشريحة من الكاش، أو COUNT واحد على الفهرس ثم تخزينه"""
+    cache = _cache()
+    today = timezone.localdate()
+    # التحقق قبل بناء مفتاح الكاش: تعريف غير صالح (قائمة مثلاً) = ValueError وليس TypeError
+    condition = compile_segment(definition, today)
+    version = cache.get(_version_key(using, tenant_id), 0)
+    payload = json.dumps(definition, sort_keys=True, default=str)
+    if DATE_RELATIVE & set(definition):
+        payload += today.isoformat()
+    key = f"segments:{using}:{tenant_id}:{version}:{hashlib.md5(payload.encode()).hexdigest()}"
+
+    count = cache.get(key)
+    if count is None:
+        count = Customer.objects.using(using).filter(condition).count()
+        cache.set(key, count, COUNT_TTL)
+    return count
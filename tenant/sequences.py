@@ -0,0 +1,104 @@
+# sequences.py - توليد أرقام الطلبات بدون تعارض
+import threading
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from core.tenant_context import get_current_tenant_id
+
+from .models import OrderNumberSequence
+
+
+class OrderNumberAllocator:
+    """
+    حجز أرقام الطلبات من عداد يومي في قاعدة العميل:
+    - PostgreSQL: جملة واحدة INSERT ... ON CONFLICT DO UPDATE ... RETURNING
+      (ذرّية بدون قراءة ثم كتابة من Python)
+    - باقي القواعد: SELECT ... FOR UPDATE داخل transaction
+    مع block_size > 1 يحجز كل worker مجموعة أرقام دفعة واحدة، فلا تتزاحم
+    نقاط البيع على نفس الصف (مقابل فجوات في الترقيم عند إعادة التشغيل)
+    """
+
+    prefix = 'ORD'
+
+    def __init__(self, block_size=None):
+        self.block_size = block_size or getattr(settings, 'ORDER_NUMBER_BLOCK_SIZE', 1)
+        self._blocks = {}  # (db, tenant, day) -> [[next_value, last_value], ...]
+        # يحمي الكتل في الذاكرة فقط، ولا يُمسك أثناء الذهاب لقاعدة البيانات
+        self._lock = threading.Lock()
+
+    def format(self, day, value):
+        return f"{self.prefix}-{day.strftime('%Y%m%d')}-{value:04d}"
+
+    def next_number(self, using=None):
+        """رقم الطلب التالي لليوم الحالي (بتوقيت المتجر)"""
+        using = using or router.db_for_write(OrderNumberSequence)
+        tenant_id = get_current_tenant_id()
+        day = timezone.localdate()
+        if self.block_size == 1:
+            return self.format(day, self.reserve(day, 1, using, tenant_id))
+
+        key = (using, tenant_id, day)
+        with self._lock:
+            value = self._take(key)
+        if value is None:
+            # حجز كتلة جديدة خارج القفل: باقي العملاء والـ threads لا ينتظرون هذا الاستعلام.
+            # إذا حجز thread آخر كتلة لنفس المفتاح في نفس الوقت تُحفظ الكتلتان وتُستهلكان بالترتيب
+            last = self.reserve(day, self.block_size, using, tenant_id)
+            value = last - self.block_size + 1
+            with self._lock:
+                if value < last:
+                    self._blocks.setdefault(key, []).append([value + 1, last])
+                # حذف الكتل القديمة من الأيام السابقة
+                for old_key in [k for k in self._blocks if k[2] != day]:
+                    del self._blocks[old_key]
+
+        return self.format(day, value)
+
+    def _take(self, key):
+        """الرقم التالي من الكتل المحجوزة في الذاكرة (None إذا انتهت)"""
+        blocks = self._blocks.get(key)
+        if not blocks:
+            return None
+        block = blocks[0]
+        value = block[0]
+        block[0] += 1
+        if block[0] > block[1]:
+            blocks.pop(0)
+        return value
+
+    def allocate_block(self, count, using=None):
+        """حجز count رقماً متتالياً دفعة واحدة (للإدخال الجماعي)"""
+        using = using or router.db_for_write(OrderNumberSequence)
+        day = timezone.localdate()
+        last = self.reserve(day, count, using, get_current_tenant_id())
+        return [self.format(day, value) for value in range(last - count + 1, last + 1)]
+
+    def reserve(self, day, count, using, tenant_id):
+        """زيادة عداد اليوم للعميل بمقدار count وإرجاع آخر رقم محجوز"""
+        connection = connections[using]
+        if connection.vendor == 'postgresql':
+            table = connection.ops.quote_name(OrderNumberSequence._meta.db_table)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO {table} (tenant_id, day, last_value) VALUES (%s, %s, %s) "
+                    f"ON CONFLICT (tenant_id, day) DO UPDATE "
+                    f"SET last_value = {table}.last_value + EXCLUDED.last_value "
+                    f"RETURNING last_value",
+                    [tenant_id, day, count],
+                )
+                return cursor.fetchone()[0]
+
+        with transaction.atomic(using=using):
+            sequence, _ = (
+                OrderNumberSequence.objects.using(using)
+                .select_for_update()
+                .get_or_create(day=day)
+            )
+            sequence.last_value += count
+            sequence.save(using=using, update_fields=['last_value'])
+            return sequence.last_value
+
+
+order_numbers = OrderNumberAllocator()
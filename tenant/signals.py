@@ -0,0 +1,108 @@
+# tenant/signals.py - إشارات تطبيق tenant
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.limits import track_active_change, usage_counters
+
+from .customer360 import record_order_change, refresh_prescription
+from .models import Brand, Customer, CustomerSummary, Order, OrderItem, PrescriptionRecord, Product
+from .search import refresh_search_vectors
+from .segments import invalidate_counts
+
+
+@receiver(post_save, sender=Product)
+def refresh_product_search_vector(sender, instance, using, **kwargs):
+    refresh_search_vectors([instance.pk], using=using)
+
+
+@receiver(post_save, sender=Brand)
+def refresh_brand_search_vectors(sender, instance, created, using, **kwargs):
+    """اسم العلامة التجارية جزء من نص البحث لكل منتجاتها"""
+    if not created:
+        product_ids = Product.objects.using(using).filter(brand=instance).values_list('id', flat=True)
+        refresh_search_vectors(list(product_ids), using=using)
+
+
+@receiver(pre_save, sender=Product)
+def remember_product_state(sender, instance, using, **kwargs):
+    if instance.pk:
+        instance._was_active = (
+            Product._base_manager.using(using)
+            .filter(pk=instance.pk)
+            .values_list('is_active', flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Product)
+def count_product(sender, instance, created, **kwargs):
+    """عداد المنتجات النشطة لحدود الخطة"""
+    track_active_change(instance, created, 'products', instance.tenant_id)
+
+
+@receiver(post_delete, sender=Product)
+def uncount_product(sender, instance, **kwargs):
+    if instance.is_active:
+        usage_counters.increment(instance.tenant_id, 'products', -1)
+
+
+@receiver(pre_save, sender=Order)
+def remember_order_state(sender, instance, using, **kwargs):
+    """مساهمة الطلب القديمة في ملخص العميل (لتطبيق الفرق فقط بعد الحفظ)"""
+    instance._previous = None
+    if instance.pk:
+        instance._previous = (
+            Order._base_manager.using(using)
+            .filter(pk=instance.pk)
+            .values('customer_id', 'status', 'payment_status', 'total_amount', 'paid_amount')
+            .first()
+        )
+
+
+@receiver(post_save, sender=Order)
+def update_summary_on_order(sender, instance, using, **kwargs):
+    record_order_change(instance, getattr(instance, '_previous', None), using)
+
+
+@receiver(post_delete, sender=Order)
+def update_summary_on_order_delete(sender, instance, using, **kwargs):
+    previous = {
+        'customer_id': instance.customer_id, 'status': instance.status,
+        'payment_status': instance.payment_status,
+        'total_amount': instance.total_amount, 'paid_amount': instance.paid_amount,
+    }
+    record_order_change(None, previous, using)
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def touch_order_on_item_change(sender, instance, using, **kwargs):
+    """تعديل العناصر وحدها يجب أن يظهر في updated_at للطلب حتى يعيد refresh_rollups حساب يومه"""
+    Order._base_manager.using(using).filter(pk=instance.order_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=PrescriptionRecord)
+def update_summary_on_prescription(sender, instance, using, **kwargs):
+    refresh_prescription(instance.customer_id, using)
+
+
+@receiver(post_delete, sender=PrescriptionRecord)
+def update_summary_on_prescription_delete(sender, instance, using, **kwargs):
+    refresh_prescription(instance.customer_id, using, create=False)
+
+
+@receiver(post_save, sender=Customer)
+def create_customer_summary(sender, instance, created, using, raw=False, **kwargs):
+    """العميل الجديد يحصل على ملخص صفري حتى تفتح شاشته قبل أول طلب أو وصفة"""
+    if created and not raw:
+        CustomerSummary.objects.using(using).bulk_create(
+            [CustomerSummary(customer_id=instance.pk, tenant_id=instance.tenant_id)],
+            ignore_conflicts=True,
+        )
+
+
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+def invalidate_segment_counts(sender, instance, using, **kwargs):
+    invalidate_counts(using, instance.tenant_id)
@@ -0,0 +1,53 @@
+# streaming.py - استجابات متدفقة من قاعدة العميل تعمل في WSGI و ASGI
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+from core.schemas import PUBLIC_SCHEMA, switch_schema
+
+# عدد الأجزاء (أسطر NDJSON مثلاً) التي تُقرأ في كل انتقال إلى thread قاعدة البيانات
+BATCH_PARTS = 500
+
+
+def streaming_response(request, parts, content_type, batch=BATCH_PARTS):
+    """
+    StreamingHttpResponse من generator متزامن يقرأ من قاعدة البيانات
+    - ASGI: StreamingHttpResponse يستهلك الـ generator المتزامن كاملاً بـ
+      sync_to_async(list) قبل إرسال أول بايت، لذلك يتم تمرير async iterator يسحب
+      دفعة batch جزءاً في كل مرة من نفس thread الـ view (thread_sensitive) الذي
+      يملك الاتصال والـ server-side cursor
+    - الجسم يُقرأ بعد خروج الطلب من TenantMiddleware (الذي يعيد search_path إلى
+      public)، لذلك يُفعَّل schema العميل حول كل دفعة في وضع schema
+    """
+    tenant = getattr(request, 'tenant', None)
+    pull = _puller(iter(parts), tenant.active_schema if tenant else PUBLIC_SCHEMA, batch)
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        content = _aiterate(pull)
+    else:
+        content = _iterate(pull)
+    return StreamingHttpResponse(content, content_type=content_type)
+
+
+def _puller(iterator, schema, batch):
+    def pull():
+        previous = switch_schema(schema) if schema != PUBLIC_SCHEMA else None
+        try:
+            chunk = list(islice(iterator, batch))
+        finally:
+            if previous is not None:
+                switch_schema(previous)
+        return ''.join(chunk) if chunk else None
+    return pull
+
+
+def _iterate(pull):
+    while (chunk := pull()) is not None:
+        yield chunk
+
+
+async def _aiterate(pull):
+    pull = sync_to_async(pull)
+    while (chunk := await pull()) is not None:
+        yield chunk
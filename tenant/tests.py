@@ -1,3 +1,696 @@
-from django.test import TestCase
+import datetime
+import threading
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import async_to_sync
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections
+from django.test import RequestFactory
+from django.db.models import F
+from django.utils import timezone
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.models import Tenant, UserTenant
+from core.tenant_context import reset_current_tenant_id, set_current_tenant_id, using_tenant
+
+from . import views
+from .analytics import refresh_rollups, sales_report
+from .bulk import apply_stock_deltas, ingest_orders
+from .ledger import reconcile, safe_movement_horizon
+from .lens_matching import PD_TOLERANCE_MM, STRONG_POWER, match, match_active_prescriptions
+from .models import (
+    Brand, Category, CustomUser, Customer, CustomerSummary, DailyProductSales, DailySales, FrameMaterial,
+    LoyaltyTransaction, MonthlySales, Order, OrderItem, PrescriptionRecord, Product, Stock, StockMovement,
+)
+from .search import search_products
+from .loyalty import adjust, expire_points, fifo_expiry, redeem
+from .segments import MAX_BIRTHDAY_DAYS, _birthdays, compile_segment, segment_count
+from .sequences import OrderNumberAllocator
+from .streaming import streaming_response
+
+
+class TenantContextMixin:
+    """تعيين عميل حالي حتى لا تُرجع TenantManager استعلاماً فارغاً على الجداول المشتركة"""
+
+    def setUp(self):
+        super().setUp()
+        token = set_current_tenant_id(1)
+        self.addCleanup(reset_current_tenant_id, token)
+
+
+class ProductSearchTests(TenantContextMixin, SimpleTestCase):
+    """البحث بدون قاعدة بيانات: بناء الاستعلام فقط"""
+
+    def test_fallback_without_postgres_uses_icontains(self):
+        with mock.patch.object(connections['default'], 'vendor', 'sqlite'):
+            queryset = search_products('rayban', using='default')
+        where = str(queryset.query).split(' WHERE ', 1)[1]
+        self.assertNotIn('search_vector', where)
+        self.assertIn('LIKE', where)
+        self.assertEqual(queryset.query.order_by, ('name',))
+
+    def test_postgres_uses_search_vector_and_rank(self):
+        queryset = search_products('rayban', using='default')
+        where = str(queryset.query).split(' WHERE ', 1)[1]
+        self.assertIn('search_vector', where)
+        self.assertEqual(queryset.query.order_by, ('-rank', 'name'))
+
+    def test_limit_is_capped(self):
+        self.assertEqual(views._limit_param({'limit': '1000'}), 200)
+        self.assertEqual(views._limit_param({}), 50)
+
+
+class OrderNumberAllocatorTests(TenantContextMixin, SimpleTestCase):
+    """توزيع الكتل في الذاكرة، مع استبدال reserve بعداد محلي بدل قاعدة البيانات"""
+
+    def make_allocator(self, block_size):
+        allocator = OrderNumberAllocator(block_size=block_size)
+        counters, lock = {}, threading.Lock()
+
+        def reserve(day, count, using, tenant_id):
+            with lock:
+                counters[using] = counters.get(using, 0) + count
+                return counters[using]
+
+        allocator.reserve = reserve
+        return allocator
+
+    def test_concurrent_blocks_have_no_duplicates_or_gaps(self):
+        allocator = self.make_allocator(block_size=7)
+        numbers = []
+
+        def worker():
+            for _ in range(50):
+                numbers.append(allocator.next_number(using='default'))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        values = sorted(int(number.rsplit('-', 1)[1]) for number in numbers)
+        self.assertEqual(len(set(values)), 400)
+        # الكتل المحجوزة بالتوازي تُستهلك كلها، فالفجوات فقط في آخر كتلة غير مكتملة
+        self.assertLess(values[-1], 400 + 8 * 7)
+
+    def test_reserve_runs_outside_the_lock(self):
+        allocator = self.make_allocator(block_size=10)
+        plain_reserve = allocator.reserve
+        started, release = threading.Event(), threading.Event()
+
+        def slow_reserve(day, count, using, tenant_id):
+            if using == 'slow':
+                started.set()
+                release.wait(5)
+            return plain_reserve(day, count, using, tenant_id)
+
+        allocator.reserve = slow_reserve
+        slow = threading.Thread(target=allocator.next_number, kwargs={'using': 'slow'})
+        slow.start()
+        started.wait(5)
+        # قاعدة أخرى لا تنتظر الاستعلام البطيء
+        self.assertTrue(allocator.next_number(using='default').endswith('-0001'))
+        release.set()
+        slow.join()
+
+    def test_block_size_one_skips_the_cache(self):
+        allocator = self.make_allocator(block_size=1)
+        allocator.next_number(using='default')
+        self.assertEqual(allocator._blocks, {})
+
+
+class TenantTestCase(TestCase):
+    """اختبارات على قاعدة البيانات في وضع الجداول المشتركة لعميل واحد"""
+
+    def setUp(self):
+        super().setUp()
+        self.tenant = Tenant.objects.create(name='Vision', subdomain='vision', db_name='tenant_vision', placement='shared')
+        token = set_current_tenant_id(self.tenant.pk)
+        self.addCleanup(reset_current_tenant_id, token)
+        self.user = CustomUser.objects.create_user(username='staff', password='x')
+
+
+def make_product(sku='RB-1', quantity_on_hand=0):
+    brand = Brand.objects.create(name='Ray-Ban')
+    product = Product.objects.create(
+        name='Aviator', sku=sku, brand=brand,
+        category=Category.objects.create(name='Sunglasses'),
+        frame_material=FrameMaterial.objects.create(name='Metal'),
+        frame_shape='round', frame_color='gold', frame_size='58-14-140',
+        bridge_width=14, lens_width=58, temple_length=140,
+        cost_price=100, selling_price=250,
+    )
+    Stock.objects.filter(product=product).delete()
+    Stock.objects.create(product=product, quantity_on_hand=quantity_on_hand)
+    return product
+
+
+class TenantIsolationTests(TenantTestCase):
+    """عميلان في نفس الجداول المشتركة: لا يرى أحدهما صفوف الآخر ولا يعدّلها"""
+
+    def setUp(self):
+        super().setUp()
+        self.product = make_product(sku='RB-A')
+        self.customer = Customer.objects.create(first_name='Sara', last_name='Ali', email='sara@example.com')
+        self.other = Tenant.objects.create(name='Other', subdomain='other', db_name='tenant_other', placement='shared')
+        with self.as_other():
+            self.other_product = make_product(sku='RB-B')
+            self.other_customer = Customer.objects.create(first_name='Omar', last_name='Zaid', email='omar@example.com')
+            # صف خاطئ من العميل الآخر يشير إلى عميل مشترٍ لدى العميل الحالي
+            self.stray_order = Order.objects.create(
+                order_number='B-1', customer=self.customer, subtotal=10, total_amount=10,
+            )
+
+    def as_other(self):
+        return using_tenant(self.other)
+
+    def test_reads_are_scoped(self):
+        self.assertEqual(list(Product.objects.all()), [self.product])
+        self.assertFalse(Customer.objects.filter(pk=self.other_customer.pk).exists())
+        with self.assertRaises(Product.DoesNotExist):
+            Product.objects.get(pk=self.other_product.pk)
+        with self.as_other():
+            self.assertEqual(list(Product.objects.all()), [self.other_product])
+
+    def test_update_and_delete_are_scoped(self):
+        self.assertEqual(Product.objects.filter(pk=self.other_product.pk).update(name='Hijacked'), 0)
+        self.assertEqual(Customer.objects.update(first_name='Changed'), 1)
+        Customer.objects.filter(pk=self.other_customer.pk).delete()
+        Product.objects.filter(pk=self.other_product.pk).delete()
+        self.assertEqual(Product._base_manager.get(pk=self.other_product.pk).name, 'Aviator')
+        self.assertEqual(Customer._base_manager.get(pk=self.other_customer.pk).first_name, 'Omar')
+
+    def test_related_managers_are_scoped(self):
+        self.assertFalse(self.customer.orders.exists())
+        self.assertEqual(self.customer.orders.update(notes='x'), 0)
+        self.assertEqual(list(self.product.brand.product_set.all()), [self.product])
+        self.customer.orders.all().delete()
+        self.assertTrue(Order._base_manager.filter(pk=self.stray_order.pk).exists())
+        with self.as_other():
+            self.assertEqual(list(self.customer.orders.all()), [self.stray_order])
+
+
+class BulkIngestTests(TenantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.product = make_product(quantity_on_hand=3)
+        self.customer = Customer.objects.create(first_name='Sara', last_name='Ali', email='sara@example.com')
+
+    def order(self, quantity):
+        total = 250 * quantity
+        return {'customer_id': self.customer.pk, 'subtotal': total, 'total_amount': total, 'items': [
+            {'product_id': self.product.pk, 'quantity': quantity, 'unit_price': '250'},
+        ]}
+
+    def test_deducts_stock(self):
+        ingest_orders([self.order(2)], created_by=self.user)
+        self.assertEqual(Stock.objects.get(product=self.product).quantity_on_hand, 1)
+
+    def test_rejects_batch_that_would_make_stock_negative(self):
+        with self.assertRaises(ValueError):
+            ingest_orders([self.order(2), self.order(2)], created_by=self.user)
+        self.assertEqual(Stock.objects.get(product=self.product).quantity_on_hand, 3)
+        self.assertFalse(self.customer.orders.exists())
+
+    def test_rejects_non_positive_quantity(self):
+        with self.assertRaises(ValueError):
+            ingest_orders([self.order(-5)], created_by=self.user)
+        self.assertEqual(Stock.objects.get(product=self.product).quantity_on_hand, 3)
+
+    def other_tenant_product(self):
+        other = Tenant.objects.create(name='Other', subdomain='other', db_name='tenant_other', placement='shared')
+        token = set_current_tenant_id(other.pk)
+        try:
+            return make_product(sku='RB-OTHER', quantity_on_hand=45)
+        finally:
+            reset_current_tenant_id(token)
+
+    def test_rejects_other_tenants_product(self):
+        product = self.other_tenant_product()
+        order = self.order(2)
+        order['items'][0]['product_id'] = product.pk
+        with self.assertRaises(ValueError):
+            ingest_orders([order], created_by=self.user)
+        self.assertEqual(Stock._base_manager.get(product=product).quantity_on_hand, 45)
+
+    def test_rejects_unknown_customer_and_malformed_items(self):
+        for order in (
+            dict(self.order(1), customer_id=self.customer.pk + 100),
+            dict(self.order(1), customer_id='x'),
+            dict(self.order(1), items=[{'product_id': self.product.pk, 'quantity': 1, 'unit_price': 'abc'}]),
+            dict(self.order(1), items=[{'quantity': 1, 'unit_price': '250'}]),
+        ):
+            with self.assertRaises(ValueError, msg=order):
+                ingest_orders([order], created_by=self.user)
+        self.assertFalse(Order._base_manager.exists())
+
+    def test_stock_update_is_scoped_to_the_tenant(self):
+        product = self.other_tenant_product()
+        with self.assertRaises(ValueError):
+            apply_stock_deltas({product.pk: 2}, 'default')
+        self.assertEqual(Stock._base_manager.get(product=product, tenant_id=product.tenant_id).quantity_on_hand, 45)
+
+
+class LedgerTests(TenantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.product = make_product()
+
+    def move(self, movement_type, quantity, age_minutes=0):
+        movement = StockMovement.objects.create(
+            product=self.product, movement_type=movement_type, quantity=quantity, created_by=self.user,
+        )
+        if age_minutes:
+            StockMovement.objects.filter(pk=movement.pk).update(
+                created_at=timezone.now() - datetime.timedelta(minutes=age_minutes)
+            )
+        return movement
+
+    def test_transfer_direction_follows_sign(self):
+        self.move('in', 10)
+        self.move('transfer', -4)
+        self.move('transfer', 1)
+        self.assertEqual(Stock.objects.get(product=self.product).quantity_on_hand, 7)
+
+    def test_horizon_excludes_movements_that_may_still_be_in_flight(self):
+        settled = self.move('in', 10, age_minutes=30)
+        self.move('out', 3)
+        self.assertEqual(safe_movement_horizon('default'), settled.pk)
+
+        [(product_id, on_hand, expected, recent, horizon)] = list(reconcile('default'))
+        self.assertEqual((on_hand, expected, recent, horizon), (7, 10, -3, settled.pk))
+
+
+class TenantViewTests(TenantTestCase):
+    """الـ views على نطاق العميل: عميل غير معروف 404 ومدخلات خاطئة 400"""
+
+    def setUp(self):
+        super().setUp()
+        UserTenant.objects.create(user=self.user, tenant=self.tenant, role='admin')
+
+    def call(self, view, path, tenant=True, method='get', data=None, kwargs=None, **params):
+        factory = APIRequestFactory()
+        if method == 'get':
+            request = factory.get(path, params)
+        else:
+            request = factory.post(path, data or {}, format='json')
+        request.tenant = self.tenant if tenant else None
+        request.tenant_db = 'default'
+        force_authenticate(request, user=self.user)
+        return view(request, **(kwargs or {}))
+
+    def test_product_list_without_tenant_is_404(self):
+        self.assertEqual(self.call(views.product_list, '/api/products/', tenant=False).status_code, 404)
+
+    def test_product_list_invalid_limit_is_400(self):
+        self.assertEqual(self.call(views.product_list, '/api/products/', limit='x').status_code, 400)
+        self.assertEqual(self.call(views.product_list, '/api/products/', limit='10').status_code, 200)
+
+    def test_segment_count_without_tenant_is_404(self):
+        response = self.call(views.marketing_segment_count, '/api/marketing/segments/count/', tenant=False, method='post')
+        self.assertEqual(response.status_code, 404)
+
+    def test_segment_count_invalid_value_is_400(self):
+        for segment in ({'birthday_within_days': None}, {'birthday_within_days': 'x'}):
+            response = self.call(
+                views.marketing_segment_count, '/api/marketing/segments/count/',
+                method='post', data={'segment': segment},
+            )
+            self.assertEqual(response.status_code, 400, segment)
+
+    def test_bulk_ingest_invalid_input_is_400(self):
+        customer = Customer.objects.create(first_name='Sara', last_name='Ali', email='sara@example.com')
+        for data in ({}, {'orders': [{'customer_id': customer.pk + 1, 'items': []}]}):
+            response = self.call(views.bulk_ingest_orders, '/api/orders/bulk/', method='post', data=data)
+            self.assertEqual(response.status_code, 400, data)
+
+    def test_replenishment_requires_membership(self):
+        anonymous = APIRequestFactory().get('/api/replenishment/')
+        anonymous.tenant, anonymous.tenant_db = self.tenant, 'default'
+        self.assertIn(views.replenishment_report(anonymous).status_code, (401, 403))
+        self.assertEqual(self.call(views.replenishment_report, '/api/replenishment/').status_code, 200)
+
+    def test_replenishment_invalid_supplier_is_400(self):
+        self.assertEqual(self.call(views.replenishment_report, '/api/replenishment/', supplier='abc').status_code, 400)
+        self.assertEqual(self.call(views.replenishment_report, '/api/replenishment/', supplier='1').status_code, 200)
+
+    def test_product_search_requires_membership(self):
+        anonymous = APIRequestFactory().get('/api/products/search/')
+        anonymous.tenant, anonymous.tenant_db = self.tenant, 'default'
+        self.assertIn(views.product_search(anonymous).status_code, (401, 403))
+
+    def test_product_search_invalid_limit_is_400(self):
+        for limit in ('abc', '0', '-5'):
+            self.assertEqual(self.call(views.product_search, '/api/products/search/', limit=limit).status_code, 400, limit)
+
+    def test_product_search_invalid_price_is_400(self):
+        for params in ({'min_price': 'abc'}, {'max_price': 'NaN'}):
+            self.assertEqual(self.call(views.product_search, '/api/products/search/', **params).status_code, 400)
+        response = self.call(views.product_search, '/api/products/search/', min_price='100', max_price='300.50')
+        self.assertEqual(response.status_code, 200)
+
+    def test_feature_flags_without_tenant_is_404(self):
+        self.assertEqual(self.call(views.feature_flags, '/api/features/', tenant=False).status_code, 404)
+        self.assertEqual(self.call(views.feature_flags, '/api/features/').status_code, 200)
+
+    def test_new_customer_summary_is_zeroed(self):
+        customer = Customer.objects.create(first_name='Sara', last_name='Ali', email='sara@example.com')
+        self.assertTrue(CustomerSummary.objects.filter(customer=customer).exists())
+        response = self.call(views.customer_summary, '/api/customers/summary/', kwargs={'customer_id': customer.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['order_count'], response.data['open_balance']), (0, 0))
+        self.assertIsNone(response.data['active_prescription'])
+
+    def test_customer_summary_falls_back_without_summary_row(self):
+        customer = Customer.objects.create(first_name='Sara', last_name='Ali', email='sara@example.com')
+        CustomerSummary.objects.filter(customer=customer).delete()
+        response = self.call(views.customer_summary, '/api/customers/summary/', kwargs={'customer_id': customer.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['lifetime_value'], 0)
+        missing = self.call(views.customer_summary, '/api/customers/summary/', kwargs={'customer_id': customer.pk + 1})
+        self.assertEqual(missing.status_code, 404)
+
+
+class StreamingResponseTests(TestCase):
+
+    def lines(self, count, seen_schemas=None):
+        for index in range(count):
+            if seen_schemas is not None:
+                seen_schemas.add(connections['default'].desired_schema)
+            yield f"{index}\n"
+
+    def test_wsgi_streams_in_batches(self):
+        response = streaming_response(RequestFactory().get('/'), self.lines(1200), 'text/plain', batch=500)
+        self.assertFalse(response.is_async)
+        chunks = list(response.streaming_content)
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(b''.join(chunks).count(b'\n'), 1200)
+
+    def test_asgi_uses_an_async_iterator(self):
+        request = RequestFactory().get('/')
+        request.__class__ = ASGIRequest
+        response = streaming_response(request, self.lines(1200), 'text/plain', batch=500)
+        self.assertTrue(response.is_async)
+
+        async def consume():
+            return [chunk async for chunk in response]
+
+        chunks = async_to_sync(consume)()
+        self.assertEqual(len(chunks), 3)
+
+    def test_tenant_schema_is_active_while_reading(self):
+        request = RequestFactory().get('/')
+        request.tenant = Tenant(placement='schema', schema_name='tenant_vision')
+        seen = set()
+        response = streaming_response(request, self.lines(10, seen), 'text/plain')
+        list(response.streaming_content)
+        self.assertEqual(seen, {'tenant_vision'})
+        self.assertEqual(connections['default'].desired_schema, 'public')
+
+
+class SegmentCompilationTests(SimpleTestCase):
+
+    def test_birthdays_wrap_the_year(self):
+        self.assertEqual(_birthdays(4, datetime.date(2025, 12, 30)), [101, 102, 1230, 1231])
+
+    def test_birthdays_include_leap_day_with_february_28(self):
+        self.assertIn(229, _birthdays(1, datetime.date(2025, 2, 28)))
+        self.assertNotIn(229, _birthdays(1, datetime.date(2025, 2, 27)))
+
+    def test_birthdays_are_clamped(self):
+        self.assertEqual(len(_birthdays(10 ** 9, datetime.date(2025, 1, 1))), 366)
+        self.assertEqual(_birthdays(-5, datetime.date(2025, 1, 1)), [])
+        self.assertEqual(MAX_BIRTHDAY_DAYS, 366)
+
+    def test_compiles_to_indexed_conditions(self):
+        condition = compile_segment(
+            {'birthday_within_days': '2', 'city': ['Riyadh', 'Jeddah'], 'min_loyalty_points': 100},
+            today=datetime.date(2025, 6, 1),
+        )
+        children = dict(condition.children)
+        self.assertIs(children['accepts_marketing'], True)
+        self.assertEqual(children['birthday__in'], [601, 602])
+        self.assertEqual(children['city__in'], ['Riyadh', 'Jeddah'])
+        self.assertEqual(children['loyalty_points__gte'], 100)
+
+    def test_invalid_values_raise_value_error(self):
+        for definition in (
+            {'birthday_within_days': None},
+            {'birthday_within_days': [7]},
+            {'birthday_within_days': 'soon'},
+            {'min_loyalty_points': {'gte': 5}},
+            {'born_after': 'yesterday'},
+            {'city': {'name': 'Riyadh'}},
+            {'unknown': 1},
+            ['birthday_within_days'],
+        ):
+            with self.assertRaises(ValueError, msg=definition):
+                compile_segment(definition, today=datetime.date(2025, 6, 1))
+
+
+class SegmentCountTests(TenantTestCase):
+
+    def test_loyalty_update_invalidates_cached_counts(self):
+        customer = Customer.objects.create(
+            first_name='Sara', last_name='Ali', email='sara@example.com', accepts_marketing=True,
+        )
+        segment = {'min_loyalty_points': 50}
+        self.assertEqual(segment_count(segment, 'default', self.tenant.pk), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            adjust(customer.pk, 80)
+        self.assertEqual(segment_count(segment, 'default', self.tenant.pk), 1)
+
+    def test_invalid_definition_is_value_error(self):
+        for definition in ([{'city': 'x'}], 'city', None, {'city': 'x', 'unknown': 1}):
+            with self.assertRaises(ValueError, msg=definition):
+                segment_count(definition, 'default', self.tenant.pk)
+
+
+class LoyaltyExpiryTests(TenantTestCase):
+
+    def test_fifo_arithmetic(self):
+        # 100 قديمة + 50 حديثة، استُبدلت 80 من القديمة: يبقى منها 20
+        self.assertEqual(fifo_expiry(100, 70, 50), 20)
+        # لم يُستبدل شيء: تنتهي كاملة
+        self.assertEqual(fifo_expiry(100, 150, 50), 100)
+        # الرصيد كله من الاكتسابات اللاحقة
+        self.assertEqual(fifo_expiry(100, 40, 50), 0)
+
+    def accrue(self, customer, points, expires_in_days):
+        Customer.objects.filter(pk=customer.pk).update(loyalty_points=F('loyalty_points') + points)
+        return LoyaltyTransaction.objects.create(
+            customer=customer, kind='accrual', points=points,
+            expires_at=timezone.now() + datetime.timedelta(days=expires_in_days),
+        )
+
+    def test_expires_only_what_is_left_of_the_oldest_accrual(self):
+        customer = Customer.objects.create(first_name='Sara', last_name='Ali', email='sara@example.com')
+        self.accrue(customer, 100, expires_in_days=-1)
+        self.accrue(customer, 50, expires_in_days=300)
+        redeem(customer.pk, 80)
+
+        self.assertEqual(expire_points(), (1, 20))
+        customer.refresh_from_db()
+        self.assertEqual(customer.loyalty_points, 50)
+        # تشغيل ثانٍ لا يكرر الانتهاء
+        self.assertEqual(expire_points(), (0, 0))
+
+    def test_several_due_accruals_in_one_chunk(self):
+        customer = Customer.objects.create(first_name='Sara', last_name='Ali', email='sara@example.com')
+        self.accrue(customer, 30, expires_in_days=-3)
+        self.accrue(customer, 40, expires_in_days=-2)
+        self.accrue(customer, 50, expires_in_days=300)
+        redeem(customer.pk, 50)  # يستهلك 30 الأولى و20 من الثانية
+
+        self.assertEqual(expire_points(chunk_size=10), (2, 20))
+        customer.refresh_from_db()
+        self.assertEqual(customer.loyalty_points, 50)
+
+
+class SalesRollupTests(TenantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.product = make_product()
+        customer = Customer.objects.create(first_name='Sara', last_name='Ali', email='sara@example.com')
+        self.order = Order.objects.create(customer=customer, subtotal=250, total_amount=250)
+        self.item = OrderItem.objects.create(
+            order=self.order, product=self.product, quantity=1, unit_price=250, total_price=250,
+        )
+        refresh_rollups(using='default')
+        self.day = timezone.localdate(self.order.created_at)
+
+    def test_item_only_edit_is_picked_up(self):
+        # الطلب نفسه لم يُحفظ منذ ساعتين: خارج OVERLAP لآخر تشغيل
+        Order.objects.filter(pk=self.order.pk).update(updated_at=timezone.now() - datetime.timedelta(hours=2))
+        self.item.quantity, self.item.total_price = 3, 750
+        self.item.save()
+
+        self.assertEqual(refresh_rollups(using='default'), 1)
+        self.assertEqual(DailyProductSales.objects.get(product=self.product).quantity, 3)
+
+    def test_full_refresh_drops_days_without_orders(self):
+        self.assertTrue(DailySales.objects.filter(day=self.day).exists())
+        self.order.delete()  # الطلب الوحيد في هذا اليوم
+
+        refresh_rollups(using='default', full=True)
+        self.assertFalse(DailySales.objects.filter(day=self.day).exists())
+        self.assertFalse(DailyProductSales.objects.filter(day=self.day).exists())
+        self.assertFalse(MonthlySales.objects.filter(month=self.day.replace(day=1)).exists())
+
+    def test_source_selection(self):
+        month_start = self.day.replace(day=1)
+        month_end = (month_start + datetime.timedelta(days=32)).replace(day=1) - datetime.timedelta(days=1)
+        cases = [
+            ((month_start, month_end), {'granularity': 'month'}, 'monthly_sales'),
+            ((month_start, month_end), {'granularity': 'week'}, 'daily_sales'),
+            ((self.day, self.day), {'granularity': 'month'}, 'daily_sales'),
+            ((self.day, self.day), {'metrics': ('revenue',), 'group_by': ('brand',)}, 'daily_product_sales'),
+            ((self.day, self.day), {'metrics': ('revenue',), 'group_by': ('sales_person', 'product')}, 'order_items'),
+        ]
+        for dates, options, expected in cases:
+            name, rows = sales_report(*dates, using='default', **options)
+            self.assertEqual(name, expected, options)
+            self.assertEqual(len(rows), 1, options)
+
+        name, rows = sales_report(month_start, month_end, granularity='total', using='default')
+        self.assertEqual((name, rows[0]['total_amount']), ('monthly_sales', 250))
+
+    def test_no_source(self):
+        with self.assertRaises(ValueError):
+            sales_report(self.day, self.day, metrics=('total_amount',), group_by=('product',))
+        with self.assertRaises(ValueError):
+            sales_report(self.day, self.day, granularity='hour')
+
+
+class ActivePrescriptionTests(TenantTestCase):
+    """100 ألف وصفة (واحدة حالية لكل 100): القراءة تمر بالفهرس الجزئي ولا ترجع السجل القديم"""
+
+    def setUp(self):
+        super().setUp()
+        customers = Customer.objects.bulk_create(
+            Customer(first_name='C', last_name=str(i), email=f'c{i}@example.com') for i in range(1000)
+        )
+        start = datetime.date(2020, 1, 1)
+        PrescriptionRecord.objects.bulk_create((
+            PrescriptionRecord(
+                customer=customer, prescription_date=start + datetime.timedelta(days=day),
+                is_active=day == 99, right_sphere=-1, left_sphere=-1, pupillary_distance=63,
+            )
+            for customer in customers for day in range(100)
+        ), batch_size=10_000)
+        with connections['default'].cursor() as cursor:
+            cursor.execute(f"ANALYZE {PrescriptionRecord._meta.db_table}")
+        self.customers = customers
+
+    def test_reads_go_through_the_partial_index(self):
+        customer = self.customers[500]
+        plan = customer.prescriptions.active().order_by('-prescription_date', '-id').explain()
+        self.assertIn('prescription_active_idx', plan)
+        self.assertEqual(customer.active_prescription.prescription_date, datetime.date(2020, 4, 9))
+
+        customer_ids = [customer.pk for customer in self.customers[:50]]
+        plan = PrescriptionRecord.objects.active().filter(customer_id__in=customer_ids).explain()
+        self.assertIn('prescription_active_idx', plan)
+        result = match_active_prescriptions(customer_ids)
+        expected = PrescriptionRecord.objects.filter(customer_id__in=customer_ids, is_active=True)
+        self.assertEqual(sorted(result.prescription_ids.tolist()), sorted(expected.values_list('id', flat=True)))
+        self.assertEqual(len(result), 50)
+
+
+class LensMatchingTests(SimpleTestCase):
+
+    lenses = {
+        'id': np.array([1, 2]),
+        'min_sphere': np.array([-4.0, -10.0]), 'max_sphere': np.array([4.0, 6.0]),
+        'max_cylinder': np.array([2.0, 4.0]),
+    }
+    # مرتبة حسب PD الإطار: 50 (13)، 62 (11)، 66 (12)، 70 (10)
+    frames = {'id': np.array([10, 11, 12, 13]), 'frame_pd': np.array([70.0, 62.0, 66.0, 50.0])}
+
+    def prescriptions(self, *rows):
+        columns = list(zip(*rows))
+        return {
+            'id': np.array(columns[0]),
+            'right_sphere': np.array(columns[1], dtype=float), 'right_cylinder': np.array(columns[2], dtype=float),
+            'left_sphere': np.array(columns[3], dtype=float), 'left_cylinder': np.array(columns[4], dtype=float),
+            'pupillary_distance': np.array(columns[5], dtype=float),
+        }
+
+    def test_lens_ranges_and_frame_tolerance(self):
+        nan = float('nan')
+        result = match(self.prescriptions(
+            (1, -2, -1, -2.5, -0.5, 63),  # كل العدسات، سماحية 8 مم
+            (2, -6, -1, -5, 0, 63),  # -7 خارج مدى العدسة 1، والقوة 7 تضيق السماحية إلى 4.57 مم
+            (3, -1, nan, 0, nan, 58),  # بدون cylinder
+            (4, 1, -3, 1, 0, nan),  # cylinder 3 أكبر من العدسة 1، وبدون PD: كل الإطارات
+        ), self.lenses, self.frames)
+
+        self.assertEqual(len(result), 4)
+        self.assertEqual(list(result), [
+            {'prescription_id': 1, 'lens_type_ids': [1, 2], 'frame_ids': [11, 12, 10]},
+            {'prescription_id': 2, 'lens_type_ids': [2], 'frame_ids': [11, 12]},
+            {'prescription_id': 3, 'lens_type_ids': [1, 2], 'frame_ids': [13, 11, 12]},
+            {'prescription_id': 4, 'lens_type_ids': [2], 'frame_ids': [13, 11, 12, 10]},
+        ])
+
+    def test_matches_brute_force_at_catalog_scale(self):
+        rng = np.random.default_rng(21)
+        count = 100_000
+        sphere = lambda: rng.integers(-48, 25, count) / 4
+        cylinder = lambda: -rng.integers(0, 17, count) / 4
+        prescriptions = {
+            'id': np.arange(1, count + 1),
+            'right_sphere': sphere(), 'right_cylinder': cylinder(),
+            'left_sphere': sphere(), 'left_cylinder': cylinder(),
+            'pupillary_distance': rng.integers(110, 150, count) / 2,
+        }
+        prescriptions['pupillary_distance'][rng.random(count) < 0.05] = np.nan
+        low = rng.integers(-60, 0, 200) / 4
+        lenses = {
+            'id': np.arange(1, 201), 'min_sphere': low, 'max_sphere': low + rng.integers(8, 60, 200) / 4,
+            'max_cylinder': rng.integers(4, 25, 200) / 4,
+        }
+        frames = {'id': np.arange(1, 20_001), 'frame_pd': rng.integers(80, 160, 20_000) / 2 + 14}
+
+        result = match(prescriptions, lenses, frames)
+        self.assertEqual(len(result), count)
+        for index in rng.choice(count, 300, replace=False):
+            self.assertEqual(result.options(index), self.brute_force(prescriptions, lenses, frames, index))
+
+    def brute_force(self, prescriptions, lenses, frames, index):
+        """مقارنة وصفة واحدة بكل عدسة وكل إطار بدون broadcast ولا searchsorted"""
+        eyes = [
+            (prescriptions[f'{side}_sphere'][index], prescriptions[f'{side}_cylinder'][index])
+            for side in ('right', 'left')
+        ]
+        lens_ids = [
+            int(lens_id) for lens_id, min_sph, max_sph, max_cyl in zip(*lenses.values())
+            if all(
+                min(sph, sph + cyl) >= min_sph and max(sph, sph + cyl) <= max_sph and abs(cyl) <= max_cyl
+                for sph, cyl in eyes
+            )
+        ]
+        power = max(abs(value) for sph, cyl in eyes for value in (sph, sph + cyl))
+        tolerance = PD_TOLERANCE_MM / max(1.0, power / STRONG_POWER)
+        pd = prescriptions['pupillary_distance'][index]
+        fitting = sorted(
+            (frame_pd, position) for position, frame_pd in enumerate(frames['frame_pd'])
+            if np.isnan(pd) or abs(frame_pd - pd) <= tolerance
+        )
+        return {
+            'prescription_id': int(prescriptions['id'][index]),
+            'lens_type_ids': lens_ids,
+            'frame_ids': [int(frames['id'][position]) for _, position in fitting],
+        }
+
+    def test_empty_batch(self):
+        empty = {name: np.empty(0) for name in (
+            'id', 'right_sphere', 'right_cylinder', 'left_sphere', 'left_cylinder', 'pupillary_distance',
+        )}
+        self.assertEqual(list(match(empty, self.lenses, self.frames)), [])
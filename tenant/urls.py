@@ -0,0 +1,17 @@
+from django.urls import path
+
+from . import views
+
+urlpatterns = [
+    path('health/', views.health, name='health'),
+    path('analytics/sales/', views.sales_analytics, name='sales-analytics'),
+    path('customers/<int:customer_id>/summary/', views.customer_summary, name='customer-summary'),
+    path('features/', views.feature_flags, name='feature-flags'),
+    path('marketing/segments/count/', views.marketing_segment_count, name='marketing-segment-count'),
+    path('marketing/segments/export/', views.marketing_segment_export, name='marketing-segment-export'),
+    path('orders/bulk/', views.bulk_ingest_orders, name='bulk-ingest-orders'),
+    path('products/', views.product_list, name='product-list'),
+    path('products/export/', views.product_export, name='product-export'),
+    path('products/search/', views.product_search, name='product-search'),
+    path('stock/replenishment/', views.replenishment_report, name='replenishment-report'),
+]
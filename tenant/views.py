@@ -1,3 +1,230 @@
-from django.shortcuts import render
+from decimal import Decimal, InvalidOperation
 
-# Create your views here.
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError
+from django.http import JsonResponse
+from django.utils.dateparse import parse_date
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+
+from core.permissions import TenantPermission, TenantRequired
+
+from .analytics import sales_report
+from .bulk import ingest_orders
+from .catalog import catalog_page, export_catalog
+from .models import Customer, CustomerSummary
+from .segments import segment_count, stream_contacts
+from .streaming import streaming_response
+from .replenishment import replenishment_lines, replenishment_summary
+from .search import facet_counts, search_products
+
+def _limit_param(params, default=50, maximum=200):
+    """?limit= كعدد صحيح موجب بحد أقصى، ValueError إذا لم يكن رقماً"""
+    limit = int(params.get('limit', default))
+    if limit < 1:
+        raise ValueError(limit)
+    return min(limit, maximum)
+
+
+async def health(request):
+    """فحص سريع يمر بكامل مسار ASGI (يستخدم في اختبار الحمل)"""
+    return JsonResponse({'status': 'ok', 'tenant_db': request.tenant_db})
+
+
+@api_view(['GET'])
+@permission_classes([TenantRequired])
+def feature_flags(request):
+    """حالة عدة ميزات للعميل الحالي في طلب واحد: ?feature=api_access&feature=multi_location"""
+    names = request.query_params.getlist('feature')
+    if not names:
+        return Response({'features': sorted(request.tenant.feature_set)})
+    return Response({'features': request.tenant.feature_flags(*names)})
+
+
+@api_view(['POST'])
+@permission_classes([TenantPermission])
+def bulk_ingest_orders(request):
+    """استقبال طلبات نقاط البيع غير المتصلة دفعة واحدة"""
+    try:
+        result = ingest_orders(request.data.get('orders'), created_by=request.user)
+        return Response({'success': True, **result})
+
+    except (ValueError, ValidationError, IntegrityError) as e:
+        return Response({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+
+
+@api_view(['GET'])
+@permission_classes([TenantPermission])
+def customer_summary(request, customer_id):
+    """شاشة العميل في نقطة البيع: استعلام واحد بالمفتاح (الملخص مع بيانات العميل)"""
+    summary = (
+        CustomerSummary.objects.select_related('customer')
+        .filter(customer_id=customer_id)
+        .first()
+    )
+    if summary is None:
+        # عميل أُنشئ قبل وجود الملخصات (أو عبر bulk_create) ولم يُبنَ ملخصه بعد
+        customer = Customer.objects.filter(pk=customer_id).first()
+        if customer is None:
+            return Response({'error': 'العميل غير موجود'}, status=404)
+        summary = CustomerSummary(customer=customer)
+    customer = summary.customer
+    return Response({
+        'id': customer.pk,
+        'full_name': customer.full_name,
+        'phone': customer.phone,
+        'email': customer.email,
+        'is_vip': customer.is_vip,
+        'loyalty_points': customer.loyalty_points,
+        'order_count': summary.order_count,
+        'lifetime_value': summary.lifetime_value,
+        'open_balance': summary.open_balance,
+        'last_visit': summary.last_visit,
+        'active_prescription': summary.prescription,
+    })
+
+
+def _segment_definition(request):
+    data = request.data if isinstance(request.data, dict) else {}
+    return data.get('segment') or {}
+
+
+@api_view(['POST'])
+@permission_classes([TenantPermission])
+def marketing_segment_count(request):
+    """عدد أعضاء شريحة تسويق: {"segment": {"birthday_within_days": 7, ...}}"""
+    try:
+        count = segment_count(_segment_definition(request), request.tenant_db, request.tenant.pk)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+    return Response({'count': count})
+
+
+@api_view(['POST'])
+@permission_classes([TenantPermission])
+def marketing_segment_export(request):
+    """جهات اتصال الشريحة كـ NDJSON متدفق (لأداة إرسال الحملات)"""
+    try:
+        chunks = stream_contacts(_segment_definition(request), using=request.tenant_db)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+    encoder = DjangoJSONEncoder()
+    lines = (encoder.encode(row) + '\n' for chunk in chunks for row in chunk)
+    return streaming_response(request, lines, 'application/x-ndjson')
+
+
+@api_view(['GET'])
+@permission_classes([TenantPermission])
+def sales_analytics(request):
+    """
+    لوحة المبيعات من جداول التجميع:
+    ?start=2024-01-01&end=2024-12-31&metric=total_amount&group_by=brand&granularity=month
+    """
+    params = request.query_params
+    start, end = parse_date(params.get('start') or ''), parse_date(params.get('end') or '')
+    if not start or not end:
+        return Response({'error': 'start و end مطلوبان (YYYY-MM-DD)'}, status=400)
+    try:
+        source, rows = sales_report(
+            start, end,
+            metrics=params.getlist('metric') or ['total_amount'],
+            group_by=params.getlist('group_by'),
+            granularity=params.get('granularity', 'day'),
+        )
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+    return Response({'source': source, 'results': rows})
+
+
+@api_view(['GET'])
+@permission_classes([TenantPermission])
+def replenishment_report(request):
+    """المنتجات التي تحتاج إعادة طلب: ملخص لكل مورد أو تفاصيل مورد واحد"""
+    supplier_id = request.query_params.get('supplier')
+    if supplier_id is None:
+        return Response({'suppliers': replenishment_summary()})
+    try:
+        supplier_id = int(supplier_id)
+    except ValueError:
+        return Response({'error': 'supplier يجب أن يكون رقماً'}, status=400)
+    return Response({'items': list(replenishment_lines(supplier_id=supplier_id))})
+
+
+@api_view(['GET'])
+@permission_classes([TenantPermission])
+def product_list(request):
+    """
+    الكتالوج بصفحات keyset: ?cursor=<next_cursor من الصفحة السابقة>&limit=50
+    حد المنتجات يُفحص من العداد المحفوظ وليس COUNT(*) في كل طلب
+    """
+    if not request.tenant.is_within_limits('products'):
+        return Response({
+            'error': 'تم الوصول للحد الأقصى من المنتجات'
+        }, status=403)
+
+    try:
+        limit = _limit_param(request.query_params)
+    except ValueError:
+        return Response({'error': 'limit يجب أن يكون رقماً موجباً'}, status=400)
+    try:
+        rows, next_cursor = catalog_page(request.query_params.get('cursor'), limit)
+    except ValueError:
+        return Response({'error': 'cursor غير صالح'}, status=400)
+    return Response({'results': rows, 'next_cursor': next_cursor})
+
+
+@api_view(['GET'])
+@permission_classes([TenantPermission])
+def product_export(request):
+    """تحميل الكتالوج كاملاً بشكل متدفق: ?output=ndjson (الافتراضي) أو json"""
+    fmt = 'json' if request.query_params.get('output') == 'json' else 'ndjson'
+    content_type = 'application/json' if fmt == 'json' else 'application/x-ndjson'
+    response = streaming_response(request, export_catalog(fmt, using=request.tenant_db), content_type)
+    response['Content-Disposition'] = f'attachment; filename="catalog.{fmt}"'
+    return response
+
+
+def _price_param(params, name):
+    """?min_price= / ?max_price= كـ Decimal، ValueError إذا لم يكن رقماً"""
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        price = Decimal(value)
+    except InvalidOperation:
+        raise ValueError(name)
+    if not price.is_finite():
+        raise ValueError(name)
+    return price
+
+
+@api_view(['GET'])
+@permission_classes([TenantPermission])
+def product_search(request):
+    """البحث في الكتالوج مع عدد المنتجات لكل خاصية"""
+    params = request.query_params
+    try:
+        min_price, max_price = _price_param(params, 'min_price'), _price_param(params, 'max_price')
+    except ValueError as e:
+        return Response({'error': f'{e} يجب أن يكون رقماً'}, status=400)
+    queryset = search_products(
+        params.get('q'),
+        brand=params.get('brand'),
+        frame_shape=params.get('frame_shape'),
+        gender=params.get('gender'),
+        frame_material=params.get('frame_material'),
+        min_price=min_price,
+        max_price=max_price,
+    )
+    if params.get('sort') in ('price', '-price'):
+        queryset = queryset.by_price(descending=params['sort'] == '-price')
+    try:
+        limit = _limit_param(params)
+    except ValueError:
+        return Response({'error': 'limit يجب أن يكون رقماً موجباً'}, status=400)
+    results = queryset.values('id', 'sku', 'name', 'brand_id', 'frame_shape', 'gender', 'effective_price')[:limit]
+    return Response({'results': list(results), 'facets': facet_counts(queryset)})
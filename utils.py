@@ -4,6 +4,8 @@ from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 from django.conf import settings
 from django.core.management import execute_from_command_line
 
+from core.tenant_connections import tenant_connections
+
 class TenantManager:
     @staticmethod
     def create_tenant_database(tenant_name):
@@ -25,15 +27,8 @@ class TenantManager:
         cursor.close()
         connection.close()
         
-        # إضافة قاعدة البيانات الجديدة للإعدادات
-        settings.DATABASES[db_name] = {
-            'ENGINE': 'django.db.backends.postgresql',
-            'NAME': db_name,
-            'USER': settings.DATABASES['default']['USER'],
-            'PASSWORD': settings.DATABASES['default']['PASSWORD'],
-            'HOST': settings.DATABASES['default']['HOST'],
-            'PORT': settings.DATABASES['default']['PORT'],
-        }
+        # تسجيل الاتصال عند الحاجة بدل تعديل settings.DATABASES
+        tenant_connections.register(db_name)
         
         return db_name
     